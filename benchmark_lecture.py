@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure les temps de lecture de lecture_tableaux pour chaque format et chaque moteur,
+comparés à la lecture pandas par défaut (pd.read_excel / pd.read_csv sans sélection
+de colonnes).
+
+Usage:
+    python benchmark_lecture.py [--lignes N] [--repetitions R] [fichier ...]
+
+Sans fichier, un tableau de N lignes (numéro, email et 10 colonnes de remplissage)
+est généré dans un dossier temporaire aux formats CSV, XLSX et ODS ; seules les
+deux premières colonnes sont lues.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from lecture_tableaux import MOTEUR_CALAMINE, MOTEUR_FLUX, calamine_disponible, detecter_format, lire_tableau
+
+NB_COLONNES_REMPLISSAGE = 10
+
+
+def generer_fichiers(dossier, nb_lignes):
+    """
+    Génère le même tableau aux formats CSV, XLSX et ODS.
+
+    Returns:
+        list: Chemins des fichiers générés
+    """
+    rng = np.random.default_rng(0)
+    donnees = {
+        'anonymat': rng.integers(1000, 10000, nb_lignes),
+        'email': [f"etudiant{i}@exemple.fr" for i in range(nb_lignes)],
+    }
+    for i in range(NB_COLONNES_REMPLISSAGE):
+        donnees[f"colonne{i}"] = rng.random(nb_lignes).round(3)
+    df = pd.DataFrame(donnees)
+
+    fichiers = [Path(dossier) / f"tableau.{extension}" for extension in ('csv', 'xlsx', 'ods')]
+    df.to_csv(fichiers[0], sep=';', index=False)
+    df.to_excel(fichiers[1], index=False)
+    try:
+        df.to_excel(fichiers[2], index=False, engine='odf')
+    except ImportError:
+        print("⚠ odfpy absent : le format ODS n'est pas mesuré")
+        fichiers.pop()
+    return fichiers
+
+
+def chronometrer(fonction, repetitions):
+    """Meilleur temps (en secondes) sur plusieurs exécutions."""
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def mesurer(fichier, repetitions):
+    """
+    Mesure les lectures d'un fichier.
+
+    Returns:
+        dict: {nom de la méthode: durée en secondes}
+    """
+    format_fichier = detecter_format(fichier)
+    colonnes = [0, 1]
+    resultats = {}
+
+    if format_fichier == 'csv':
+        resultats['pandas'] = chronometrer(lambda: pd.read_csv(fichier, sep=';', header=None), repetitions)
+        resultats['lecture_tableaux'] = chronometrer(
+            lambda: lire_tableau(fichier, colonnes=colonnes, entete=False), repetitions)
+        return resultats
+
+    moteur_pandas = 'odf' if format_fichier == 'ods' else None
+    resultats['pandas'] = chronometrer(
+        lambda: pd.read_excel(fichier, header=None, engine=moteur_pandas), repetitions)
+    moteurs = [MOTEUR_FLUX] + ([MOTEUR_CALAMINE] if calamine_disponible() else [])
+    for moteur in moteurs:
+        resultats[moteur] = chronometrer(
+            lambda: lire_tableau(fichier, colonnes=colonnes, entete=False, moteur=moteur), repetitions)
+    return resultats
+
+
+def main():
+    """Fonction principale."""
+    parser = argparse.ArgumentParser(prog="python benchmark_lecture.py",
+                                     description="Benchmark de lecture par format et par moteur")
+    parser.add_argument('fichiers', nargs='*', help="fichiers à mesurer (par défaut : fichiers générés)")
+    parser.add_argument('--lignes', type=int, default=20000, help="lignes du tableau généré (défaut : 20000)")
+    parser.add_argument('--repetitions', type=int, default=3, help="exécutions par mesure (défaut : 3)")
+    args = parser.parse_args()
+
+    print("⏱  Benchmark de lecture des fichiers tabulaires")
+    print("=" * 60)
+    if not calamine_disponible():
+        print("ℹ python-calamine n'est pas installé : seul le moteur en flux est mesuré")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        fichiers = args.fichiers
+        if not fichiers:
+            print(f"📝 Génération d'un tableau de {args.lignes} lignes...")
+            fichiers = generer_fichiers(dossier, args.lignes)
+
+        for fichier in fichiers:
+            resultats = mesurer(fichier, args.repetitions)
+            reference = resultats['pandas']
+            print(f"\n📄 {Path(fichier).name} ({detecter_format(fichier)})")
+            for methode, duree in resultats.items():
+                gain = f"x{reference / duree:.1f}" if methode != 'pandas' and duree > 0 else ""
+                print(f"   {methode:<18} {duree * 1000:>9.1f} ms  {gain}")
+
+
+if __name__ == "__main__":
+    main()
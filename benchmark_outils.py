@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des trois outils (traiter_colle, sumup_licences, import_user_moodle) sur des
+données synthétiques de plusieurs tailles, comparé à une référence enregistrée. Les
+scénarios « sortie » mesurent traiter_colle dans chaque format de sortie (--format).
+
+Chaque scénario lance l'outil en ligne de commande, dans un processus séparé, avec
+--rapport (voir mesures) : durée, temps CPU, pic de mémoire et lignes de chaque étape.
+Les étapes répétées (une par fichier source ou par feuille) sont cumulées sous un nom
+générique (« lecture_sources/lecture:* »). Une mesure est une régression si elle dépasse
+la référence de plus de --tolerance, au-delà d'un écart minimal (le bruit de mesure
+des étapes très courtes n'est pas signalé).
+
+La référence dépend de la machine : enregistrez-la avec --enregistrer sur la machine
+qui servira aux comparaisons.
+
+Usage:
+    python benchmark_outils.py [--tailles 1k,10k] [--outils colle,licences,moodle,sortie]
+                               [--donnees DOSSIER] [--reference JSON] [--enregistrer]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from donnees_synthetiques import generer_jeu, lire_tailles, nom_taille
+from ecriture_sortie import FORMATS_ARROW, FORMATS_SORTIE
+
+DOSSIER_OUTILS = Path(__file__).resolve().parent
+
+REFERENCE_PAR_DEFAUT = 'benchmark_reference.json'
+DONNEES_PAR_DEFAUT = 'donnees_benchmark'
+TAILLES_PAR_DEFAUT = '1k,10k'
+
+# Écarts en dessous desquels une hausse n'est pas signalée
+ECART_MIN_DUREE = 0.05
+ECART_MIN_MEMOIRE = 1024 ** 2
+
+
+def _formats_mesures():
+    """Formats de sortie mesurés (parquet et arrow seulement si pyarrow est installé)."""
+    if importlib.util.find_spec('pyarrow') is None:
+        return [format_sortie for format_sortie in FORMATS_SORTIE if format_sortie not in FORMATS_ARROW]
+    return list(FORMATS_SORTIE)
+
+
+def _scenarios(donnees):
+    """
+    Scénarios mesurés pour un jeu de données.
+
+    Returns:
+        dict: {nom: (outil, arguments)}
+    """
+    scenarios = {
+        'colle_csv': ('colle', ['traiter_colle.py', '--notes', donnees['notes_csv'],
+                                '--licences', donnees['licences_colle'], '--sortie', 'resultats_csv.xlsx']),
+        'colle_xlsx': ('colle', ['traiter_colle.py', '--notes', donnees['notes_xlsx'],
+                                 '--licences', donnees['licences_colle'], '--sortie', 'resultats_xlsx.xlsx']),
+        'licences': ('licences', ['sumup_licences.py', donnees['licences'],
+                                  '--sortie-17', 'licences_1_7.xlsx', '--sortie-9', 'licences_9.xlsx']),
+        'moodle': ('moodle', ['import_user_moodle.py', donnees['emails'], 'moodle_import.csv', 'cohorte']),
+        'moodle_flux': ('moodle', ['import_user_moodle.py', '--flux', donnees['emails'],
+                                   'moodle_flux.csv', 'cohorte']),
+    }
+    for format_sortie in _formats_mesures():
+        scenarios[f'sortie_{format_sortie}'] = (
+            'sortie', ['traiter_colle.py', '--notes', donnees['notes_csv'], '--licences', donnees['licences_colle'],
+                       '--sortie', f'resultats{FORMATS_SORTIE[format_sortie]}', '--format', format_sortie])
+    return scenarios
+
+
+def _agreger(etapes):
+    """Cumule les étapes répétées (« lecture:FICHIER », « feuille:LICENCE »…) sous un nom générique."""
+    agregees = {}
+    for etape in etapes:
+        nom = re.sub(r':[^/]*', ':*', etape['etape'])
+        cumul = agregees.setdefault(nom, {'duree_s': 0.0, 'cpu_s': 0.0, 'memoire_pic_o': 0})
+        cumul['duree_s'] += etape['duree_s']
+        cumul['cpu_s'] += etape['cpu_s']
+        cumul['memoire_pic_o'] = max(cumul['memoire_pic_o'], etape['memoire_pic_o'])
+        if 'lignes' in etape:
+            cumul['lignes'] = cumul.get('lignes', 0) + etape['lignes']
+    return agregees
+
+
+def executer(arguments, dossier_travail):
+    """
+    Lance un outil avec --rapport et renvoie ses mesures. L'entrée standard est fermée :
+    une question posée par l'outil fait échouer le scénario au lieu de le bloquer.
+
+    Returns:
+        dict: Mesures totales et par étape agrégée
+
+    Raises:
+        RuntimeError: Si l'outil échoue ou n'écrit pas de rapport
+    """
+    fichier_rapport = Path(dossier_travail) / 'rapport.json'
+    fichier_rapport.unlink(missing_ok=True)
+    commande = [sys.executable, str(DOSSIER_OUTILS / arguments[0])] + [str(a) for a in arguments[1:]]
+    commande += ['--rapport', str(fichier_rapport)]
+    environnement = dict(os.environ, PYTHONPATH=str(DOSSIER_OUTILS))
+    processus = subprocess.run(commande, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                               cwd=dossier_travail, env=environnement)
+    if processus.returncode != 0 or not fichier_rapport.exists():
+        raise RuntimeError(f"{arguments[0]} a échoué (code {processus.returncode}) : "
+                           f"{(processus.stderr or processus.stdout).strip()[-500:]}")
+
+    rapport = json.loads(fichier_rapport.read_text(encoding='utf-8'))
+    return {
+        'duree_s': rapport['duree_s'],
+        'cpu_s': rapport['cpu_s'],
+        'memoire_pic_o': rapport['memoire_pic_o'],
+        'etapes': _agreger(rapport['etapes']),
+    }
+
+
+def mesurer(donnees, outils, repetitions):
+    """
+    Mesure les scénarios des outils demandés sur un jeu de données (meilleure exécution).
+
+    Returns:
+        dict: {scénario: mesures}
+    """
+    resultats = {}
+    with tempfile.TemporaryDirectory() as dossier_travail:
+        for nom, (outil, arguments) in _scenarios(donnees).items():
+            if outil not in outils:
+                continue
+            executions = [executer(arguments, dossier_travail) for _ in range(repetitions)]
+            resultats[nom] = min(executions, key=lambda mesure: mesure['duree_s'])
+    return resultats
+
+
+def comparer(mesures, reference, tolerance):
+    """
+    Compare des mesures à la référence.
+
+    Returns:
+        list: Régressions (taille, scénario, étape, grandeur, référence, mesure)
+    """
+    regressions = []
+    for taille, scenarios in mesures.items():
+        for scenario, mesure in scenarios.items():
+            reference_scenario = reference.get(taille, {}).get(scenario)
+            if reference_scenario is None:
+                continue
+            lignes = [('total', mesure, reference_scenario)] + [
+                (etape, valeurs, reference_scenario['etapes'][etape])
+                for etape, valeurs in mesure['etapes'].items() if etape in reference_scenario['etapes']
+            ]
+            for etape, valeurs, valeurs_reference in lignes:
+                for grandeur, ecart_min in (('duree_s', ECART_MIN_DUREE), ('memoire_pic_o', ECART_MIN_MEMOIRE)):
+                    avant, apres = valeurs_reference[grandeur], valeurs[grandeur]
+                    if apres > avant * (1 + tolerance) and apres - avant > ecart_min:
+                        regressions.append((taille, scenario, etape, grandeur, avant, apres))
+    return regressions
+
+
+def _machine():
+    return {
+        'python': platform.python_version(),
+        'systeme': platform.platform(),
+        'processeur': platform.processor() or platform.machine(),
+        'coeurs': os.cpu_count(),
+    }
+
+
+def _afficher(taille, scenario, mesure, reference):
+    def variation(valeur, valeur_reference):
+        if not valeur_reference:
+            return ""
+        return f"{(valeur / valeur_reference - 1) * 100:+6.1f}%"
+
+    reference = reference or {'etapes': {}}
+    print(f"\n📄 {scenario} ({taille})")
+    print(f"   {'total':<38} {mesure['duree_s'] * 1000:>9.1f} ms {variation(mesure['duree_s'], reference.get('duree_s')):>8}"
+          f"  {mesure['memoire_pic_o'] / 1024 ** 2:>8.1f} Mio")
+    for etape, valeurs in mesure['etapes'].items():
+        valeurs_reference = reference['etapes'].get(etape, {})
+        lignes = f"  {valeurs['lignes']} lignes" if 'lignes' in valeurs else ""
+        print(f"   {etape:<38} {valeurs['duree_s'] * 1000:>9.1f} ms "
+              f"{variation(valeurs['duree_s'], valeurs_reference.get('duree_s')):>8}"
+              f"  {valeurs['memoire_pic_o'] / 1024 ** 2:>8.1f} Mio{lignes}")
+
+
+def main(argv=None, prog=None):
+    """Fonction principale."""
+    parser = argparse.ArgumentParser(prog=prog or "python benchmark_outils.py",
+                                     description="Benchmark des outils sur données synthétiques")
+    parser.add_argument('--tailles', type=lire_tailles, default=lire_tailles(TAILLES_PAR_DEFAUT),
+                        help=f"nombres de lignes (ex. 1k,10k,100k,1M ; défaut : {TAILLES_PAR_DEFAUT})")
+    parser.add_argument('--outils', default='colle,licences,moodle,sortie',
+                        help="outils mesurés parmi colle, licences, moodle et sortie (formats de sortie "
+                             "de traiter_colle) ; défaut : tous")
+    parser.add_argument('--donnees', default=DONNEES_PAR_DEFAUT,
+                        help=f"dossier des données générées, réutilisées d'une exécution à l'autre "
+                             f"(défaut : {DONNEES_PAR_DEFAUT})")
+    parser.add_argument('--graine', type=int, default=0, help="graine des données générées (défaut : 0)")
+    parser.add_argument('--repetitions', type=int, default=1, help="exécutions par scénario (défaut : 1)")
+    parser.add_argument('--reference', default=REFERENCE_PAR_DEFAUT,
+                        help=f"fichier JSON de référence (défaut : {REFERENCE_PAR_DEFAUT})")
+    parser.add_argument('--enregistrer', action='store_true',
+                        help="enregistrer les mesures comme nouvelle référence (tailles et scénarios mesurés)")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="hausse tolérée par rapport à la référence (défaut : 0.25, soit 25 %%)")
+    args = parser.parse_args(argv)
+    outils = {outil.strip() for outil in args.outils.split(',')}
+
+    fichier_reference = Path(args.reference)
+    reference = json.loads(fichier_reference.read_text(encoding='utf-8')) if fichier_reference.exists() else {}
+    if reference and reference.get('machine') != _machine():
+        print("⚠ La référence a été enregistrée sur une autre machine : les écarts sont indicatifs")
+
+    print("⏱  Benchmark des outils")
+    print("=" * 60)
+    if 'sortie' in outils and importlib.util.find_spec('pyarrow') is None:
+        print("⚠ pyarrow absent : les formats parquet et arrow ne sont pas mesurés")
+    mesures = {}
+    for nb_lignes in args.tailles:
+        taille = nom_taille(nb_lignes)
+        print(f"\n📝 Données de {taille} lignes ({args.donnees})...")
+        debut = time.perf_counter()
+        donnees = generer_jeu(args.donnees, nb_lignes, args.graine)
+        print(f"   ✓ prêtes en {time.perf_counter() - debut:.1f} s")
+        try:
+            mesures[taille] = mesurer(donnees, outils, args.repetitions)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        for scenario, mesure in mesures[taille].items():
+            _afficher(taille, scenario, mesure, reference.get('mesures', {}).get(taille, {}).get(scenario))
+
+    print()
+    if args.enregistrer:
+        # Les tailles et scénarios non mesurés cette fois sont conservés
+        anciennes = reference.get('mesures', {}) if reference.get('machine') == _machine() else {}
+        for taille, scenarios in mesures.items():
+            anciennes.setdefault(taille, {}).update(scenarios)
+        fichier_reference.write_text(json.dumps({
+            'machine': _machine(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'mesures': anciennes,
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 Référence enregistrée : {fichier_reference}")
+        return
+
+    if not reference:
+        print(f"ℹ Aucune référence ({fichier_reference}) : relancez avec --enregistrer pour en créer une")
+        return
+
+    regressions = comparer(mesures, reference['mesures'], args.tolerance)
+    if not regressions:
+        print(f"✅ Aucune régression au-delà de {args.tolerance:.0%} par rapport à la référence")
+        return
+
+    print(f"❌ {len(regressions)} régression(s) au-delà de {args.tolerance:.0%} :")
+    for taille, scenario, etape, grandeur, avant, apres in regressions:
+        if grandeur == 'duree_s':
+            valeurs = f"{avant * 1000:.1f} ms → {apres * 1000:.1f} ms"
+        else:
+            valeurs = f"{avant / 1024 ** 2:.1f} Mio → {apres / 1024 ** 2:.1f} Mio"
+        print(f"   • {scenario} ({taille}) {etape} : {valeurs}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client minimal pour les services web REST de Moodle (webservice/rest/server.php).
+
+Les connexions HTTP sont gardées ouvertes (keep-alive) dans un pool partagé entre
+les threads, et les erreurs transitoires (coupure réseau, HTTP 429/502/503/504)
+sont retentées avec un délai exponentiel. Une fonction qui crée quelque chose
+(appel avec idempotent=False) n'est retentée que si Moodle n'a pas pu recevoir la
+requête : échec de connexion ou HTTP 429. Seule la bibliothèque standard est utilisée.
+"""
+
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+# Codes HTTP pour lesquels une nouvelle tentative a des chances d'aboutir
+CODES_TRANSITOIRES = {429, 502, 503, 504}
+# Codes garantissant que la requête n'a pas été traitée (les autres passent par un
+# proxy qui a pu la transmettre à Moodle)
+CODES_NON_TRAITES = {429}
+
+
+class ErreurMoodle(Exception):
+    """Erreur renvoyée par Moodle (exception du service web)."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class ErreurTransport(ErreurMoodle):
+    """
+    Moodle injoignable ou réponse perdue, une fois les tentatives permises épuisées.
+
+    Attributes:
+        envoyee: True si la requête a pu être reçue et traitée par Moodle
+    """
+
+    def __init__(self, message, envoyee):
+        super().__init__(message)
+        self.envoyee = envoyee
+
+
+class ErreurTransitoire(Exception):
+    """
+    Erreur réseau ou HTTP pour laquelle une nouvelle tentative est possible.
+
+    Attributes:
+        envoyee: True si la requête a pu être reçue et traitée par Moodle
+    """
+
+    def __init__(self, message, envoyee=True):
+        super().__init__(message)
+        self.envoyee = envoyee
+
+
+def aplatir_parametres(valeur, prefixe=''):
+    """
+    Convertit des paramètres imbriqués au format attendu par Moodle.
+
+    Exemple : {'users': [{'username': 'a'}]} → [('users[0][username]', 'a')]
+
+    Args:
+        valeur: dict, liste ou valeur simple
+        prefixe: Préfixe de la clé courante
+
+    Returns:
+        list: Couples (clé, valeur) prêts à être encodés
+    """
+    if isinstance(valeur, dict):
+        elements = valeur.items()
+    elif isinstance(valeur, (list, tuple)):
+        elements = enumerate(valeur)
+    else:
+        if isinstance(valeur, bool):
+            valeur = int(valeur)
+        return [(prefixe, '' if valeur is None else str(valeur))]
+
+    couples = []
+    for cle, sous_valeur in elements:
+        cle_complete = f"{prefixe}[{cle}]" if prefixe else str(cle)
+        couples.extend(aplatir_parametres(sous_valeur, cle_complete))
+    return couples
+
+
+class ClientMoodle:
+    """
+    Client des services web REST de Moodle, utilisable depuis plusieurs threads.
+
+    Args:
+        url: URL racine du site Moodle (ex. https://moodle.exemple.fr)
+        jeton: Jeton du service web
+        nb_connexions: Nombre maximal de connexions HTTP gardées ouvertes
+        delai_max: Délai maximal d'une requête, en secondes
+        tentatives: Nombre maximal de tentatives par appel
+        attente_initiale: Attente avant la première nouvelle tentative (doublée à chaque essai)
+
+    Raises:
+        ValueError: Si l'URL est invalide ou si nb_connexions est inférieur à 1
+    """
+
+    def __init__(self, url, jeton, nb_connexions=4, delai_max=60, tentatives=4, attente_initiale=0.5):
+        decoupage = urlsplit(url.rstrip('/'))
+        if decoupage.scheme not in ('http', 'https'):
+            raise ValueError(f"URL Moodle invalide : {url}")
+        if nb_connexions < 1:
+            # Sans connexion dans le pool, le premier appel attendrait indéfiniment
+            raise ValueError(f"nombre de connexions invalide : {nb_connexions}")
+
+        self._classe_connexion = (
+            http.client.HTTPSConnection if decoupage.scheme == 'https' else http.client.HTTPConnection
+        )
+        self._hote = decoupage.netloc
+        self._chemin = f"{decoupage.path}/webservice/rest/server.php"
+        self._jeton = jeton
+        self._delai_max = delai_max
+        self._tentatives = tentatives
+        self._attente_initiale = attente_initiale
+
+        # Pool de connexions : au plus nb_connexions requêtes simultanées
+        self._pool = queue.LifoQueue()
+        for _ in range(nb_connexions):
+            self._pool.put(None)
+        self._connexions = []
+        self._verrou = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def fermer(self):
+        """Ferme toutes les connexions ouvertes."""
+        with self._verrou:
+            for connexion in self._connexions:
+                connexion.close()
+            self._connexions.clear()
+
+    def _nouvelle_connexion(self):
+        connexion = self._classe_connexion(self._hote, timeout=self._delai_max)
+        with self._verrou:
+            self._connexions.append(connexion)
+        return connexion
+
+    def _requete(self, corps):
+        """Envoie une requête POST sur une connexion du pool et renvoie le corps de la réponse."""
+        connexion = self._pool.get() or self._nouvelle_connexion()
+        if connexion.sock is None:
+            # Connexion établie à part : un échec ici garantit que rien n'a été envoyé
+            try:
+                connexion.connect()
+            except OSError as e:
+                connexion.close()
+                self._pool.put(None)
+                raise ErreurTransitoire(f"connexion impossible : {e}", envoyee=False) from e
+        try:
+            connexion.request('POST', self._chemin, body=corps, headers={
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'Connection': 'keep-alive',
+            })
+            reponse = connexion.getresponse()
+            donnees = reponse.read()
+        except (OSError, http.client.HTTPException) as e:
+            # Connexion inutilisable : elle sera recréée au prochain appel
+            connexion.close()
+            self._pool.put(None)
+            raise ErreurTransitoire(f"erreur réseau : {e}") from e
+
+        self._pool.put(connexion)
+        if reponse.status in CODES_TRANSITOIRES:
+            raise ErreurTransitoire(f"HTTP {reponse.status}", envoyee=reponse.status not in CODES_NON_TRAITES)
+        if reponse.status != 200:
+            raise ErreurMoodle(f"HTTP {reponse.status} : {donnees[:200].decode('utf-8', 'replace')}")
+        return donnees
+
+    def appeler(self, fonction, *, idempotent=True, **parametres):
+        """
+        Appelle une fonction du service web.
+
+        Args:
+            fonction: Nom de la fonction Moodle (ex. core_user_create_users)
+            idempotent: False pour une fonction qui crée quelque chose : elle n'est alors
+                        retentée que si la requête n'a pas pu être reçue par Moodle
+            **parametres: Paramètres de la fonction (dict et listes acceptés)
+
+        Returns:
+            Réponse JSON décodée
+
+        Raises:
+            ErreurTransport: Si Moodle reste injoignable ou si la réponse est perdue
+            ErreurMoodle: Si Moodle renvoie une exception
+        """
+        corps = urlencode([
+            ('wstoken', self._jeton),
+            ('wsfunction', fonction),
+            ('moodlewsrestformat', 'json'),
+        ] + aplatir_parametres(parametres))
+
+        for tentative in range(1, self._tentatives + 1):
+            try:
+                donnees = self._requete(corps)
+                break
+            except ErreurTransitoire as e:
+                if e.envoyee and not idempotent:
+                    raise ErreurTransport(f"{fonction} : réponse perdue ({e}), requête peut-être traitée",
+                                          envoyee=True) from e
+                if tentative == self._tentatives:
+                    raise ErreurTransport(f"{fonction} : échec après {tentative} tentatives ({e})",
+                                          envoyee=e.envoyee) from e
+                attente = self._attente_initiale * 2 ** (tentative - 1)
+                time.sleep(attente + random.uniform(0, attente / 2))
+
+        resultat = json.loads(donnees) if donnees else None
+        if isinstance(resultat, dict) and 'exception' in resultat:
+            raise ErreurMoodle(
+                f"{fonction} : {resultat.get('message', resultat['exception'])}",
+                resultat.get('errorcode'),
+            )
+        return resultat
@@ -0,0 +1,1024 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Traitement des notes de colle par licence, sous forme de bibliothèque.
+
+Les fonctions de ce module n'écrivent rien sur la console, ne posent aucune question
+et n'arrêtent jamais le programme : elles renvoient des résultats typés et lèvent des
+exceptions dérivées de ErreurColle. Elles peuvent donc être appelées à la suite dans
+un même processus (licences gardées en mémoire, modules déjà importés).
+traiter_colle en est l'interface en ligne de commande.
+"""
+
+import heapq
+import json
+from dataclasses import dataclass, field
+from itertools import repeat
+from pathlib import Path
+
+from ecriture_sortie import FORMAT_PAR_DEFAUT, FORMATS_SORTIE, format_depuis_extension, ouvrir_ecrivain
+from index_licences import EXTENSION_INDEX, ouvrir_index_licences
+from lecture_tableaux import ErreurFormat, detecter_format, lire_tableau
+from mesures import etape
+import lecture_tableaux
+
+# Colonnes utiles des fichiers XLSX de notes (sans en-tête) : note (D), Q01 à Q40 (G à AT), numéro (AU)
+COLONNES_XLSX_NOTES = [3] + list(range(6, 47))
+
+COLONNES_LICENCES = ['Numéro Anonymat', 'Licence']
+GROUPES = ['Groupe A', 'Groupe B', 'Groupe C']
+
+# Valeur d'un groupe qui réunit toutes les licences (fichier de groupes)
+TOUTES_LICENCES = '*'
+
+# Feuilles écrites par creer_fichier_sortie en plus des licences et des groupes
+FEUILLES_RESERVEES = ['Général', 'Stats', 'Sans Licence']
+
+
+class ErreurColle(Exception):
+    """Erreur du traitement des notes de colle."""
+
+
+class ErreurFichier(ErreurColle):
+    """Fichier introuvable, illisible ou dans un format non pris en charge."""
+
+
+class ErreurColonnes(ErreurColle):
+    """
+    Colonnes obligatoires absentes d'un fichier.
+
+    Attributes:
+        attendues: Colonnes obligatoires
+        trouvees: Colonnes présentes dans le fichier
+    """
+
+    def __init__(self, fichier, attendues, trouvees):
+        noms = ' et '.join(f"'{colonne}'" for colonne in attendues)
+        super().__init__(f"Le fichier {fichier} doit contenir les colonnes {noms}")
+        self.fichier = fichier
+        self.attendues = attendues
+        self.trouvees = trouvees
+
+    def __reduce__(self):
+        # Transmissible entre processus (pool de service_colle)
+        return type(self), (self.fichier, self.attendues, self.trouvees)
+
+
+class ErreurEcriture(ErreurColle):
+    """Échec de l'écriture d'un fichier de résultats."""
+
+
+class ErreurGroupes(ErreurColle):
+    """Fichier de définition des groupes invalide."""
+
+
+class ErreurFusion(ErreurColle):
+    """Paramètres de fusion de plusieurs colles invalides (poids, politique d'absence)."""
+
+
+@dataclass
+class NotesColle:
+    """
+    Notes lues dans un fichier de notes.
+
+    Attributes:
+        notes: {numero: note}
+        taux_reussite: {question: taux}
+        erreurs: Erreurs de validation (dict avec type, numero, note, ligne, raison)
+        lignes_ignorees: Lignes sans numéro ou sans note exploitable
+        nb_lignes: Lignes lues
+        nb_colonnes: Colonnes lues
+        format: 'csv' ou 'xlsx'
+    """
+    notes: dict
+    taux_reussite: dict
+    erreurs: list
+    lignes_ignorees: int
+    nb_lignes: int
+    nb_colonnes: int
+    format: str
+
+
+@dataclass
+class NotesSeparees:
+    """
+    Notes séparées selon le premier chiffre du numéro CREM.
+
+    Attributes:
+        notes_178: {numero: note} des numéros commençant par 1, 7 ou 8
+        notes_9: {numero: note} des numéros commençant par 9
+        ignores: Numéros commençant par un autre chiffre
+    """
+    notes_178: dict
+    notes_9: dict
+    ignores: list
+
+
+@dataclass
+class NotesFusionnees:
+    """
+    Notes combinées de plusieurs colles.
+
+    Attributes:
+        notes: {numero: note pondérée}
+        taux_reussite: {'C<rang> <question>': taux} des questions de chaque colle
+        poids: Poids de chaque colle, ramenés à une somme de 1
+        presents: Nombre d'étudiants ayant composé à chaque colle
+        absents: Nombre d'étudiants absents de chaque colle (parmi tous les étudiants vus)
+        exclus: Numéros écartés faute d'avoir composé à toutes les colles (politique 'exclure')
+    """
+    notes: dict
+    taux_reussite: dict
+    poids: list
+    presents: list
+    absents: list
+    exclus: list = field(default_factory=list)
+
+
+@dataclass
+class Repartition:
+    """
+    Étudiants répartis par licence.
+
+    Attributes:
+        etudiants_par_licence: {licence: [(numero, note), ...]} trié par note décroissante
+        etudiants_ignores: [(numero, note), ...] étudiants absents du fichier des licences
+    """
+    etudiants_par_licence: dict
+    etudiants_ignores: list
+
+
+@dataclass
+class FichierSortie:
+    """
+    Classeur de résultats écrit par creer_fichier_sortie.
+
+    Attributes:
+        chemin: Chemin absolu du fichier (du dossier pour parquet et arrow)
+        feuilles: {nom de feuille: nombre d'étudiants} dans l'ordre d'écriture (Stats exclue)
+        groupes_non_crees: {nom de groupe: raison}
+        extension_remplacee: Extension demandée remplacée par celle du format, ou None
+        format: Format écrit (voir ecriture_sortie.FORMATS_SORTIE)
+    """
+    chemin: str
+    feuilles: dict = field(default_factory=dict)
+    groupes_non_crees: dict = field(default_factory=dict)
+    extension_remplacee: str = None
+    format: str = FORMAT_PAR_DEFAUT
+
+
+def _est_colonne_csv_notes(colonne):
+    """Colonnes utiles des fichiers CSV de notes : etu, Mark et Q01 à Q40."""
+    return colonne in ('etu', 'Mark') or (colonne.startswith('Q') and len(colonne) == 3)
+
+
+def _detecter_format(fichier_path):
+    """Format d'un fichier d'après son contenu, ou None s'il n'est pas reconnu."""
+    try:
+        return detecter_format(fichier_path)
+    except FileNotFoundError:
+        raise ErreurFichier(f"Le fichier {fichier_path} n'existe pas.") from None
+    except ErreurFormat:
+        return None
+
+
+def _valider_numero(numero_raw, note_raw, ligne, erreurs, conserver_texte=False):
+    """
+    Convertit un couple (numéro, note) brut.
+
+    Returns:
+        tuple: (numero, note), ou None si la ligne est ignorée ou invalide (ajoutée à erreurs)
+
+    Raises:
+        ValueError, TypeError: Si la note ou le numéro ne sont pas convertibles
+    """
+    numero_str = str(numero_raw).strip()
+    note_str = str(note_raw).strip().replace(',', '.')
+
+    # Gérer les numéros qui peuvent être des entiers ou des chaînes
+    try:
+        numero = str(int(float(numero_str)))
+    except ValueError:
+        if not conserver_texte:
+            raise
+        numero = numero_str
+
+    note = float(note_str)
+
+    # Vérifier que le numéro a exactement 4 chiffres
+    if len(numero) != 4 or not numero.isdigit():
+        erreurs.append({
+            'type': 'numero_invalide',
+            'numero': numero,
+            'note': note,
+            'ligne': ligne,
+            'raison': f"Le numéro doit comporter exactement 4 chiffres (trouvé: {numero})"
+        })
+        return None
+    return numero, note
+
+
+def lire_notes_csv(fichier_path):
+    """
+    Lit un fichier CSV de notes (séparateur ;, colonnes etu, Mark et Q01 à Q40).
+
+    Args:
+        fichier_path: Chemin vers le fichier CSV de notes
+
+    Returns:
+        NotesColle: Notes, taux de réussite et erreurs de validation
+
+    Raises:
+        ErreurFichier: Si le fichier est introuvable ou illisible
+        ErreurColonnes: Si les colonnes etu et Mark sont absentes
+    """
+    import pandas as pd
+
+    try:
+        df = lire_tableau(fichier_path, colonnes=_est_colonne_csv_notes)
+    except FileNotFoundError:
+        raise ErreurFichier(f"Le fichier {fichier_path} n'existe pas.") from None
+    except lecture_tableaux.ErreurColonnes as e:
+        raise ErreurColonnes(fichier_path, ['Mark', 'etu'], e.disponibles) from None
+    except Exception as e:
+        raise ErreurFichier(f"Lecture du fichier CSV de notes impossible : {e}") from e
+
+    # Colonnes attendues : "Mark" pour la note, "etu" pour le numéro d'anonymat
+    if 'Mark' not in df.columns or 'etu' not in df.columns:
+        raise ErreurColonnes(fichier_path, ['Mark', 'etu'], df.columns.tolist())
+
+    # Calculer les taux de réussite à partir des colonnes Q01 à Q40
+    taux_reussite = {}
+    questions_colonnes = [col for col in df.columns if col.startswith('Q') and len(col) == 3]
+
+    for question_col in sorted(questions_colonnes):
+        # Compter le nombre de 1 (bonnes réponses) pour cette question
+        bonnes_reponses = df[question_col].sum()
+        total_reponses = df[question_col].notna().sum()
+
+        if total_reponses > 0:
+            taux_reussite[question_col] = bonnes_reponses / total_reponses
+
+    # Extraire les notes et numéros d'étudiants
+    dict_notes = {}
+    erreurs = []
+    lignes_ignorees = 0
+
+    for idx, row in df.iterrows():
+        numero_raw = row.get('etu')
+        note_raw = row.get('Mark')
+
+        # Vérifier que les données sont valides
+        if pd.notna(numero_raw) and pd.notna(note_raw) and str(numero_raw).strip() != '' and str(note_raw).strip() != '':
+            try:
+                # +2 car ligne 0 = header, et on commence à 0
+                resultat = _valider_numero(numero_raw, note_raw, idx + 2, erreurs, conserver_texte=True)
+            except (ValueError, TypeError, AttributeError):
+                lignes_ignorees += 1
+                continue
+            if resultat:
+                dict_notes[resultat[0]] = resultat[1]
+        else:
+            lignes_ignorees += 1
+
+    return NotesColle(dict_notes, taux_reussite, erreurs, lignes_ignorees, df.shape[0], df.shape[1], 'csv')
+
+
+def lire_notes_xlsx(fichier_path):
+    """
+    Lit un classeur de notes (XLSX, XLS ou ODS) : taux de réussite en ligne 5,
+    notes en colonne D et numéros d'anonymat en colonne AU à partir de la ligne 6.
+
+    Args:
+        fichier_path: Chemin vers le classeur de notes
+
+    Returns:
+        NotesColle: Notes, taux de réussite et erreurs de validation
+
+    Raises:
+        ErreurFichier: Si le fichier est introuvable ou illisible
+    """
+    import pandas as pd
+
+    try:
+        # Lire uniquement les colonnes utiles (une colonne absente du fichier est lue vide)
+        df = lire_tableau(fichier_path, colonnes=COLONNES_XLSX_NOTES, entete=False)
+    except FileNotFoundError:
+        raise ErreurFichier(f"Le fichier {fichier_path} n'existe pas.") from None
+    except Exception as e:
+        raise ErreurFichier(f"Lecture du fichier de notes impossible : {e}") from e
+
+    # Extraire les taux de réussite (ligne 4, index 4)
+    taux_reussite = {}
+    if len(df) > 4:
+        ligne_taux = df.iloc[4]
+
+        # Les questions sont dans les colonnes 6 à 45 (Q01 à Q40)
+        for i in range(6, 46):
+            question_num = i - 5  # Q01 = 1, Q02 = 2, etc.
+            taux = ligne_taux.get(i) if i in ligne_taux.index else None
+            if pd.notna(taux) and taux != '':
+                try:
+                    # Gérer les différents formats possibles
+                    taux_float = float(str(taux).replace(',', '.').replace('%', ''))
+                    taux_reussite[f"Q{question_num:02d}"] = taux_float
+                except (ValueError, TypeError, AttributeError):
+                    pass  # Ignorer les valeurs non convertibles
+
+    # Extraire les notes des étudiants (à partir de la ligne 5, index 5)
+    dict_notes = {}
+    erreurs = []
+    lignes_ignorees = 0
+
+    # Colonne 46 : numéro d'anonymat, colonne 3 : note
+    for idx, (note_raw, numero_raw) in enumerate(zip(df[3].iloc[5:], df[46].iloc[5:]), start=5):
+        # Vérifier que les données sont valides
+        if pd.notna(numero_raw) and pd.notna(note_raw) and numero_raw != '' and note_raw != '':
+            try:
+                resultat = _valider_numero(numero_raw, note_raw, idx + 1, erreurs)
+            except (ValueError, TypeError, AttributeError):
+                lignes_ignorees += 1
+                continue
+            if resultat:
+                dict_notes[resultat[0]] = resultat[1]
+        else:
+            lignes_ignorees += 1
+
+    return NotesColle(dict_notes, taux_reussite, erreurs, lignes_ignorees, df.shape[0], df.shape[1], 'xlsx')
+
+
+def detecter_format_notes(fichier_path):
+    """
+    Détecte le format d'un fichier de notes d'après son contenu.
+
+    Returns:
+        str: 'csv', 'xlsx', 'xls' ou 'ods'
+
+    Raises:
+        ErreurFichier: Si le fichier est introuvable ou dans un format non pris en charge
+    """
+    format_fichier = _detecter_format(fichier_path)
+    if format_fichier not in ['csv', 'xlsx', 'xls', 'ods']:
+        raise ErreurFichier(f"Format de fichier non supporté : {Path(fichier_path).name} "
+                            f"(formats supportés : .xlsx, .xls, .ods, .csv)")
+    return format_fichier
+
+
+def lire_notes(fichier_path):
+    """
+    Lit un fichier de notes, au format détecté d'après son contenu (CSV ou classeur).
+
+    Returns:
+        NotesColle: Voir lire_notes_csv et lire_notes_xlsx
+
+    Raises:
+        ErreurFichier: Si le fichier est introuvable, illisible ou dans un format non pris en charge
+        ErreurColonnes: Si des colonnes obligatoires sont absentes
+    """
+    if detecter_format_notes(fichier_path) == 'csv':
+        return lire_notes_csv(fichier_path)
+    return lire_notes_xlsx(fichier_path)
+
+
+def lire_licences(fichier_path):
+    """
+    Lit le fichier des licences (CSV, XLSX, XLS, ODS ou index .licidx produit par sumup_licences).
+
+    Args:
+        fichier_path: Chemin vers le fichier des licences
+
+    Returns:
+        Mapping: {numero_anonymat: licence} ; un index .licidx est projeté en mémoire
+
+    Raises:
+        ErreurFichier: Si le fichier est introuvable, illisible ou dans un format non pris en charge
+        ErreurColonnes: Si les colonnes 'Numéro Anonymat' et 'Licence' sont absentes
+    """
+    format_fichier = _detecter_format(fichier_path)
+
+    # L'index binaire est projeté en mémoire, sans relecture du classeur
+    if format_fichier == 'licidx':
+        try:
+            return ouvrir_index_licences(fichier_path)
+        except (OSError, ValueError) as e:
+            raise ErreurFichier(f"Lecture du fichier des licences impossible : {e}") from e
+
+    if format_fichier is None:
+        raise ErreurFichier(f"Format de fichier non supporté : {Path(fichier_path).name} "
+                            f"(formats supportés : .xlsx, .xls, .ods, .csv, {EXTENSION_INDEX})")
+
+    try:
+        df = lire_tableau(fichier_path, colonnes=COLONNES_LICENCES)
+        dict_licences = {}
+        for numero, licence in zip(df['Numéro Anonymat'], df['Licence']):
+            dict_licences[str(int(numero))] = str(licence).strip()
+    except lecture_tableaux.ErreurColonnes as e:
+        raise ErreurColonnes(fichier_path, COLONNES_LICENCES, e.disponibles) from None
+    except Exception as e:
+        raise ErreurFichier(f"Lecture du fichier des licences impossible : {e}") from e
+
+    return dict_licences
+
+
+# Traitement d'une colle manquée par un étudiant lors d'une fusion :
+#   zero          la colle manquée compte 0 ;
+#   renormaliser  moyenne pondérée des seules colles passées ;
+#   exclure       l'étudiant est écarté du classement.
+POLITIQUES_ABSENCE = ['zero', 'renormaliser', 'exclure']
+
+
+def fusionner_notes(liste_notes, poids=None, absence='zero'):
+    """
+    Combine les notes de plusieurs colles en une note pondérée par étudiant.
+
+    Les numéros de toutes les colles sont codés en un seul passage (table de hachage),
+    puis les notes sont rangées dans une matrice étudiants x colles : le calcul est
+    vectorisé et linéaire en nombre total de lignes.
+
+    Args:
+        liste_notes: Notes de chaque colle (NotesColle ou dict {numero: note})
+        poids: Poids de chaque colle (par défaut égaux), ramenés à une somme de 1
+        absence: Politique d'absence, parmi POLITIQUES_ABSENCE
+
+    Returns:
+        NotesFusionnees: Notes combinées et bilan des absences
+
+    Raises:
+        ErreurFusion: Si les poids ou la politique d'absence sont invalides
+    """
+    import numpy as np
+    import pandas as pd
+
+    if absence not in POLITIQUES_ABSENCE:
+        raise ErreurFusion(f"Politique d'absence inconnue : {absence} (possibles : {', '.join(POLITIQUES_ABSENCE)})")
+    if not liste_notes:
+        raise ErreurFusion("Aucune colle à fusionner.")
+    if poids is None:
+        poids = [1.0] * len(liste_notes)
+    if len(poids) != len(liste_notes):
+        raise ErreurFusion(f"{len(poids)} poids pour {len(liste_notes)} colle(s)")
+    poids = np.asarray(poids, dtype=float)
+    if (poids < 0).any() or poids.sum() <= 0:
+        raise ErreurFusion("Les poids doivent être positifs, et non tous nuls.")
+    poids = poids / poids.sum()
+
+    dicts = [notes.notes if isinstance(notes, NotesColle) else notes for notes in liste_notes]
+    numeros = np.concatenate([np.asarray(list(notes), dtype=object) for notes in dicts])
+    valeurs = np.concatenate([np.fromiter(notes.values(), dtype=float, count=len(notes)) for notes in dicts])
+    colonnes = np.repeat(np.arange(len(dicts)), [len(notes) for notes in dicts])
+
+    # Un code par numéro d'anonymat, toutes colles confondues
+    codes, uniques = pd.factorize(numeros)
+    matrice = np.full((len(uniques), len(dicts)), np.nan)
+    matrice[codes, colonnes] = valeurs
+    presents = ~np.isnan(matrice)
+
+    ponderees = np.where(presents, matrice, 0.0) @ poids
+    if absence == 'renormaliser':
+        retenus = np.ones(len(uniques), dtype=bool)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ponderees = ponderees / (presents @ poids)
+    else:
+        retenus = presents.all(axis=1) if absence == 'exclure' else np.ones(len(uniques), dtype=bool)
+    # Étudiant présent uniquement à des colles de poids nul : pas de note
+    retenus &= np.isfinite(ponderees)
+
+    taux_reussite = {}
+    for rang, notes in enumerate(liste_notes, 1):
+        if isinstance(notes, NotesColle):
+            taux_reussite.update({f"C{rang} {question}": taux for question, taux in notes.taux_reussite.items()})
+
+    return NotesFusionnees(
+        notes=dict(zip(uniques[retenus].tolist(), ponderees[retenus].round(2).tolist())),
+        taux_reussite=taux_reussite,
+        poids=poids.tolist(),
+        presents=presents.sum(axis=0).tolist(),
+        absents=(~presents).sum(axis=0).tolist(),
+        exclus=uniques[~retenus].tolist(),
+    )
+
+
+def separer_notes_par_premier_chiffre(dict_notes):
+    """
+    Sépare les notes selon le premier chiffre du numéro CREM :
+    1, 7 ou 8 d'un côté, 9 de l'autre.
+
+    Returns:
+        NotesSeparees: Les deux groupes et les numéros ignorés
+    """
+    separees = NotesSeparees({}, {}, [])
+    for numero, note in dict_notes.items():
+        premier_chiffre = numero[0]
+        if premier_chiffre in ['1', '7', '8']:
+            separees.notes_178[numero] = note
+        elif premier_chiffre == '9':
+            separees.notes_9[numero] = note
+        else:
+            separees.ignores.append(numero)
+    return separees
+
+
+def _ecrire_notes_csv(dict_notes, taux_reussite, fichier_path):
+    """Écrit des notes au format CSV de notes (etu, Mark, puis un taux par question)."""
+    import pandas as pd
+
+    data = {
+        'etu': list(dict_notes.keys()),
+        'Mark': list(dict_notes.values())
+    }
+
+    # Ajouter les colonnes de taux de réussite
+    for question in sorted(taux_reussite.keys()):
+        data[question] = [taux_reussite[question]] * len(dict_notes)
+
+    pd.DataFrame(data).to_csv(fichier_path, sep=';', index=False)
+
+
+def _ecrire_notes_xlsx(dict_notes, taux_reussite, fichier_path):
+    """Écrit des notes au format XLSX de notes (voir lire_notes_xlsx)."""
+    import pandas as pd
+
+    # Lignes 0-3 : entêtes (vides pour simplifier)
+    data_rows = [[None] * 47 for _ in range(4)]
+
+    # Ligne 4 : taux de réussite
+    ligne_taux = [None] * 47
+    for i, question in enumerate(sorted(taux_reussite.keys()), start=6):
+        if i < 46:
+            ligne_taux[i] = taux_reussite[question]
+    data_rows.append(ligne_taux)
+
+    # Lignes 5+ : données étudiants
+    for numero, note in dict_notes.items():
+        ligne = [None] * 47
+        ligne[3] = note      # Colonne 3 : note
+        ligne[46] = numero   # Colonne 46 : numéro d'anonymat
+        data_rows.append(ligne)
+
+    pd.DataFrame(data_rows).to_excel(fichier_path, index=False, header=False)
+
+
+def ecrire_notes_separees(separees, taux_reussite, fichier_notes_original):
+    """
+    Écrit les deux groupes de notes à côté du fichier original, au même format
+    (CSV pour un CSV, XLSX pour un classeur) : <nom>_1-7-8 et <nom>_9.
+
+    Returns:
+        tuple: (fichier_178, fichier_9) chemins des deux fichiers créés
+
+    Raises:
+        ErreurEcriture: Si l'écriture échoue
+    """
+    fichier_path = Path(fichier_notes_original)
+    extension = fichier_path.suffix.lower()
+    if extension != '.csv':
+        extension = '.xlsx'
+    ecrire = _ecrire_notes_csv if extension == '.csv' else _ecrire_notes_xlsx
+
+    fichier_178 = fichier_path.parent / f"{fichier_path.stem}_1-7-8{extension}"
+    fichier_9 = fichier_path.parent / f"{fichier_path.stem}_9{extension}"
+
+    try:
+        ecrire(separees.notes_178, taux_reussite, str(fichier_178))
+        ecrire(separees.notes_9, taux_reussite, str(fichier_9))
+    except Exception as e:
+        raise ErreurEcriture(f"Écriture des notes séparées impossible : {e}") from e
+
+    return str(fichier_178), str(fichier_9)
+
+
+def organiser_donnees(dict_notes, dict_licences):
+    """
+    Répartit les notes par licence.
+
+    Args:
+        dict_notes: {numero: note}
+        dict_licences: {numero: licence}
+
+    Returns:
+        Repartition: Étudiants par licence (triés par note décroissante) et étudiants sans licence
+    """
+    etudiants_par_licence = {}
+    etudiants_ignores = []
+
+    for numero, note in dict_notes.items():
+        if numero in dict_licences:
+            etudiants_par_licence.setdefault(dict_licences[numero], []).append((numero, note))
+        else:
+            etudiants_ignores.append((numero, note))
+
+    # Trier chaque liste par note décroissante
+    for licence in etudiants_par_licence:
+        etudiants_par_licence[licence].sort(key=lambda x: x[1], reverse=True)
+
+    return Repartition(etudiants_par_licence, etudiants_ignores)
+
+
+def assigner_licences(repartition, affectations, dict_licences):
+    """
+    Ajoute des étudiants sans licence aux licences choisies.
+
+    Args:
+        repartition: Repartition à compléter (modifiée en place)
+        affectations: {numero: licence} pour les étudiants à assigner
+        dict_licences: {numero: licence}, complété avec les affectations
+
+    Returns:
+        Repartition: La répartition mise à jour (étudiants non assignés toujours ignorés)
+    """
+    restants = []
+    for numero, note in repartition.etudiants_ignores:
+        licence = affectations.get(numero)
+        if licence is None:
+            restants.append((numero, note))
+            continue
+        repartition.etudiants_par_licence.setdefault(licence, []).append((numero, note))
+        dict_licences[numero] = licence
+
+    # Retrier chaque liste
+    for etudiants in repartition.etudiants_par_licence.values():
+        etudiants.sort(key=lambda x: x[1], reverse=True)
+
+    repartition.etudiants_ignores = restants
+    return repartition
+
+
+# Erreurs de saisie à distance 1, de la plus probable à la moins probable (lecture optique d'un chiffre)
+OPERATIONS_PROCHES = ['substitution', 'transposition', 'suppression', 'insertion']
+
+
+def _operation_proche(numero, connu):
+    """
+    Erreur qui transforme un numéro connu en numéro lu, si elle est unique.
+
+    Returns:
+        str: Élément de OPERATIONS_PROCHES, ou None si les numéros sont égaux ou plus éloignés
+    """
+    if len(numero) == len(connu):
+        differences = [i for i, (a, b) in enumerate(zip(numero, connu)) if a != b]
+        if len(differences) == 1:
+            return 'substitution'
+        if len(differences) == 2 and differences[1] == differences[0] + 1 \
+                and numero[differences[0]] == connu[differences[1]] and numero[differences[1]] == connu[differences[0]]:
+            return 'transposition'
+        return None
+    court, long = (numero, connu) if len(numero) < len(connu) else (connu, numero)
+    if len(long) - len(court) != 1:
+        return None
+    for i in range(len(long)):
+        if long[:i] + long[i + 1:] == court:
+            return 'suppression' if court is numero else 'insertion'
+    return None
+
+
+class IndexCandidats:
+    """
+    Index des numéros connus pour retrouver ceux à distance 1 d'un numéro lu
+    (un chiffre remplacé, ajouté ou supprimé, ou deux chiffres voisins inversés).
+
+    Chaque numéro est rangé sous lui-même et sous chacune de ses variantes privées
+    d'un chiffre (voisinage de suppression) : deux numéros à distance 1 partagent au
+    moins une clé. Une recherche ne consulte donc que longueur + 1 clés, quel que soit
+    le nombre de numéros connus ; les numéros trouvés sont ensuite vérifiés un à un.
+    """
+
+    def __init__(self, numeros):
+        """
+        Args:
+            numeros: Numéros connus (clés du dictionnaire des licences)
+        """
+        self._cles = {}
+        for numero in numeros:
+            numero = str(numero)
+            for cle in self._variantes(numero):
+                self._cles.setdefault(cle, []).append(numero)
+
+    @staticmethod
+    def _variantes(numero):
+        return {numero} | {numero[:i] + numero[i + 1:] for i in range(len(numero))}
+
+    def candidats(self, numero, exclus=()):
+        """
+        Numéros connus à distance 1 d'un numéro.
+
+        Args:
+            numero: Numéro lu
+            exclus: Numéros à écarter (par exemple ceux déjà attribués à un étudiant)
+
+        Returns:
+            list: [(numero connu, opération)], du plus probable au moins probable
+        """
+        numero = str(numero)
+        trouves = {}
+        for cle in self._variantes(numero):
+            for connu in self._cles.get(cle, ()):
+                if connu in trouves or connu in exclus:
+                    continue
+                operation = _operation_proche(numero, connu)
+                if operation is not None:
+                    trouves[connu] = operation
+        return sorted(trouves.items(), key=lambda candidat: (OPERATIONS_PROCHES.index(candidat[1]), candidat[0]))
+
+
+@dataclass
+class Proposition:
+    """
+    Licences proposées pour un étudiant absent du fichier des licences.
+
+    Attributes:
+        numero: Numéro de l'étudiant
+        note: Note de l'étudiant
+        licences: [(licence, [(numero connu, opération), ...])], de la plus probable à la moins probable
+    """
+    numero: str
+    note: float
+    licences: list = field(default_factory=list)
+
+    @property
+    def licence_sure(self):
+        """Licence du seul numéro proche, ou None s'il n'y en a aucun ou plusieurs."""
+        if len(self.licences) == 1 and len(self.licences[0][1]) == 1:
+            return self.licences[0][0]
+        return None
+
+
+def proposer_licences(etudiants_ignores, dict_licences, exclus=(), index=None):
+    """
+    Propose des licences aux étudiants absents du fichier des licences, d'après les
+    numéros connus à distance 1 de leur numéro (erreur de lecture ou de saisie).
+
+    Args:
+        etudiants_ignores: [(numero, note), ...] étudiants sans licence
+        dict_licences: {numero: licence}
+        exclus: Numéros à ne pas proposer (déjà attribués à un étudiant de la colle)
+        index: IndexCandidats des numéros de dict_licences, construit s'il n'est pas fourni
+
+    Returns:
+        list: Une Proposition par étudiant, dans l'ordre de etudiants_ignores
+    """
+    if index is None:
+        index = IndexCandidats(dict_licences)
+    exclus = set(exclus)
+
+    propositions = []
+    for numero, note in etudiants_ignores:
+        par_licence = {}
+        for connu, operation in index.candidats(numero, exclus):
+            par_licence.setdefault(dict_licences[connu], []).append((connu, operation))
+        # Licence portée par l'erreur la plus probable, puis par le plus de numéros proches
+        licences = sorted(par_licence.items(), key=lambda item: (
+            OPERATIONS_PROCHES.index(item[1][0][1]), -len(item[1]), item[0]))
+        propositions.append(Proposition(numero, note, licences))
+    return propositions
+
+
+def affectations_sans_ambiguite(propositions):
+    """
+    Affectations des étudiants qui n'ont qu'un seul numéro connu à distance 1.
+
+    Returns:
+        dict: {numero: licence}, à passer à assigner_licences
+    """
+    return {proposition.numero: proposition.licence_sure for proposition in propositions
+            if proposition.licence_sure is not None}
+
+
+def charger_groupes(fichier_groupes):
+    """
+    Charge les groupes depuis un fichier JSON. Un groupe réunit une ou plusieurs
+    licences ; une licence peut appartenir à plusieurs groupes.
+
+    Format attendu (les groupes gardent l'ordre du fichier) :
+        {"groupes": [
+            {"nom": "Santé", "licences": ["LAS1", "PASS"]},
+            {"nom": "Tous", "licences": "*"}
+        ]}
+    ou, plus court : {"Santé": ["LAS1", "PASS"], "Tous": "*"}
+
+    Args:
+        fichier_groupes: Chemin vers le fichier JSON
+
+    Returns:
+        dict: {nom du groupe: [licences] ou TOUTES_LICENCES}
+
+    Raises:
+        ErreurFichier: Si le fichier est introuvable ou n'est pas du JSON
+        ErreurGroupes: Si la définition des groupes est invalide
+    """
+    try:
+        with open(fichier_groupes, encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        raise ErreurFichier(f"Le fichier {fichier_groupes} n'existe pas.") from None
+    except (OSError, ValueError) as e:
+        raise ErreurFichier(f"Lecture du fichier de groupes impossible : {e}") from e
+    return valider_groupes(config)
+
+
+def valider_groupes(config):
+    """
+    Valide une définition de groupes déjà décodée (format de charger_groupes).
+
+    Args:
+        config: Objet JSON décodé
+
+    Returns:
+        dict: {nom du groupe: [licences] ou TOUTES_LICENCES}
+
+    Raises:
+        ErreurGroupes: Si la définition des groupes est invalide
+    """
+    if isinstance(config, dict) and isinstance(config.get('groupes'), list):
+        definitions = [(groupe.get('nom'), groupe.get('licences')) if isinstance(groupe, dict) else (None, None)
+                       for groupe in config['groupes']]
+    elif isinstance(config, dict):
+        definitions = list(config.items())
+    else:
+        raise ErreurGroupes("le fichier doit contenir un objet {groupe: [licences]} ou une liste 'groupes'")
+
+    groupes = {}
+    for i, (nom, licences) in enumerate(definitions, 1):
+        nom = str(nom or '').strip()
+        if not nom:
+            raise ErreurGroupes(f"groupe n°{i} : le champ 'nom' est obligatoire")
+        # Contraintes des noms de feuilles Excel
+        if len(nom) > 31 or any(caractere in nom for caractere in '[]:*?/\\'):
+            raise ErreurGroupes(f"groupe '{nom}' : nom de feuille invalide (31 caractères, sans [ ] : * ? / \\)")
+        if nom.casefold() in {groupe.casefold() for groupe in groupes}:
+            raise ErreurGroupes(f"groupe '{nom}' défini plusieurs fois")
+        if nom.casefold() in {feuille.casefold() for feuille in FEUILLES_RESERVEES}:
+            raise ErreurGroupes(f"le nom de groupe '{nom}' est réservé")
+
+        if isinstance(licences, str) and licences.strip().lower() in (TOUTES_LICENCES, 'tous', 'toutes'):
+            groupes[nom] = TOUTES_LICENCES
+        elif isinstance(licences, list):
+            # Une licence citée deux fois ne compte qu'une fois
+            groupes[nom] = list(dict.fromkeys(str(licence).strip() for licence in licences))
+        else:
+            raise ErreurGroupes(f"groupe '{nom}' : liste de licences (ou \"{TOUTES_LICENCES}\") attendue")
+    return groupes
+
+
+def classer_groupe(etudiants_par_licence, licences):
+    """
+    Classement d'un groupe par note décroissante, par fusion des listes de chaque
+    licence, déjà triées : O(n log k) pour n étudiants et k licences, sans nouveau tri.
+    À note égale, l'ordre des licences dans le groupe est conservé.
+
+    Args:
+        etudiants_par_licence: {licence: [(numero, note), ...]} trié par note décroissante
+        licences: Licences du groupe
+
+    Returns:
+        list: [((numero, note), licence), ...]
+    """
+    listes = [zip(etudiants_par_licence[licence], repeat(licence))
+              for licence in licences if licence in etudiants_par_licence]
+    return list(heapq.merge(*listes, key=lambda etudiant: etudiant[0][1], reverse=True))
+
+
+def creer_fichier_sortie(etudiants_par_licence, taux_reussite, fichier_sortie="resultats.xlsx", groupes=None,
+                         etudiants_ignores=None, format_sortie=None):
+    """
+    Crée le fichier de résultats : feuilles Général, Stats, une par licence,
+    une par groupe non vide, et Sans Licence.
+
+    Args:
+        etudiants_par_licence: {licence: [(numero, note), ...]}
+        taux_reussite: {question: taux}
+        fichier_sortie: Nom du fichier de sortie (l'extension est forcée à celle du format)
+        groupes: dict {nom du groupe: [licences] ou TOUTES_LICENCES}, dans l'ordre des feuilles
+                 (par défaut, les groupes A, B et C, vides)
+        etudiants_ignores: [(numero, note), ...] étudiants sans licence
+        format_sortie: xlsx, ods, csv, parquet ou arrow (par défaut : d'après l'extension,
+                       xlsx si elle n'est pas reconnue)
+
+    Returns:
+        FichierSortie: Chemin absolu et contenu du fichier créé
+
+    Raises:
+        ErreurEcriture: Si le format est indisponible ou si l'écriture échoue
+    """
+    import pandas as pd
+
+    if not groupes:
+        groupes = {nom_groupe: [] for nom_groupe in GROUPES}
+    if etudiants_ignores is None:
+        etudiants_ignores = []
+
+    # Forcer l'extension du format si une autre extension est fournie
+    format_extension = format_depuis_extension(fichier_sortie)
+    format_sortie = format_sortie or format_extension or FORMAT_PAR_DEFAUT
+    extension_remplacee = None
+    if format_extension != format_sortie:
+        extension_remplacee = Path(fichier_sortie).suffix.lower()
+        fichier_sortie = str(Path(fichier_sortie).with_suffix(FORMATS_SORTIE.get(format_sortie, '')))
+
+    resultat = FichierSortie(str(Path(fichier_sortie).resolve()), extension_remplacee=extension_remplacee,
+                             format=format_sortie)
+    ligne_vide = {
+        'Licence': '', 'Nombre d\'étudiants': '', 'Moyenne': '',
+        'Médiane': '', 'Écart-type': '', 'Note min': '', 'Note max': ''
+    }
+
+    def statistiques(licence, notes):
+        return {
+            'Licence': licence,
+            'Nombre d\'étudiants': len(notes),
+            'Moyenne': round(sum(notes) / len(notes), 2),
+            'Médiane': round(pd.Series(notes).median(), 2),
+            'Écart-type': round(pd.Series(notes).std(), 2),
+            'Note min': round(min(notes), 2),
+            'Note max': round(max(notes), 2)
+        }
+
+    try:
+        with ouvrir_ecrivain(resultat.chemin, format_sortie) as ecrivain:
+            # ===== FEUILLE "Général" =====
+            tous_etudiants = [
+                {'Numéro CREM': numero, 'Note': note, 'Licence': licence}
+                for licence, etudiants in etudiants_par_licence.items()
+                for numero, note in etudiants
+            ]
+            df_general = pd.DataFrame(tous_etudiants)
+            df_general = df_general.sort_values('Note', ascending=False)
+            with etape('feuille:Général', lignes=len(df_general)):
+                ecrivain.ecrire('Général', df_general)
+            resultat.feuilles['Général'] = len(df_general)
+
+            # ===== FEUILLE "Stats" =====
+            stats_data = []
+            toutes_notes = [note for etudiants in etudiants_par_licence.values() for _, note in etudiants]
+
+            if toutes_notes:
+                stats_data.append(statistiques('GÉNÉRAL', toutes_notes))
+                stats_data.append(dict(ligne_vide))
+
+                # Statistiques par licence
+                for licence in sorted(etudiants_par_licence.keys()):
+                    stats_data.append(statistiques(licence, [note for _, note in etudiants_par_licence[licence]]))
+
+            # Deux lignes vides puis les taux de réussite
+            if taux_reussite:
+                stats_data += [dict(ligne_vide), dict(ligne_vide)]
+                stats_data.append({**ligne_vide, 'Licence': 'TAUX DE RÉUSSITE PAR QUESTION'})
+                for question in sorted(taux_reussite.keys()):
+                    taux = round(taux_reussite[question] * 100, 2)
+                    stats_data.append({**ligne_vide, 'Licence': question, 'Nombre d\'étudiants': f'{taux}%'})
+
+            with etape('feuille:Stats', lignes=len(stats_data)):
+                ecrivain.ecrire('Stats', pd.DataFrame(stats_data))
+
+            # ===== FEUILLES PAR LICENCE =====
+            for licence in sorted(etudiants_par_licence.keys()):
+                df = pd.DataFrame({
+                    'Numéro CREM': [etudiant[0] for etudiant in etudiants_par_licence[licence]],
+                    'Note': [etudiant[1] for etudiant in etudiants_par_licence[licence]]
+                })
+                with etape(f'feuille:{licence}', lignes=len(df)):
+                    ecrivain.ecrire(licence, df)
+                resultat.feuilles[licence] = len(df)
+
+            # ===== FEUILLES DE GROUPES =====
+            for nom_groupe, licences_groupe in groupes.items():
+                if licences_groupe == TOUTES_LICENCES:
+                    licences_groupe = sorted(etudiants_par_licence)
+
+                if not licences_groupe:
+                    resultat.groupes_non_crees[nom_groupe] = "aucune licence sélectionnée"
+                    continue
+                # Excel ne distingue pas les majuscules dans les noms de feuilles
+                if nom_groupe.casefold() in {feuille.casefold() for feuille in [*resultat.feuilles, *FEUILLES_RESERVEES]}:
+                    resultat.groupes_non_crees[nom_groupe] = "nom déjà pris par une autre feuille"
+                    continue
+
+                # Fusion des listes des licences sélectionnées, déjà triées par note
+                etudiants_groupe = classer_groupe(etudiants_par_licence, licences_groupe)
+
+                if etudiants_groupe:
+                    df_groupe = pd.DataFrame({
+                        'Numéro CREM': [numero for (numero, _), _ in etudiants_groupe],
+                        'Note': [note for (_, note), _ in etudiants_groupe],
+                        'Licence': [licence for _, licence in etudiants_groupe],
+                    })
+                    with etape(f'feuille:{nom_groupe}', lignes=len(df_groupe)):
+                        ecrivain.ecrire(nom_groupe, df_groupe)
+                    resultat.feuilles[nom_groupe] = len(df_groupe)
+                else:
+                    resultat.groupes_non_crees[nom_groupe] = "aucun étudiant trouvé"
+
+            # ===== FEUILLE "Sans Licence" =====
+            if etudiants_ignores:
+                df_sans_licence = pd.DataFrame({
+                    'Numéro CREM': [etudiant[0] for etudiant in etudiants_ignores],
+                    'Note': [etudiant[1] for etudiant in etudiants_ignores]
+                })
+                df_sans_licence = df_sans_licence.sort_values('Note', ascending=False)
+                with etape('feuille:Sans Licence', lignes=len(df_sans_licence)):
+                    ecrivain.ecrire('Sans Licence', df_sans_licence)
+                resultat.feuilles['Sans Licence'] = len(df_sans_licence)
+
+    except Exception as e:
+        raise ErreurEcriture(f"Création du fichier de sortie impossible : {e}") from e
+
+    return resultat
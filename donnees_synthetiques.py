@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Génération de jeux de données synthétiques réalistes pour les trois outils :
+
+    notes de colle      CSV (etu, Mark, Q01 à Q40) ou classeur XLSX (taux en ligne 5,
+                        note en colonne D, réponses en G:AT, numéro en AU), avec
+                        quelques lignes incomplètes ou numéros invalides ;
+    licences            un classeur par licence avec une colonne « Client » (entrée de
+                        sumup_licences) et le fichier Numéro Anonymat / Licence
+                        (entrée de traiter_colle) ;
+    listes d'emails     numéro d'anonymat (col A) et email (col B), avec quelques emails
+                        invalides et doublons (entrée de import_user_moodle).
+
+Les fichiers sont reproductibles (même graine, mêmes données) et écrits en flux
+(classeurs openpyxl en écriture seule) : 1M de lignes ne tient jamais en mémoire
+sous forme de cellules.
+
+Usage:
+    python donnees_synthetiques.py DOSSIER [--tailles 1k,10k,100k,1M] [--graine N]
+"""
+
+import argparse
+import csv
+from pathlib import Path
+
+# Licences des classeurs générés (celles des fichiers réels)
+LICENCES = ['ANGLAIS', 'CHIMIE', 'DROIT', 'ECO GES', 'ESPAGNOL', 'LETTRES', 'LR', 'MATHS', 'PHYSIQUE',
+            'SDL', 'SPI', 'SPS', 'ST', 'STAPS', 'SV']
+
+NB_QUESTIONS = 40
+
+# Premiers chiffres des numéros d'anonymat des notes (groupes 1/7/8 et 9)
+PREMIERS_CHIFFRES = (1, 7, 8, 9)
+
+# Proportions d'anomalies introduites dans les données
+TAUX_LIGNES_INCOMPLETES = 0.005
+TAUX_NUMEROS_INVALIDES = 0.005
+TAUX_EMAILS_INVALIDES = 0.005
+TAUX_DOUBLONS = 0.002
+
+TAILLES_PAR_DEFAUT = '1k,10k,100k,1M'
+
+
+def lire_nombre(texte):
+    """
+    Convertit un nombre lisible (ex. 1k, 100k, 1M ou 2500) en entier.
+
+    Raises:
+        argparse.ArgumentTypeError: Si le texte n'est pas un nombre
+    """
+    texte = str(texte).strip().upper()
+    multiplicateurs = {'K': 1000, 'M': 1000 ** 2}
+    try:
+        if texte and texte[-1] in multiplicateurs:
+            return int(float(texte[:-1]) * multiplicateurs[texte[-1]])
+        return int(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"nombre invalide : {texte}") from None
+
+
+def lire_tailles(texte):
+    """Convertit une liste de nombres lisibles séparés par des virgules (ex. 1k,10k)."""
+    return [lire_nombre(taille) for taille in str(texte).split(',') if taille.strip()]
+
+
+def nom_taille(nombre):
+    """Forme courte d'un nombre de lignes (1000 → 1k, 1000000 → 1M)."""
+    for suffixe, multiplicateur in (('M', 1000 ** 2), ('k', 1000)):
+        if nombre >= multiplicateur and nombre % multiplicateur == 0:
+            return f"{nombre // multiplicateur}{suffixe}"
+    return str(nombre)
+
+
+def _generateur(graine):
+    import numpy as np
+
+    return np.random.default_rng(graine)
+
+
+def _ecrire_classeur(fichier, lignes, titre=None):
+    """Écrit un classeur XLSX ligne par ligne (openpyxl en écriture seule)."""
+    from openpyxl import Workbook
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet(titre)
+    for ligne in lignes:
+        feuille.append(ligne)
+    classeur.save(fichier)
+
+
+def numeros_notes(rng):
+    """
+    Numéros d'anonymat à 4 chiffres commençant par 1, 7, 8 ou 9 (tous les numéros possibles).
+
+    Returns:
+        numpy.ndarray: Numéros dans un ordre aléatoire
+    """
+    import numpy as np
+
+    numeros = np.concatenate([np.arange(chiffre * 1000, (chiffre + 1) * 1000) for chiffre in PREMIERS_CHIFFRES])
+    return rng.permutation(numeros)
+
+
+def _reponses(rng, nb_lignes):
+    """Réponses justes (1) ou fausses (0), chaque question ayant sa propre difficulté."""
+    difficultes = rng.uniform(0.2, 0.9, NB_QUESTIONS)
+    return (rng.random((nb_lignes, NB_QUESTIONS)) < difficultes).astype('int8')
+
+
+def _tirer_numeros(rng, nb_lignes):
+    """Numéros des lignes de notes : tirés parmi les numéros valides, quelques-uns invalides."""
+    numeros = rng.choice(numeros_notes(rng), nb_lignes).astype(object)
+    invalides = rng.random(nb_lignes) < TAUX_NUMEROS_INVALIDES
+    numeros[invalides] = rng.integers(10, 1000, int(invalides.sum()))
+    return numeros
+
+
+def generer_notes_csv(fichier, nb_lignes, graine=0):
+    """
+    Génère un fichier CSV de notes (séparateur ;, colonnes etu, Mark et Q01 à Q40).
+
+    Args:
+        fichier: Fichier à écrire
+        nb_lignes: Nombre de lignes d'étudiants
+        graine: Graine du générateur aléatoire
+
+    Returns:
+        Path: Fichier écrit
+    """
+    rng = _generateur(graine)
+    reponses = _reponses(rng, nb_lignes)
+    notes = (reponses.sum(axis=1) / 2).round(2)
+    numeros = _tirer_numeros(rng, nb_lignes)
+    incompletes = rng.random(nb_lignes) < TAUX_LIGNES_INCOMPLETES
+
+    with open(fichier, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['etu', 'Mark'] + [f"Q{i:02d}" for i in range(1, NB_QUESTIONS + 1)])
+        for numero, note, reponse, incomplete in zip(numeros, notes, reponses.tolist(), incompletes):
+            writer.writerow([numero, '' if incomplete else note] + reponse)
+    return Path(fichier)
+
+
+def generer_notes_xlsx(fichier, nb_lignes, graine=0):
+    """
+    Génère un classeur de notes au format de l'export : taux de réussite en ligne 5,
+    puis une ligne par étudiant (note en D, réponses en G:AT, numéro en AU).
+
+    Args:
+        fichier: Fichier à écrire
+        nb_lignes: Nombre de lignes d'étudiants
+        graine: Graine du générateur aléatoire
+
+    Returns:
+        Path: Fichier écrit
+    """
+    rng = _generateur(graine)
+    reponses = _reponses(rng, nb_lignes)
+    notes = (reponses.sum(axis=1) / 2).round(2)
+    numeros = _tirer_numeros(rng, nb_lignes)
+    incompletes = rng.random(nb_lignes) < TAUX_LIGNES_INCOMPLETES
+    taux = reponses.mean(axis=0).round(4) if nb_lignes else [0.0] * NB_QUESTIONS
+
+    def lignes():
+        yield ['Épreuve', 'Colle synthétique']
+        yield ['Date', '2024-01-01']
+        yield ['Questions', NB_QUESTIONS]
+        yield ['Nom', 'Prénom', 'Groupe', 'Note', '', ''] + [f"Q{i:02d}" for i in range(1, NB_QUESTIONS + 1)] + ['Anonymat']
+        yield [''] * 6 + list(taux)
+        for numero, note, reponse, incomplete in zip(numeros, notes, reponses.tolist(), incompletes):
+            yield ['', '', '', None if incomplete else float(note), '', ''] + reponse + [int(numero)]
+
+    _ecrire_classeur(fichier, lignes())
+    return Path(fichier)
+
+
+def _numeros_uniques(rng, nombre, premiers_chiffres):
+    """
+    Numéros d'anonymat distincts commençant par l'un des chiffres donnés, sur le plus
+    petit nombre de chiffres (4 au moins) qui en laisse assez.
+    """
+    import numpy as np
+
+    nb_chiffres = 4
+    while len(premiers_chiffres) * 10 ** (nb_chiffres - 1) < 2 * nombre:
+        nb_chiffres += 1
+    par_tranche = 10 ** (nb_chiffres - 1)
+    tirage = rng.choice(len(premiers_chiffres) * par_tranche, nombre, replace=False)
+    return np.asarray(premiers_chiffres)[tirage // par_tranche] * par_tranche + tirage % par_tranche
+
+
+def generer_licences(dossier, nb_lignes, graine=0):
+    """
+    Génère un classeur par licence (colonnes Nom, Prénom, Client), répartissant
+    nb_lignes numéros distincts commençant par 1, 7 ou 9 ; quelques numéros sont
+    inscrits dans deux licences (doublons).
+
+    Args:
+        dossier: Dossier à créer
+        nb_lignes: Nombre total de lignes « Client »
+        graine: Graine du générateur aléatoire
+
+    Returns:
+        Path: Dossier des classeurs
+    """
+    rng = _generateur(graine)
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+
+    numeros = _numeros_uniques(rng, nb_lignes, (1, 7, 9))
+    doublons = rng.random(nb_lignes) < TAUX_DOUBLONS
+    numeros[doublons] = rng.choice(numeros, int(doublons.sum()))
+    # Des licences de tailles inégales, comme dans les fichiers réels
+    poids = rng.dirichlet([2.0] * len(LICENCES))
+    licences = rng.choice(len(LICENCES), nb_lignes, p=poids)
+
+    for indice, licence in enumerate(LICENCES):
+        numeros_licence = numeros[licences == indice]
+        _ecrire_classeur(dossier / f"{licence}.xlsx", [['Nom', 'Prénom', 'Client']] + [
+            [f"NOM{numero}", f"Prénom{numero}", int(numero)] for numero in numeros_licence
+        ])
+    return dossier
+
+
+def generer_fichier_licences(fichier, graine=0, taux_inscrits=0.9):
+    """
+    Génère le fichier des licences lu par traiter_colle (Numéro Anonymat, Licence) :
+    une licence pour une partie des numéros d'anonymat des notes.
+
+    Args:
+        fichier: Fichier XLSX à écrire
+        graine: Graine du générateur aléatoire
+        taux_inscrits: Part des numéros possibles ayant une licence
+
+    Returns:
+        Path: Fichier écrit
+    """
+    rng = _generateur(graine)
+    numeros = numeros_notes(rng)
+    numeros = numeros[:int(len(numeros) * taux_inscrits)]
+    licences = rng.choice(len(LICENCES), len(numeros))
+    _ecrire_classeur(fichier, [['Numéro Anonymat', 'Licence']] + [
+        [int(numero), LICENCES[licence]] for numero, licence in sorted(zip(numeros, licences))
+    ])
+    return Path(fichier)
+
+
+def generer_emails(fichier, nb_lignes, graine=0):
+    """
+    Génère une liste d'emails (numéro d'anonymat en A, email en B, sans en-tête),
+    avec quelques emails invalides et quelques lignes en double.
+
+    Args:
+        fichier: Fichier XLSX à écrire
+        nb_lignes: Nombre de lignes
+        graine: Graine du générateur aléatoire
+
+    Returns:
+        Path: Fichier écrit
+    """
+    rng = _generateur(graine)
+    numeros = _numeros_uniques(rng, nb_lignes, (1, 7, 9))
+    doublons = rng.random(nb_lignes) < TAUX_DOUBLONS
+    numeros[doublons] = rng.choice(numeros, int(doublons.sum()))
+    invalides = rng.random(nb_lignes) < TAUX_EMAILS_INVALIDES
+
+    def lignes():
+        for numero, invalide in zip(numeros.tolist(), invalides):
+            email = f"etudiant.{numero}@etu.exemple.fr"
+            yield [numero, email.replace('@', ' ') if invalide else email]
+
+    _ecrire_classeur(fichier, lignes())
+    return Path(fichier)
+
+
+def generer_jeu(dossier, nb_lignes, graine=0):
+    """
+    Génère toutes les données d'une taille dans DOSSIER/<taille> (DOSSIER/<taille>-<graine>
+    pour une graine non nulle). Les fichiers déjà générés sont réutilisés.
+
+    Returns:
+        dict: {type de données: chemin absolu}, utilisable depuis n'importe quel dossier courant
+    """
+    dossier = Path(dossier).resolve() / (nom_taille(nb_lignes) + (f"-{graine}" if graine else ""))
+    dossier.mkdir(parents=True, exist_ok=True)
+    fichiers = {
+        'notes_csv': (dossier / 'notes.csv', lambda f: generer_notes_csv(f, nb_lignes, graine)),
+        'notes_xlsx': (dossier / 'notes.xlsx', lambda f: generer_notes_xlsx(f, nb_lignes, graine)),
+        'licences_colle': (dossier / 'licences.xlsx', lambda f: generer_fichier_licences(f, graine)),
+        'licences': (dossier / 'licences', lambda f: generer_licences(f, nb_lignes, graine)),
+        'emails': (dossier / 'emails.xlsx', lambda f: generer_emails(f, nb_lignes, graine)),
+    }
+    for fichier, generer in fichiers.values():
+        if not fichier.exists():
+            generer(fichier)
+    return {nom: fichier for nom, (fichier, _) in fichiers.items()}
+
+
+def main(argv=None, prog=None):
+    """Fonction principale."""
+    parser = argparse.ArgumentParser(prog=prog or "python donnees_synthetiques.py",
+                                     description="Génération de données synthétiques pour les outils")
+    parser.add_argument('dossier', help="dossier de sortie (un sous-dossier par taille)")
+    parser.add_argument('--tailles', type=lire_tailles, default=lire_tailles(TAILLES_PAR_DEFAUT),
+                        help=f"nombres de lignes, séparés par des virgules (défaut : {TAILLES_PAR_DEFAUT})")
+    parser.add_argument('--graine', type=int, default=0, help="graine du générateur aléatoire (défaut : 0)")
+    args = parser.parse_args(argv)
+
+    for nb_lignes in args.tailles:
+        print(f"📝 Génération des données de {nom_taille(nb_lignes)} lignes...")
+        for nom, fichier in generer_jeu(args.dossier, nb_lignes, args.graine).items():
+            print(f"   ✓ {nom:<15} {fichier}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Écriture des résultats de traiter_colle dans plusieurs formats, avec les mêmes
+feuilles dans le même ordre (Général, Stats, une par licence, une par groupe,
+Sans Licence) :
+    - xlsx : classeur Excel écrit par openpyxl, le format par défaut ;
+    - ods : classeur OpenDocument écrit en flux, feuille par feuille, sans odfpy ;
+    - csv : archive zip contenant un fichier CSV par feuille ;
+    - parquet, arrow : dossier contenant un fichier Parquet ou Arrow IPC par feuille,
+      pour les traitements en aval (pyarrow requis).
+
+Le format est déduit de l'extension du fichier de sortie, sauf s'il est imposé.
+Parquet et Arrow exigent un type par colonne : dans la feuille Stats, les colonnes
+numériques complétées de cases vides reçoivent des valeurs manquantes, les autres
+sont converties en texte.
+"""
+
+import abc
+import importlib.util
+import io
+import math
+import numbers
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+# Extension écrite pour chaque format
+FORMATS_SORTIE = {
+    'xlsx': '.xlsx',
+    'ods': '.ods',
+    'csv': '.zip',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+FORMAT_PAR_DEFAUT = 'xlsx'
+
+# Extensions reconnues en plus de celles de FORMATS_SORTIE
+EXTENSIONS_SUPPLEMENTAIRES = {'.feather': 'arrow', '.ipc': 'arrow'}
+
+# Formats qui nécessitent pyarrow
+FORMATS_ARROW = {'parquet', 'arrow'}
+
+TYPE_MIME_ODS = 'application/vnd.oasis.opendocument.spreadsheet'
+
+DEBUT_CONTENU_ODS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<office:document-content'
+    ' xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+    ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+    ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"'
+    ' office:version="1.2"><office:body><office:spreadsheet>'
+)
+FIN_CONTENU_ODS = '</office:spreadsheet></office:body></office:document-content>'
+MANIFESTE_ODS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0"'
+    ' manifest:version="1.2">'
+    f'<manifest:file-entry manifest:full-path="/" manifest:media-type="{TYPE_MIME_ODS}"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+CELLULE_VIDE_ODS = '<table:table-cell/>'
+
+
+class ErreurFormatSortie(ValueError):
+    """Format de sortie inconnu ou indisponible."""
+
+
+def format_depuis_extension(fichier_sortie):
+    """
+    Format correspondant à l'extension d'un fichier de sortie.
+
+    Args:
+        fichier_sortie: Chemin du fichier de sortie
+
+    Returns:
+        str: Format (clé de FORMATS_SORTIE), ou None si l'extension n'est pas reconnue
+    """
+    extension = Path(fichier_sortie).suffix.lower()
+    for format_sortie, extension_format in FORMATS_SORTIE.items():
+        if extension == extension_format:
+            return format_sortie
+    return EXTENSIONS_SUPPLEMENTAIRES.get(extension)
+
+
+def verifier_format(format_sortie):
+    """
+    Vérifie qu'un format de sortie est connu et que ses dépendances sont installées.
+
+    Raises:
+        ErreurFormatSortie: Si le format est inconnu ou si pyarrow manque
+    """
+    if format_sortie not in FORMATS_SORTIE:
+        raise ErreurFormatSortie(f"format de sortie inconnu : {format_sortie} "
+                                 f"(formats disponibles : {', '.join(FORMATS_SORTIE)})")
+    if format_sortie in FORMATS_ARROW and importlib.util.find_spec('pyarrow') is None:
+        raise ErreurFormatSortie(f"le format {format_sortie} nécessite pyarrow (pip install pyarrow)")
+
+
+class Ecrivain(abc.ABC):
+    """
+    Écrit les feuilles d'un fichier de résultats, dans l'ordre des appels à ecrire().
+    S'utilise comme gestionnaire de contexte : le fichier est finalisé à la sortie.
+
+    Attributes:
+        chemin: Chemin du fichier (ou du dossier) écrit
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.noms = set()
+
+    def _nom_unique(self, nom_feuille, extension=''):
+        """
+        Nom de la feuille dans le fichier (ou nom du fichier de la feuille). Comme Excel,
+        un numéro est ajouté aux noms qui ne diffèrent que par la casse (« SANS LICENCE »
+        et « Sans Licence »), confondus par LibreOffice et certains systèmes de fichiers.
+        """
+        base = nom = nom_feuille.replace('/', '_').replace('\\', '_')
+        numero = 0
+        while nom.casefold() in self.noms:
+            numero += 1
+            nom = f"{base}{numero}"
+        self.noms.add(nom.casefold())
+        return nom + extension
+
+    @abc.abstractmethod
+    def ecrire(self, nom_feuille, df):
+        """Écrit une feuille (un DataFrame, en-tête compris, sans index)."""
+
+    def fermer(self):
+        """Finalise le fichier."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.fermer()
+
+
+class EcrivainXlsx(Ecrivain):
+    """Classeur Excel (openpyxl)."""
+
+    def __init__(self, chemin):
+        import pandas as pd
+
+        super().__init__(chemin)
+        self.writer = pd.ExcelWriter(chemin, engine='openpyxl')
+
+    def ecrire(self, nom_feuille, df):
+        df.to_excel(self.writer, sheet_name=nom_feuille, index=False)
+
+    def fermer(self):
+        self.writer.close()
+
+
+class EcrivainOds(Ecrivain):
+    """
+    Classeur OpenDocument écrit en flux : chaque ligne est sérialisée puis écrite
+    dans content.xml, sans construire l'arbre du document en mémoire.
+    """
+
+    def __init__(self, chemin):
+        super().__init__(chemin)
+        self.archive = zipfile.ZipFile(chemin, 'w', zipfile.ZIP_DEFLATED, compresslevel=1)
+        # Le type MIME doit être la première entrée, non compressée
+        self.archive.writestr(zipfile.ZipInfo('mimetype'), TYPE_MIME_ODS, compress_type=zipfile.ZIP_STORED)
+        self.archive.writestr('META-INF/manifest.xml', MANIFESTE_ODS)
+        self.contenu = io.TextIOWrapper(self.archive.open('content.xml', 'w'), encoding='utf-8',
+                                        write_through=False)
+        self.contenu.write(DEBUT_CONTENU_ODS)
+
+    @staticmethod
+    def _cellule(valeur):
+        if valeur is None or valeur == '':
+            return CELLULE_VIDE_ODS
+        if isinstance(valeur, numbers.Number) and not isinstance(valeur, bool):
+            if isinstance(valeur, numbers.Real) and math.isnan(valeur):
+                return CELLULE_VIDE_ODS
+            return (f'<table:table-cell office:value-type="float" office:value="{valeur}">'
+                    f'<text:p>{valeur}</text:p></table:table-cell>')
+        return f'<table:table-cell office:value-type="string"><text:p>{escape(str(valeur))}</text:p></table:table-cell>'
+
+    def ecrire(self, nom_feuille, df):
+        cellule = self._cellule
+        ecrire = self.contenu.write
+        ecrire(f'<table:table table:name={quoteattr(self._nom_unique(nom_feuille))}>')
+        if len(df.columns) == 0:
+            # Feuille sans colonne (Stats d'une colle vide) : ODF exige une colonne et une cellule par ligne
+            ecrire('<table:table-column/>' + f'<table:table-row>{CELLULE_VIDE_ODS}</table:table-row>' * (len(df) + 1))
+            ecrire('</table:table>')
+            return
+        ecrire(f'<table:table-column table:number-columns-repeated="{len(df.columns)}"/>')
+        ecrire('<table:table-row>' + ''.join(map(cellule, df.columns)) + '</table:table-row>')
+        for ligne in df.itertuples(index=False, name=None):
+            ecrire('<table:table-row>' + ''.join(map(cellule, ligne)) + '</table:table-row>')
+        ecrire('</table:table>')
+
+    def fermer(self):
+        self.contenu.write(FIN_CONTENU_ODS)
+        self.contenu.close()
+        self.archive.close()
+
+
+class EcrivainCsv(Ecrivain):
+    """Archive zip d'un fichier CSV (UTF-8, séparateur virgule) par feuille."""
+
+    def __init__(self, chemin):
+        super().__init__(chemin)
+        self.archive = zipfile.ZipFile(chemin, 'w', zipfile.ZIP_DEFLATED, compresslevel=1)
+
+    def ecrire(self, nom_feuille, df):
+        with io.TextIOWrapper(self.archive.open(self._nom_unique(nom_feuille, '.csv'), 'w'),
+                              encoding='utf-8', newline='') as fichier:
+            df.to_csv(fichier, index=False)
+
+    def fermer(self):
+        self.archive.close()
+
+
+def _colonnes_typees(df):
+    """
+    Donne un type unique à chaque colonne de texte mêlant nombres et chaînes
+    (feuille Stats) : valeurs manquantes à la place des cases vides si le reste
+    est numérique, texte sinon.
+    """
+    import pandas as pd
+
+    conversions = {}
+    for colonne in df.columns:
+        if df[colonne].dtype != object:
+            continue
+        valeurs = df[colonne]
+        remplies = valeurs[valeurs != '']
+        if len(remplies) and all(isinstance(v, numbers.Number) and not isinstance(v, bool) for v in remplies):
+            conversions[colonne] = pd.to_numeric(valeurs.where(valeurs != ''), errors='coerce')
+        else:
+            conversions[colonne] = valeurs.astype(str)
+    return df.assign(**conversions) if conversions else df
+
+
+class EcrivainArrow(Ecrivain):
+    """
+    Dossier d'un fichier par feuille, au format Parquet ou Arrow IPC. Les fichiers
+    du même format laissés par une exécution précédente sont supprimés.
+    """
+
+    def __init__(self, chemin, format_sortie):
+        super().__init__(chemin)
+        self.format = format_sortie
+        self.extension = FORMATS_SORTIE[format_sortie]
+        dossier = Path(chemin)
+        dossier.mkdir(parents=True, exist_ok=True)
+        for ancien in dossier.glob(f'*{self.extension}'):
+            ancien.unlink()
+
+    def ecrire(self, nom_feuille, df):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(_colonnes_typees(df), preserve_index=False)
+        fichier = Path(self.chemin) / self._nom_unique(nom_feuille, self.extension)
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, fichier)
+        else:
+            with pa.OSFile(str(fichier), 'wb') as sortie, pa.ipc.new_file(sortie, table.schema) as ecrivain:
+                ecrivain.write_table(table)
+
+
+def ouvrir_ecrivain(chemin, format_sortie):
+    """
+    Ouvre l'écrivain d'un format de sortie.
+
+    Args:
+        chemin: Chemin du fichier (dossier pour parquet et arrow)
+        format_sortie: Clé de FORMATS_SORTIE
+
+    Returns:
+        Ecrivain: À utiliser dans un bloc with
+
+    Raises:
+        ErreurFormatSortie: Si le format est inconnu ou indisponible
+    """
+    verifier_format(format_sortie)
+    if format_sortie == 'xlsx':
+        return EcrivainXlsx(chemin)
+    if format_sortie == 'ods':
+        return EcrivainOds(chemin)
+    if format_sortie == 'csv':
+        return EcrivainCsv(chemin)
+    return EcrivainArrow(chemin, format_sortie)
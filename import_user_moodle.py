@@ -1,33 +1,71 @@
-import pandas as pd
-import sys
+import argparse
+import csv
+import hashlib
+import io
+import json
 import os
+import re
+import secrets
+import stat
+import string
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
+from lecture_tableaux import ErreurFormat, iterer_lignes
+import mesures
+from mesures import etape
+
+# Colonnes du fichier CSV d'import des utilisateurs Moodle
+COLONNES_MOODLE = ['username', 'email', 'auth', 'firstname', 'lastname']
+
+# Nombre de lignes accumulées avant chaque écriture en mode flux
+TAILLE_TAMPON_FLUX = 1000
+
+# Mode --pousser : utilisateurs par appel au service web et appels simultanés
+TAILLE_LOT_WS = 100
+NB_REQUETES_WS = 4
+# Vérifications des comptes existants après une réponse perdue, avant d'abandonner un lot
+VERIFICATIONS_CREATION = 3
+
+# Option --mots-de-passe : longueur des mots de passe générés
+LONGUEUR_MOT_DE_PASSE = 12
+CARACTERES_SPECIAUX = '!#$%*+-=?@_'
+
+# Règles de validation (limites des champs username et email de Moodle)
+LONGUEUR_MAX_USERNAME = 100
+LONGUEUR_MAX_EMAIL = 100
+MOTIF_USERNAME = r'[a-z0-9_.@-]+'
+MOTIF_EMAIL = r'[^@\s]+@[^@\s]+\.[^@\s.]+'
+
 def lire_fichier_emails(fichier_path):
     """
     Lit le fichier contenant les numéros d'anonymat (col A) et emails (col B)
     Supporte les formats .xlsx et .ods
     Retourne un DataFrame avec les données
     """
+    import pandas as pd
+    
     try:
-        # Détecter l'extension du fichier
-        extension = Path(fichier_path).suffix.lower()
-        
-        # Lire le fichier selon son format
-        if extension == '.ods':
-            df = pd.read_excel(fichier_path, engine='odf', header=None, usecols=[0, 1])
-        elif extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(fichier_path, header=None, usecols=[0, 1])
-        else:
-            print(f"❌ Format de fichier non supporté : {extension}")
+        # Format détecté d'après le contenu ; seules les colonnes A et B sont lues
+        try:
+            lignes = list(iterer_lignes(fichier_path, colonnes=[0, 1], entete=False))
+        except ErreurFormat as e:
+            print(f"❌ Format de fichier non supporté : {e}")
             print(f"   Formats acceptés : .xlsx, .xls, .ods")
             return None
+        df = pd.DataFrame(lignes, columns=[0, 1])
         
         df.columns = ['anonymat', 'email']
         
         # Supprimer les lignes avec des valeurs manquantes
         df = df.dropna()
         
+        # Les numéros lus en flottant (colonne avec cellules vides) sont ramenés en entiers
+        if pd.api.types.is_float_dtype(df['anonymat']) and (df['anonymat'] % 1 == 0).all():
+            df['anonymat'] = df['anonymat'].astype('int64')
+        
         # Nettoyer les données (supprimer les espaces)
         df['anonymat'] = df['anonymat'].astype(str).str.strip()
         df['email'] = df['email'].astype(str).str.strip()
@@ -36,14 +74,295 @@ def lire_fichier_emails(fichier_path):
         return df
     except Exception as e:
         print(f"❌ Erreur lors de la lecture du fichier : {e}")
-        if 'odf' in str(e).lower():
-            print("💡 Conseil : Installez le module odfpy avec : pip install odfpy")
         return None
 
-def creer_csv_moodle(df_emails, fichier_sortie, cohort_id=None):
+def valider_utilisateurs(df_emails, fichier_rejets=None):
+    """
+    Valide les utilisateurs avant l'export, par opérations vectorisées sur les colonnes :
+    syntaxe de l'email, caractères et longueur du username, unicité des usernames et des emails.
+    Les doublons exacts (même username et même email) ne sont gardés qu'une fois ; un username
+    associé à plusieurs emails (ou l'inverse) est ambigu et toutes ses lignes sont rejetées.
+    Retourne (df_valides, df_rejets) et écrit les rejets avec leurs raisons si fichier_rejets est fourni
+    """
+    import numpy as np
+    import pandas as pd
+    
+    df = df_emails.copy()
+    
+    # Moodle n'accepte que des usernames en minuscules
+    df['anonymat'] = df['anonymat'].str.lower()
+    email_normalise = df['email'].str.lower()
+    
+    username_invalide = ~df['anonymat'].str.fullmatch(MOTIF_USERNAME)
+    username_trop_long = df['anonymat'].str.len() > LONGUEUR_MAX_USERNAME
+    email_invalide = ~df['email'].str.fullmatch(MOTIF_EMAIL)
+    email_trop_long = df['email'].str.len() > LONGUEUR_MAX_EMAIL
+    
+    # Index de hachage (duplicated) : doublons exacts, puis conflits entre lignes restantes
+    doublon_exact = pd.DataFrame({'u': df['anonymat'], 'e': email_normalise}).duplicated(keep='first')
+    username_conflit = df['anonymat'].where(~doublon_exact).duplicated(keep=False) & ~doublon_exact
+    email_conflit = email_normalise.where(~doublon_exact).duplicated(keep=False) & ~doublon_exact
+    
+    regles = [
+        (username_invalide, "username avec caractères non autorisés"),
+        (username_trop_long, f"username de plus de {LONGUEUR_MAX_USERNAME} caractères"),
+        (email_invalide, "email invalide"),
+        (email_trop_long, f"email de plus de {LONGUEUR_MAX_EMAIL} caractères"),
+        (doublon_exact, "doublon exact d'une ligne précédente"),
+        (username_conflit, "username associé à plusieurs emails"),
+        (email_conflit, "email associé à plusieurs usernames"),
+    ]
+    
+    raisons = np.full(len(df), '', dtype=object)
+    for masque, raison in regles:
+        masque = masque.to_numpy()
+        raisons[masque] = raisons[masque] + '; ' + raison
+    rejet = raisons != ''
+    
+    df_valides = df[~rejet]
+    df_rejets = pd.DataFrame({
+        'ligne': df.index[rejet] + 1,
+        'anonymat': df_emails['anonymat'][rejet],
+        'email': df_emails['email'][rejet],
+        'raisons': [raison[2:] for raison in raisons[rejet]],
+    })
+    
+    print(f"✓ Validation : {len(df_valides)} utilisateur(s) valide(s), {len(df_rejets)} rejet(s)")
+    if not df_rejets.empty:
+        for raison, nombre in pd.Series([r for raisons_ligne in df_rejets['raisons']
+                                         for r in raisons_ligne.split('; ')]).value_counts().items():
+            print(f"   ⚠️  {nombre} × {raison}")
+        if fichier_rejets:
+            df_rejets.to_csv(fichier_rejets, index=False, encoding='utf-8')
+            print(f"   📄 Rejets détaillés : {fichier_rejets}")
+    
+    return df_valides, df_rejets
+
+def calculer_empreintes(df_emails, cohort_id=None):
+    """
+    Calcule l'empreinte de chaque utilisateur exporté : hachage court (BLAKE2b, 8 octets)
+    de son email et de sa cohorte.
+    Retourne une Series {username: empreinte hexadécimale}
+    """
+    import pandas as pd
+    
+    cohorte = cohort_id or ''
+    empreintes = [
+        hashlib.blake2b(f"{email}\x1f{cohorte}".encode('utf-8'), digest_size=8).hexdigest()
+        for email in df_emails['email']
+    ]
+    return pd.Series(empreintes, index=df_emails['anonymat'].to_numpy(), dtype=object)
+
+def charger_etat(fichier_etat):
+    """
+    Charge l'état du dernier export ({username: empreinte}).
+    Retourne une Series vide si aucun export n'a encore été fait.
+    Lève ValueError si le fichier est tronqué ou n'est pas un état d'export.
+    """
+    import pandas as pd
+    
+    if not os.path.exists(fichier_etat):
+        return pd.Series(dtype=object)
+    
+    try:
+        with open(fichier_etat, encoding='utf-8') as f:
+            etat = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"fichier d'état illisible : {fichier_etat} ({e})") from e
+    if not isinstance(etat, dict) or not isinstance(etat.get('empreintes'), dict):
+        raise ValueError(f"fichier d'état invalide (pas d'empreintes) : {fichier_etat}")
+    return pd.Series(etat['empreintes'], dtype=object)
+
+def enregistrer_etat(fichier_etat, empreintes):
+    """
+    Enregistre l'état de l'export courant (écriture dans un fichier temporaire puis renommage)
+    """
+    etat = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'empreintes': empreintes.to_dict(),
+    }
+    fichier_temp = f"{fichier_etat}.tmp"
+    with open(fichier_temp, 'w', encoding='utf-8') as f:
+        json.dump(etat, f, ensure_ascii=False)
+    os.replace(fichier_temp, fichier_etat)
+
+def filtrer_delta(df_emails, empreintes, etat_precedent):
+    """
+    Compare l'export courant au dernier export enregistré.
+    Retourne (df_delta, supprimes) où df_delta ne contient que les utilisateurs ajoutés
+    ou modifiés, et supprimes la liste des usernames absents de l'export courant
+    """
+    import pandas as pd
+    
+    anciennes = pd.Series(empreintes.index, dtype=object).map(etat_precedent).to_numpy()
+    ajoutes = pd.isna(anciennes)
+    modifies = ~ajoutes & (anciennes != empreintes.to_numpy())
+    supprimes = etat_precedent.index.difference(empreintes.index).tolist()
+    
+    print(f"✓ Comparaison avec le dernier export ({len(etat_precedent)} utilisateurs) :")
+    print(f"   ➕ {int(ajoutes.sum())} ajouté(s)")
+    print(f"   ✏️  {int(modifies.sum())} modifié(s)")
+    print(f"   ➖ {len(supprimes)} supprimé(s)")
+    print(f"   = {len(df_emails) - int(ajoutes.sum()) - int(modifies.sum())} inchangé(s), non exporté(s)")
+    
+    return df_emails[ajoutes | modifies], supprimes
+
+def entier_positif(texte):
+    """
+    Convertit un argument en entier strictement positif (type argparse)
+    """
+    try:
+        valeur = int(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"nombre entier attendu : {texte}")
+    if valeur <= 0:
+        raise argparse.ArgumentTypeError(f"nombre strictement positif attendu : {texte}")
+    return valeur
+
+def lire_taille(texte):
+    """
+    Convertit une taille lisible (ex. 500K, 2M, 1G ou un nombre d'octets) en octets,
+    strictement positive
+    """
+    texte = str(texte).strip().upper().rstrip('O').rstrip('B')
+    multiplicateurs = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    try:
+        if texte and texte[-1] in multiplicateurs:
+            taille = int(float(texte[:-1]) * multiplicateurs[texte[-1]])
+        else:
+            taille = int(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"taille invalide : {texte}")
+    if taille <= 0:
+        raise argparse.ArgumentTypeError(f"taille strictement positive attendue : {texte}")
+    return taille
+
+def _decouper_en_parties(tailles, taille_entete, lignes_max=None, octets_max=None):
+    """
+    Répartit les lignes en parties consécutives respectant le nombre de lignes et le budget
+    d'octets (en-tête compris). Une ligne dépassant seule le budget forme sa propre partie.
+    Retourne la liste des bornes (debut, fin)
+    """
+    bornes = []
+    debut = 0
+    octets = taille_entete
+    for i, taille in enumerate(tailles):
+        nb_lignes = i - debut
+        depasse_lignes = lignes_max is not None and nb_lignes >= lignes_max
+        depasse_octets = octets_max is not None and nb_lignes > 0 and octets + taille > octets_max
+        if depasse_lignes or depasse_octets:
+            bornes.append((debut, i))
+            debut = i
+            octets = taille_entete
+        octets += taille
+    if debut < len(tailles):
+        bornes.append((debut, len(tailles)))
+    return bornes
+
+def ecrire_csv_par_parties(df_moodle, fichier_sortie, lignes_max=None, octets_max=None, nb_threads=4,
+                           prive=False):
+    """
+    Écrit le CSV Moodle en plusieurs parties numérotées (sortie_partie01.csv, ...) limitées
+    en nombre de lignes et/ou en octets. Chaque partie répète l'en-tête (colonne cohort1
+    comprise) ; les parties sont écrites en parallèle, puis un manifeste sortie_parties.csv
+    liste les fichiers avec leur nombre de lignes.
+    Si prive est vrai (mots de passe en clair), les parties sont réservées à leur propriétaire.
+    Retourne la liste des parties [(fichier, lignes, octets), ...]
+    """
+    import pandas as pd
+    
+    # Rendu CSV de chaque ligne, pour connaître sa taille exacte en octets
+    tampon = io.StringIO()
+    writer = csv.writer(tampon, lineterminator='\n')
+    writer.writerow(df_moodle.columns)
+    entete = tampon.getvalue().encode('utf-8')
+    lignes = []
+    for ligne in df_moodle.itertuples(index=False, name=None):
+        tampon.seek(0)
+        tampon.truncate()
+        writer.writerow(ligne)
+        lignes.append(tampon.getvalue().encode('utf-8'))
+    
+    bornes = _decouper_en_parties([len(ligne) for ligne in lignes], len(entete), lignes_max, octets_max)
+    chemin = Path(fichier_sortie)
+    largeur = max(2, len(str(len(bornes))))
+    fichiers = [
+        str(chemin.with_name(f"{chemin.stem}_partie{numero:0{largeur}d}{chemin.suffix}"))
+        for numero in range(1, len(bornes) + 1)
+    ]
+    
+    def ecrire_partie(fichier, debut, fin):
+        contenu = entete + b''.join(lignes[debut:fin])
+        with (_ouvrir_prive(fichier, 'wb') if prive else open(fichier, 'wb')) as f:
+            f.write(contenu)
+        return fichier, fin - debut, len(contenu)
+    
+    with ThreadPoolExecutor(max_workers=nb_threads) as executor:
+        parties = list(executor.map(lambda args: ecrire_partie(*args),
+                                    [(fichier, debut, fin) for fichier, (debut, fin) in zip(fichiers, bornes)]))
+    
+    manifeste = chemin.with_name(f"{chemin.stem}_parties.csv")
+    pd.DataFrame(parties, columns=['fichier', 'lignes', 'octets']).to_csv(manifeste, index=False, encoding='utf-8')
+    
+    for fichier, nb_lignes, octets in parties:
+        print(f"   📄 {fichier} : {nb_lignes} utilisateurs ({octets / 1024:.1f} Ko)")
+    print(f"✓ Manifeste des parties : {manifeste}")
+    
+    # Les parties d'un export précédent plus long ne figurent pas au manifeste : on les supprime
+    motif = re.compile(rf"{re.escape(chemin.stem)}_partie\d+{re.escape(chemin.suffix)}")
+    noms = {Path(fichier).name for fichier in fichiers}
+    for ancienne in sorted(chemin.parent.iterdir()):
+        if motif.fullmatch(ancienne.name) and ancienne.name not in noms:
+            ancienne.unlink()
+            print(f"   🗑 Partie obsolète supprimée : {ancienne}")
+    
+    return parties
+
+def generer_mot_de_passe(longueur=LONGUEUR_MOT_DE_PASSE):
+    """
+    Génère un mot de passe aléatoire respectant la politique par défaut de Moodle
+    (au moins une minuscule, une majuscule, un chiffre et un caractère spécial)
+    """
+    classes = [string.ascii_lowercase, string.ascii_uppercase, string.digits, CARACTERES_SPECIAUX]
+    tous = ''.join(classes)
+    caracteres = [secrets.choice(classe) for classe in classes]
+    caracteres += [secrets.choice(tous) for _ in range(longueur - len(classes))]
+    secrets.SystemRandom().shuffle(caracteres)
+    return ''.join(caracteres)
+
+def _ouvrir_prive(fichier, mode='w', **options):
+    """
+    Ouvre un fichier en écriture lisible uniquement par son propriétaire (droits 600),
+    pour les fichiers contenant des mots de passe en clair
+    """
+    descripteur = os.open(fichier, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, stat.S_IRUSR | stat.S_IWUSR)
+    # Un fichier déjà existant garde ses droits à l'ouverture : les restreindre explicitement
+    os.chmod(fichier, stat.S_IRUSR | stat.S_IWUSR)
+    return open(descripteur, mode, **options)
+
+def ecrire_identifiants(fichier_identifiants, usernames, emails, mots_de_passe):
+    """
+    Écrit les identifiants en clair (username, email, password) dans un fichier CSV
+    lisible uniquement par son propriétaire (droits 600)
+    """
+    with _ouvrir_prive(fichier_identifiants, encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['username', 'email', 'password'])
+        writer.writerows(zip(usernames, emails, mots_de_passe))
+
+def creer_csv_moodle(df_emails, fichier_sortie, cohort_id=None, lignes_max=None, octets_max=None,
+                     fichier_identifiants=None):
     """
     Crée le fichier CSV au format Moodle avec tous les utilisateurs
+    Si lignes_max ou octets_max est fourni, le CSV est découpé en parties (voir ecrire_csv_par_parties)
+    Si fichier_identifiants est fourni, chaque utilisateur reçoit un mot de passe aléatoire,
+    écrit en clair dans la colonne password (auth=manual) : l'outil « Importer des utilisateurs »
+    de Moodle hache lui-même cette colonne et n'accepte pas de haché tout fait. Le CSV est alors
+    réservé à son propriétaire (droits 600), et les identifiants ne sont écrits dans
+    fichier_identifiants qu'une fois le CSV écrit
     """
+    import pandas as pd
+    
     if df_emails.empty:
         print("⚠️  Aucune donnée trouvée dans le fichier !")
         return False
@@ -57,6 +376,13 @@ def creer_csv_moodle(df_emails, fichier_sortie, cohort_id=None):
         'lastname': df_emails['anonymat']
     }
     
+    mots_de_passe = None
+    if fichier_identifiants:
+        mots_de_passe = [generer_mot_de_passe() for _ in range(len(df_emails))]
+        moodle_data['auth'] = 'manual'
+        moodle_data['password'] = mots_de_passe
+        print(f"✓ {len(mots_de_passe)} mots de passe générés")
+    
     # Ajouter la colonne cohorte si spécifiée
     if cohort_id:
         moodle_data['cohort1'] = cohort_id
@@ -66,46 +392,488 @@ def creer_csv_moodle(df_emails, fichier_sortie, cohort_id=None):
     
     # Sauvegarder en CSV
     try:
-        df_moodle.to_csv(fichier_sortie, index=False, encoding='utf-8')
-        print(f"✓ Fichier CSV créé : {fichier_sortie}")
+        if lignes_max or octets_max:
+            parties = ecrire_csv_par_parties(df_moodle, fichier_sortie, lignes_max, octets_max,
+                                             prive=bool(fichier_identifiants))
+            print(f"✓ Fichier CSV découpé en {len(parties)} partie(s)")
+        elif fichier_identifiants:
+            with _ouvrir_prive(fichier_sortie, encoding='utf-8', newline='') as f:
+                df_moodle.to_csv(f, index=False)
+            print(f"✓ Fichier CSV créé : {fichier_sortie} (accès réservé au propriétaire)")
+        else:
+            df_moodle.to_csv(fichier_sortie, index=False, encoding='utf-8')
+            print(f"✓ Fichier CSV créé : {fichier_sortie}")
         print(f"✓ {len(df_moodle)} utilisateurs exportés")
         
         if cohort_id:
             print(f"✓ Tous les utilisateurs seront assignés à la cohorte : {cohort_id}")
+        
+        # Les identifiants ne sont écrits qu'une fois le CSV créé
+        if fichier_identifiants:
+            ecrire_identifiants(fichier_identifiants, df_emails['anonymat'], df_emails['email'], mots_de_passe)
+            print(f"✓ Identifiants en clair : {fichier_identifiants} (accès réservé au propriétaire)")
             
         return True
     except Exception as e:
         print(f"❌ Erreur lors de la création du fichier CSV : {e}")
         return False
 
-def main():
+def _normaliser_cellule(valeur):
+    """
+    Convertit une cellule brute en texte nettoyé ('' pour une cellule vide).
+    Les nombres entiers stockés en flottant (1234.0) sont ramenés à leur forme entière.
+    """
+    if valeur is None:
+        return ''
+    if isinstance(valeur, float):
+        if valeur != valeur:  # NaN
+            return ''
+        if valeur.is_integer():
+            return str(int(valeur))
+    return str(valeur).strip()
+
+def iterer_lignes_roster(fichier_path):
+    """
+    Génère les couples bruts (anonymat, email) des colonnes A et B, ligne par ligne.
+    Le classeur est parcouru en flux par lecture_tableaux, sans charger la feuille en mémoire.
+    """
+    yield from iterer_lignes(fichier_path, colonnes=[0, 1], entete=False)
+
+def convertir_en_flux(fichier_input, fichier_sortie, cohort_id=None, taille_tampon=TAILLE_TAMPON_FLUX):
+    """
+    Convertit le fichier en CSV Moodle ligne par ligne, sans construire de DataFrame.
+    La mémoire utilisée est bornée par le tampon d'écriture, quelle que soit la taille du fichier.
+    """
+    entete = COLONNES_MOODLE + (['cohort1'] if cohort_id else [])
+    nb_utilisateurs = 0
+    nb_ignorees = 0
+    debut = time.perf_counter()
+    
+    if cohort_id:
+        print(f"✓ Cohorte configurée : {cohort_id}")
+    
+    try:
+        with open(fichier_sortie, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(entete)
+            
+            tampon = []
+            for anonymat, email in iterer_lignes_roster(fichier_input):
+                anonymat = _normaliser_cellule(anonymat)
+                email = _normaliser_cellule(email)
+                
+                # Ignorer les lignes incomplètes
+                if not anonymat or not email:
+                    nb_ignorees += 1
+                    continue
+                
+                ligne = [anonymat, email, 'email', 'Etudiant', anonymat]
+                if cohort_id:
+                    ligne.append(cohort_id)
+                tampon.append(ligne)
+                
+                if len(tampon) >= taille_tampon:
+                    writer.writerows(tampon)
+                    nb_utilisateurs += len(tampon)
+                    tampon.clear()
+            
+            writer.writerows(tampon)
+            nb_utilisateurs += len(tampon)
+    except Exception as e:
+        print(f"❌ Erreur lors de la conversion en flux : {e}")
+        return False
+    
+    duree = time.perf_counter() - debut
+    debit = nb_utilisateurs / duree if duree > 0 else 0
+    
+    if nb_utilisateurs == 0:
+        print("⚠️  Aucune donnée trouvée dans le fichier !")
+        return False
+    
+    print(f"✓ Fichier CSV créé : {fichier_sortie}")
+    print(f"✓ {nb_utilisateurs} utilisateurs exportés en {duree:.2f} s ({debit:,.0f} lignes/s)")
+    if nb_ignorees:
+        print(f"⚠️  {nb_ignorees} ligne(s) incomplète(s) ignorée(s)")
+    if cohort_id:
+        print(f"✓ Tous les utilisateurs seront assignés à la cohorte : {cohort_id}")
+    
+    return True
+
+def lire_manifeste(fichier_manifeste, sortie_par_defaut):
+    """
+    Lit un manifeste de conversion par lot (séparateur ;), une ligne par fichier :
+        fichier_entrée;cohorte_id[;sortie.csv]
+    La cohorte et la sortie sont optionnelles. Les chemins relatifs du manifeste (entrée
+    et sortie) sont résolus par rapport à son dossier ; sortie_par_defaut, donnée en ligne
+    de commande, reste relative au dossier courant. Les lignes vides ou commençant par #
+    sont ignorées.
+    Retourne la liste des entrées {'fichier', 'cohorte', 'sortie'}
+    """
+    dossier = Path(fichier_manifeste).parent
+    entrees = []
+    
+    with open(fichier_manifeste, encoding='utf-8', newline='') as f:
+        for numero_ligne, champs in enumerate(csv.reader(f, delimiter=';'), 1):
+            champs = [champ.strip() for champ in champs]
+            if not champs or not champs[0] or champs[0].startswith('#'):
+                continue
+            # En-tête facultatif
+            if numero_ligne == 1 and champs[0].lower() in ['fichier', 'fichier_entrée', 'fichier_entree']:
+                continue
+            
+            fichier = dossier / champs[0]
+            cohorte = champs[1] if len(champs) > 1 and champs[1] else None
+            sortie = str(dossier / champs[2]) if len(champs) > 2 and champs[2] else sortie_par_defaut
+            entrees.append({'fichier': str(fichier), 'cohorte': cohorte, 'sortie': sortie})
+    
+    return entrees
+
+def _lire_roster(fichier_path):
+    """
+    Lit un fichier complet dans un processus de travail (voir convertir_lot).
+    Retourne (lignes, nb_ignorees, duree, erreur) où lignes = [(anonymat, email), ...]
+    """
+    debut = time.perf_counter()
+    lignes = []
+    nb_ignorees = 0
+    
+    try:
+        for anonymat, email in iterer_lignes_roster(fichier_path):
+            anonymat = _normaliser_cellule(anonymat)
+            email = _normaliser_cellule(email)
+            if not anonymat or not email:
+                nb_ignorees += 1
+                continue
+            lignes.append((anonymat, email))
+    except Exception as e:
+        return [], nb_ignorees, time.perf_counter() - debut, str(e)
+    
+    return lignes, nb_ignorees, time.perf_counter() - debut, None
+
+def convertir_lot(entrees, nb_processus=None, valider=True):
+    """
+    Convertit plusieurs fichiers en un ou plusieurs CSV Moodle.
+    Les fichiers sont lus en parallèle dans des processus séparés, puis validés un à un
+    comme en mode fichier unique (valider_utilisateurs, usernames en minuscules ; rejets
+    dans <fichier>_rejets.csv à côté de sa sortie) et fusionnés dans l'ordre du manifeste
+    avec dédoublonnage global : un username ou un email déjà exporté (quel que soit le
+    fichier) n'est pas répété.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import pandas as pd
+    
+    debut = time.perf_counter()
+    fichiers = [entree['fichier'] for entree in entrees]
+    nb_processus = min(nb_processus or os.cpu_count() or 1, len(fichiers))
+    
+    print(f"⚙️  Lecture de {len(fichiers)} fichier(s) sur {nb_processus} processus")
+    
+    usernames_vus = set()
+    emails_vus = set()
+    lignes_par_sortie = {}
+    avec_cohorte = set()
+    bilan = []
+    echecs = 0
+    
+    with ProcessPoolExecutor(max_workers=nb_processus) as executor:
+        # map conserve l'ordre du manifeste, qui détermine la priorité en cas de doublon
+        for entree, (lignes, nb_ignorees, duree, erreur) in zip(entrees, executor.map(_lire_roster, fichiers)):
+            nom = Path(entree['fichier']).name
+            if erreur:
+                print(f"❌ {nom} : {erreur}")
+                echecs += 1
+                continue
+            
+            nb_rejets = 0
+            if valider:
+                print(f"🔎 {nom}")
+                fichier_rejets = Path(entree['sortie']).with_name(f"{Path(entree['fichier']).stem}_rejets.csv")
+                df_valides, df_rejets = valider_utilisateurs(pd.DataFrame(lignes, columns=['anonymat', 'email']),
+                                                             fichier_rejets)
+                lignes = list(df_valides.itertuples(index=False, name=None))
+                nb_rejets = len(df_rejets)
+            
+            retenues = lignes_par_sortie.setdefault(entree['sortie'], [])
+            if entree['cohorte']:
+                avec_cohorte.add(entree['sortie'])
+            
+            nb_doublons = 0
+            for anonymat, email in lignes:
+                cle_email = email.lower()
+                if anonymat in usernames_vus or cle_email in emails_vus:
+                    nb_doublons += 1
+                    continue
+                usernames_vus.add(anonymat)
+                emails_vus.add(cle_email)
+                retenues.append((anonymat, email, entree['cohorte'] or ''))
+            
+            bilan.append((nom, len(lignes) + nb_rejets, nb_rejets, nb_doublons, nb_ignorees, duree))
+    
+    if echecs:
+        print(f"❌ {echecs} fichier(s) illisible(s), aucun fichier CSV créé")
+        return False
+    
+    print(f"\n{'Fichier':<30} {'Lignes':>8} {'Rejets':>8} {'Doublons':>9} {'Ignorées':>9} {'Durée':>8}")
+    for nom, nb_lignes, nb_rejets, nb_doublons, nb_ignorees, duree in bilan:
+        print(f"{nom[:30]:<30} {nb_lignes:>8} {nb_rejets:>8} {nb_doublons:>9} {nb_ignorees:>9} {duree:>7.2f}s")
+    print()
+    
+    for sortie, lignes in lignes_par_sortie.items():
+        entete = COLONNES_MOODLE + (['cohort1'] if sortie in avec_cohorte else [])
+        try:
+            with open(sortie, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(entete)
+                for anonymat, email, cohorte in lignes:
+                    ligne = [anonymat, email, 'email', 'Etudiant', anonymat]
+                    if sortie in avec_cohorte:
+                        ligne.append(cohorte)
+                    writer.writerow(ligne)
+        except Exception as e:
+            print(f"❌ Erreur lors de la création du fichier CSV {sortie} : {e}")
+            return False
+        print(f"✓ Fichier CSV créé : {sortie} ({len(lignes)} utilisateurs)")
+    
+    duree = time.perf_counter() - debut
+    total = sum(len(lignes) for lignes in lignes_par_sortie.values())
+    print(f"✓ {total} utilisateurs exportés au total en {duree:.2f} s")
+    return True
+
+def _envoyer_creation(client, lot):
+    """
+    Envoie la création d'un lot d'utilisateurs. Si la réponse est perdue, la création a pu
+    aboutir : les comptes qui existent déjà sont retirés du lot avant de le renvoyer.
+    Lève ErreurTransport si Moodle reste injoignable
+    """
+    from client_moodle import ErreurTransport
+    
+    for verification in range(VERIFICATIONS_CREATION + 1):
+        try:
+            client.appeler('core_user_create_users', idempotent=False, users=lot)
+            return
+        except ErreurTransport as e:
+            if not e.envoyee or verification == VERIFICATIONS_CREATION:
+                raise
+        existants = client.appeler('core_user_get_users_by_field', field='username',
+                                   values=[utilisateur['username'] for utilisateur in lot])
+        deja_crees = {utilisateur['username'] for utilisateur in existants or []}
+        lot = [utilisateur for utilisateur in lot if utilisateur['username'] not in deja_crees]
+        if not lot:
+            return
+
+def _creer_utilisateurs(client, lot, echecs):
+    """
+    Crée un lot d'utilisateurs en un appel. Moodle rejetant tout le lot si un seul utilisateur
+    est refusé, le lot est alors coupé en deux jusqu'à isoler les utilisateurs fautifs ; une
+    erreur de transport (ErreurTransport) n'est pas un refus et interrompt le lot.
+    Retourne le nombre d'utilisateurs créés ; les refus sont ajoutés à echecs
+    """
+    from client_moodle import ErreurMoodle, ErreurTransport
+    
+    try:
+        _envoyer_creation(client, lot)
+        return len(lot)
+    except ErreurTransport:
+        raise
+    except ErreurMoodle as e:
+        if len(lot) == 1:
+            echecs.append((lot[0]['username'], str(e)))
+            return 0
+        milieu = len(lot) // 2
+        return _creer_utilisateurs(client, lot[:milieu], echecs) + _creer_utilisateurs(client, lot[milieu:], echecs)
+
+def provisionner_utilisateurs(df_emails, client, cohort_id=None, taille_lot=TAILLE_LOT_WS, nb_requetes=NB_REQUETES_WS):
+    """
+    Crée les utilisateurs directement dans Moodle par le service web (core_user_create_users),
+    puis les inscrit dans la cohorte (core_cohort_add_cohort_members), par lots de taille_lot
+    utilisateurs avec au plus nb_requetes appels simultanés.
+    Retourne True si tous les utilisateurs ont été créés
+    """
+    from client_moodle import ErreurMoodle, ErreurTransport
+    
+    if df_emails.empty:
+        print("⚠️  Aucune donnée trouvée dans le fichier !")
+        return False
+    
+    utilisateurs = [
+        {'username': anonymat, 'email': email, 'auth': 'email', 'firstname': 'Etudiant',
+         'lastname': anonymat, 'createpassword': 1}
+        for anonymat, email in zip(df_emails['anonymat'], df_emails['email'])
+    ]
+    lots = [utilisateurs[i:i + taille_lot] for i in range(0, len(utilisateurs), taille_lot)]
+    echecs = []
+    non_traites = []
+    debut = time.perf_counter()
+    
+    def creer_lot(lot):
+        try:
+            return _creer_utilisateurs(client, lot, echecs)
+        except ErreurTransport as e:
+            # Création incertaine : ni refus, ni inscription dans la cohorte
+            non_traites.extend((utilisateur['username'], str(e)) for utilisateur in lot)
+            return 0
+    
+    print(f"⚙️  {len(utilisateurs)} utilisateurs en {len(lots)} lot(s), {nb_requetes} requête(s) simultanée(s)")
+    with ThreadPoolExecutor(max_workers=nb_requetes) as executor:
+        nb_crees = sum(executor.map(creer_lot, lots))
+    print(f"✓ {nb_crees} utilisateur(s) créé(s) en {time.perf_counter() - debut:.2f} s")
+    
+    if cohort_id and nb_crees:
+        refuses = {username for username, _ in echecs + non_traites}
+        membres = [
+            {'cohorttype': {'type': 'idnumber', 'value': cohort_id},
+             'usertype': {'type': 'username', 'value': utilisateur['username']}}
+            for utilisateur in utilisateurs if utilisateur['username'] not in refuses
+        ]
+        lots_membres = [membres[i:i + taille_lot] for i in range(0, len(membres), taille_lot)]
+        
+        def ajouter_membres(lot):
+            resultat = client.appeler('core_cohort_add_cohort_members', members=lot)
+            return len(lot) - len((resultat or {}).get('warnings', []))
+        
+        try:
+            with ThreadPoolExecutor(max_workers=nb_requetes) as executor:
+                nb_membres = sum(executor.map(ajouter_membres, lots_membres))
+        except ErreurMoodle as e:
+            print(f"❌ Erreur lors de l'inscription dans la cohorte {cohort_id} : {e}")
+            return False
+        print(f"✓ {nb_membres} utilisateur(s) inscrit(s) dans la cohorte : {cohort_id}")
+    
+    if echecs:
+        print(f"⚠️  {len(echecs)} utilisateur(s) refusé(s) par Moodle :")
+        for username, raison in echecs[:20]:
+            print(f"   • {username} : {raison}")
+        if len(echecs) > 20:
+            print(f"   … et {len(echecs) - 20} autre(s)")
+    
+    if non_traites:
+        print(f"❌ {len(non_traites)} utilisateur(s) non traité(s), Moodle injoignable : {non_traites[0][1]}")
+        print("   Relancez l'import une fois Moodle disponible : les comptes déjà créés seront refusés comme doublons.")
+    
+    return not echecs and not non_traites
+
+def main(argv=None, prog=None):
     """
     Fonction principale
     """
     print("🔄 Conversion fichier vers CSV Moodle")
     print("=" * 50)
     
-    # Vérifier les arguments
-    if len(sys.argv) < 3 or len(sys.argv) > 4:
-        print("Usage: python script.py <fichier_entrée> <sortie.csv> [cohorte_id]")
-        print("\nExemple:")
-        print("python script.py emails.xlsx moodle_import.csv")
-        print("python script.py emails.ods moodle_import.csv")
-        print("python script.py emails.xlsx moodle_import.csv year2024")
-        print("\nOù :")
-        print("- fichier_entrée : fichier .xlsx, .xls ou .ods avec anonymats (col A) et emails (col B)")
-        print("- sortie.csv : fichier CSV de sortie pour Moodle")
-        print("- cohorte_id (optionnel) : ID de la cohorte où assigner les utilisateurs")
-        print("\n📌 Note importante :")
-        print("- TOUS les utilisateurs du fichier seront importés")
-        print("- La cohorte doit déjà exister dans Moodle")
-        print("- Utilisez l'ID de la cohorte, pas son nom complet")
-        print("- L'ID de cohorte correspond au 'shortname' dans Moodle")
-        print("\n📦 Pour les fichiers .ods, installez : pip install odfpy")
+    parser = argparse.ArgumentParser(
+        prog=prog or "python import_user_moodle.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Exemple:
+  python import_user_moodle.py emails.xlsx moodle_import.csv
+  python import_user_moodle.py emails.ods moodle_import.csv
+  python import_user_moodle.py emails.xlsx moodle_import.csv year2024
+  python import_user_moodle.py --flux inscriptions.xlsx moodle_import.csv year2024
+  python import_user_moodle.py --lot manifeste.csv --sortie moodle_import.csv
+  MOODLE_TOKEN=... python import_user_moodle.py emails.xlsx - year2024 --pousser https://moodle.exemple.fr
+
+📄 Manifeste (--lot) : une ligne par fichier, séparateur ;
+  las1.xlsx;cohorte_las1
+  las2.ods;cohorte_las2;moodle_las2.csv
+
+📌 Note importante :
+- TOUS les utilisateurs du fichier seront importés
+- La cohorte doit déjà exister dans Moodle
+- Utilisez l'ID de la cohorte, pas son nom complet
+- L'ID de cohorte correspond au 'shortname' dans Moodle
+- Avec --pousser, sortie.csv est ignoré (utilisez -) et le jeton du service web est lu
+  dans la variable MOODLE_TOKEN (fonctions core_user_create_users et core_cohort_add_cohort_members)"""
+    )
+    parser.add_argument('fichier_entree', metavar='fichier_entrée', nargs='?',
+                        help="fichier .xlsx, .xls ou .ods avec anonymats (col A) et emails (col B)")
+    parser.add_argument('fichier_sortie', metavar='sortie.csv', nargs='?', help="fichier CSV de sortie pour Moodle")
+    parser.add_argument('cohort_id', metavar='cohorte_id', nargs='?',
+                        help="ID de la cohorte où assigner les utilisateurs (optionnel)")
+    parser.add_argument('--flux', action='store_true',
+                        help="conversion en flux à mémoire constante, pour les très gros fichiers")
+    parser.add_argument('--rejets', metavar='FICHIER',
+                        help="fichier CSV des lignes rejetées par la validation (défaut : <sortie>_rejets.csv)")
+    parser.add_argument('--sans-validation', action='store_true',
+                        help="exporter toutes les lignes sans validation ni dédoublonnage "
+                             "(en mode --lot, le dédoublonnage entre fichiers reste appliqué)")
+    parser.add_argument('--delta', metavar='ETAT',
+                        help="n'exporter que les utilisateurs ajoutés ou modifiés depuis l'export enregistré dans ETAT (JSON)")
+    parser.add_argument('--supprimes', metavar='FICHIER',
+                        help="avec --delta, écrire les usernames disparus depuis le dernier export")
+    parser.add_argument('--lignes-max', type=entier_positif, metavar='N',
+                        help="découper le CSV en parties d'au plus N utilisateurs")
+    parser.add_argument('--taille-max', type=lire_taille, metavar='TAILLE',
+                        help="découper le CSV en parties d'au plus TAILLE octets (ex. 2M, 500K)")
+    parser.add_argument('--pousser', metavar='URL',
+                        help="créer les utilisateurs directement dans Moodle par le service web au lieu d'écrire un CSV")
+    parser.add_argument('--taille-lot', type=entier_positif, default=TAILLE_LOT_WS, metavar='N',
+                        help=f"avec --pousser, utilisateurs par appel (défaut : {TAILLE_LOT_WS})")
+    parser.add_argument('--requetes', type=entier_positif, default=NB_REQUETES_WS, metavar='N',
+                        help=f"avec --pousser, appels simultanés (défaut : {NB_REQUETES_WS})")
+    parser.add_argument('--mots-de-passe', metavar='IDENTIFIANTS',
+                        help="générer un mot de passe par utilisateur, en clair dans le CSV (haché par Moodle "
+                             "à l'import) et dans IDENTIFIANTS ; ces fichiers sont en droits 600")
+    parser.add_argument('--lot', metavar='MANIFESTE',
+                        help="conversion par lot : manifeste listant les fichiers et leurs cohortes")
+    parser.add_argument('--sortie', default='moodle_import.csv',
+                        help="fichier CSV par défaut du mode --lot (défaut : moodle_import.csv)")
+    parser.add_argument('--processus', type=entier_positif, default=None,
+                        help="nombre de processus de lecture du mode --lot (défaut : nombre de cœurs)")
+    mesures.ajouter_options(parser)
+    args = parser.parse_args(argv)
+    mesures.activer_depuis_options(args, 'import_user_moodle')
+    
+    if args.lot:
+        if args.fichier_entree:
+            parser.error("le mode --lot ne prend pas de fichier d'entrée en argument")
+        # Options propres à la conversion d'un seul fichier
+        options_fichier_unique = {
+            '--flux': args.flux, '--rejets': args.rejets,
+            '--delta': args.delta, '--supprimes': args.supprimes, '--lignes-max': args.lignes_max,
+            '--taille-max': args.taille_max, '--pousser': args.pousser, '--mots-de-passe': args.mots_de_passe,
+        }
+        incompatibles = [option for option, valeur in options_fichier_unique.items() if valeur]
+        if incompatibles:
+            parser.error(f"le mode --lot ne peut pas être combiné avec {', '.join(incompatibles)}")
+        if not os.path.exists(args.lot):
+            print(f"❌ Manifeste non trouvé : {args.lot}")
+            return
+        
+        entrees = lire_manifeste(args.lot, args.sortie)
+        manquants = [entree['fichier'] for entree in entrees if not os.path.exists(entree['fichier'])]
+        if not entrees:
+            print(f"❌ Aucun fichier listé dans le manifeste : {args.lot}")
+            return
+        if manquants:
+            for fichier in manquants:
+                print(f"❌ Fichier non trouvé : {fichier}")
+            return
+        
+        print(f"\n📦 Conversion par lot : {len(entrees)} fichier(s) listé(s) dans {args.lot}")
+        if convertir_lot(entrees, args.processus, valider=not args.sans_validation):
+            print(f"\n✅ Traitement terminé avec succès !")
+            print(f"\n🎯 Prêt pour l'import dans Moodle via :")
+            print(f"   Administration > Utilisateurs > Comptes > Importer des utilisateurs")
+        else:
+            print(f"\n❌ Échec du traitement")
         return
     
-    fichier_input, fichier_sortie = sys.argv[1], sys.argv[2]
-    cohort_id = sys.argv[3] if len(sys.argv) == 4 else None
+    if not args.fichier_entree or not args.fichier_sortie:
+        parser.error("les arguments fichier_entrée et sortie.csv sont obligatoires")
+    
+    if args.delta and args.flux:
+        parser.error("les modes --delta et --flux ne peuvent pas être combinés")
+    if args.supprimes and not args.delta:
+        parser.error("--supprimes nécessite --delta")
+    if (args.lignes_max or args.taille_max) and args.flux:
+        parser.error("le découpage en parties n'est pas disponible en mode --flux")
+    if args.pousser and (args.flux or args.delta or args.lignes_max or args.taille_max):
+        parser.error("--pousser ne peut pas être combiné avec --flux, --delta, --lignes-max ou --taille-max")
+    if args.mots_de_passe and (args.flux or args.pousser):
+        parser.error("--mots-de-passe ne peut pas être combiné avec --flux ou --pousser")
+    if args.pousser and not os.environ.get('MOODLE_TOKEN'):
+        parser.error("--pousser nécessite le jeton du service web dans la variable d'environnement MOODLE_TOKEN")
+    
+    fichier_input, fichier_sortie = args.fichier_entree, args.fichier_sortie
+    cohort_id = args.cohort_id
     
     # Vérifier l'existence du fichier d'entrée
     if not os.path.exists(fichier_input):
@@ -122,22 +890,77 @@ def main():
         print(f"   Cohorte ID           : Aucune (pas d'assignation)")
     
     # Traitement
-    print(f"\n📖 Lecture du fichier : {fichier_input}")
-    df_emails = lire_fichier_emails(fichier_input)
-    if df_emails is None:
-        return
-    
-    print(f"\n💾 Création du fichier CSV : {fichier_sortie}")
-    success = creer_csv_moodle(df_emails, fichier_sortie, cohort_id)
+    if args.flux:
+        print(f"\n🌊 Conversion en flux : {fichier_input} → {fichier_sortie}")
+        with etape('conversion_flux'):
+            success = convertir_en_flux(fichier_input, fichier_sortie, cohort_id)
+    else:
+        print(f"\n📖 Lecture du fichier : {fichier_input}")
+        with etape('lecture') as mesure:
+            df_emails = lire_fichier_emails(fichier_input)
+            mesure.lignes = 0 if df_emails is None else len(df_emails)
+        if df_emails is None:
+            return
+        
+        if not args.sans_validation:
+            print(f"\n🔎 Validation des utilisateurs")
+            fichier_rejets = args.rejets or str(Path(fichier_sortie).with_suffix('')) + '_rejets.csv'
+            with etape('validation', lignes=len(df_emails)):
+                df_emails, _ = valider_utilisateurs(df_emails, fichier_rejets)
+        
+        if args.delta:
+            print(f"\n🔁 Export différentiel (état : {args.delta})")
+            try:
+                etat_precedent = charger_etat(args.delta)
+            except ValueError as e:
+                print(f"❌ {e}")
+                print(f"💡 Supprimez ce fichier pour repartir d'un export complet")
+                return
+            with etape('delta', lignes=len(df_emails)):
+                empreintes = calculer_empreintes(df_emails, cohort_id)
+                df_emails, supprimes = filtrer_delta(df_emails, empreintes, etat_precedent)
+            
+            if args.supprimes:
+                import pandas as pd
+                
+                pd.DataFrame({'username': supprimes}).to_csv(args.supprimes, index=False, encoding='utf-8')
+                print(f"   📄 Usernames supprimés : {args.supprimes}")
+            
+            if df_emails.empty:
+                enregistrer_etat(args.delta, empreintes)
+                print(f"\n✅ Aucun changement depuis le dernier export, aucun fichier CSV à importer.")
+                return
+        
+        if args.pousser:
+            print(f"\n🚀 Création des utilisateurs dans Moodle : {args.pousser}")
+            from client_moodle import ClientMoodle
+            
+            with ClientMoodle(args.pousser, os.environ['MOODLE_TOKEN'], nb_connexions=args.requetes) as client:
+                success = provisionner_utilisateurs(df_emails, client, cohort_id, args.taille_lot, args.requetes)
+            print(f"\n✅ Utilisateurs créés dans Moodle !" if success else f"\n❌ Échec du traitement")
+            return
+        
+        print(f"\n💾 Création du fichier CSV : {fichier_sortie}")
+        with etape('ecriture', lignes=len(df_emails)):
+            success = creer_csv_moodle(df_emails, fichier_sortie, cohort_id, args.lignes_max, args.taille_max,
+                                       args.mots_de_passe)
+        
+        # L'état n'est mis à jour qu'une fois le CSV écrit
+        if success and args.delta:
+            enregistrer_etat(args.delta, empreintes)
+            print(f"✓ État de l'export enregistré : {args.delta}")
+            print(f"💡 Importez avec l'option « Ajouter les nouveaux et mettre à jour les utilisateurs existants »")
     
     if success:
         print(f"\n✅ Traitement terminé avec succès !")
-        print(f"📄 Fichier de sortie : {os.path.abspath(fichier_sortie)}")
-        print(f"\n📋 Format CSV généré :")
-        if cohort_id:
-            print(f"   username,email,auth,firstname,lastname,cohort1")
+        if args.lignes_max or args.taille_max:
+            chemin = Path(fichier_sortie)
+            print(f"📄 Parties listées dans : {os.path.abspath(chemin.with_name(chemin.stem + '_parties.csv'))}")
         else:
-            print(f"   username,email,auth,firstname,lastname")
+            print(f"📄 Fichier de sortie : {os.path.abspath(fichier_sortie)}")
+        print(f"\n📋 Format CSV généré :")
+        colonnes = COLONNES_MOODLE + (['password'] if args.mots_de_passe else []) + (['cohort1'] if cohort_id else [])
+        print(f"   {','.join(colonnes)}")
         print(f"\n🎯 Prêt pour l'import dans Moodle via :")
         print(f"   Administration > Utilisateurs > Comptes > Importer des utilisateurs")
     else:
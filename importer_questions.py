@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import en masse de questions dans Moodle par le plugin local_questionimporter.
+
+Les fichiers Excel ont le même format que pour la page « Excel vers XML Moodle »
+(SNO, Questions, Type, option 1 à 5, Correct Answer, Commentaires, Points).
+Le XML Moodle est généré question par question et découpé en lots de taille
+bornée ; plusieurs catégories sont envoyées en parallèle sur des connexions
+HTTP réutilisées.
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from client_moodle import ClientMoodle, ErreurMoodle
+from import_user_moodle import entier_positif
+
+# Limites d'un lot envoyé en un appel à import_questions (XML avant encodage base64)
+OCTETS_MAX_LOT = 4 * 1024 * 1024
+QUESTIONS_MAX_LOT = 200
+
+# Durée de validité des listes de cours et de catégories en cache
+DUREE_CACHE = 300
+
+COLONNES_REQUISES = ['SNO', 'Questions', 'Type', 'option 1', 'Correct Answer', 'Points']
+
+PIED_XML = '</quiz>'
+
+
+def echapper_xml(texte):
+    """Échappe les caractères spéciaux XML (même règle que la page web)."""
+    if texte is None or texte == '':
+        return ''
+    return (str(texte).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;').replace("'", '&apos;'))
+
+
+def lire_questions(fichier_path):
+    """
+    Lit les questions de la première feuille d'un fichier Excel, ligne par ligne.
+
+    Args:
+        fichier_path: Chemin vers le fichier .xlsx
+
+    Yields:
+        dict: Une question par ligne {colonne: valeur}
+
+    Raises:
+        ValueError: Si le fichier n'est pas un classeur Excel lisible ou si des colonnes obligatoires manquent
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        classeur = load_workbook(fichier_path, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError, OSError) as e:
+        raise ValueError(f"classeur Excel illisible : {e}") from e
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entete = [str(valeur).strip() if valeur is not None else '' for valeur in next(lignes, [])]
+        manquantes = [colonne for colonne in COLONNES_REQUISES if colonne not in entete]
+        if manquantes:
+            raise ValueError(f"colonnes manquantes : {', '.join(manquantes)}")
+
+        for ligne in lignes:
+            if all(valeur is None for valeur in ligne):
+                continue
+            yield dict(zip(entete, ligne))
+    finally:
+        classeur.close()
+
+
+def trouver_reponses_correctes(texte_reponses, options):
+    """
+    Associe le texte de la colonne « Correct Answer » (réponses séparées par des virgules)
+    aux options : correspondance exacte, puis sans tenir compte de la casse, puis partielle.
+
+    Returns:
+        list: Options correctes
+    """
+    if not texte_reponses or not texte_reponses.strip():
+        return []
+
+    correctes = []
+    for partie in (p.strip() for p in texte_reponses.split(',')):
+        correspondance = (
+            next((option for option in options if option == partie), None)
+            or next((option for option in options if option.lower() == partie.lower()), None)
+            or next((option for option in options if partie in option or option in partie), None)
+        )
+        if correspondance:
+            correctes.append(correspondance)
+    return correctes
+
+
+def generer_xml_question(question, numero):
+    """
+    Génère le XML Moodle d'une question à choix multiples.
+
+    Args:
+        question: dict d'une ligne du fichier Excel
+        numero: Numéro de la question (pour son nom)
+
+    Returns:
+        str: Élément <question> complet
+
+    Raises:
+        ValueError: Si la question n'a pas d'option ou pas de réponse correcte
+    """
+    options = []
+    for i in range(1, 6):
+        option = question.get(f'option {i}')
+        if option is not None and str(option).strip():
+            options.append(str(option).strip())
+    if not options:
+        raise ValueError("aucune option trouvée")
+
+    correctes = trouver_reponses_correctes(str(question.get('Correct Answer') or ''), options)
+    if not correctes:
+        raise ValueError("aucune réponse correcte identifiée")
+
+    # CHECKBOX = plusieurs réponses possibles, RADIO = une seule
+    choix_unique = str(question.get('Type') or 'CHECKBOX').upper() == 'RADIO'
+
+    morceaux = [
+        '  <question type="multichoice">\n',
+        '    <name>\n',
+        f'      <text>Question {numero}</text>\n',
+        '    </name>\n',
+        '    <questiontext format="html">\n',
+        f'      <text><![CDATA[{echapper_xml(question.get("Questions"))}]]></text>\n',
+        '    </questiontext>\n',
+        '    <generalfeedback format="html">\n',
+        f'      <text><![CDATA[{echapper_xml(question.get("Commentaires"))}]]></text>\n',
+        '    </generalfeedback>\n',
+        f'    <defaultgrade>{question.get("Points") or 1}</defaultgrade>\n',
+        '    <penalty>0.3333333</penalty>\n',
+        '    <hidden>0</hidden>\n',
+        f'    <single>{"true" if choix_unique else "false"}</single>\n',
+        '    <shuffleanswers>true</shuffleanswers>\n',
+        '    <answernumbering>abc</answernumbering>\n',
+        '    <correctfeedback format="html">\n',
+        '      <text>Votre reponse est correcte.</text>\n',
+        '    </correctfeedback>\n',
+        '    <partiallycorrectfeedback format="html">\n',
+        '      <text>Votre reponse est partiellement correcte.</text>\n',
+        '    </partiallycorrectfeedback>\n',
+        '    <incorrectfeedback format="html">\n',
+        '      <text>Votre reponse est incorrecte.</text>\n',
+        '    </incorrectfeedback>\n',
+    ]
+    for option in options:
+        # Mode « tout ou rien » : 100 pour les bonnes réponses, 0 pour les autres
+        fraction = '100' if option in correctes else '0'
+        morceaux += [
+            f'    <answer fraction="{fraction}" format="html">\n',
+            f'      <text><![CDATA[{echapper_xml(option)}]]></text>\n',
+            '      <feedback format="html">\n',
+            '        <text></text>\n',
+            '      </feedback>\n',
+            '    </answer>\n',
+        ]
+    morceaux.append('  </question>\n\n')
+    return ''.join(morceaux)
+
+
+def entete_xml(nom_categorie):
+    """Début du document XML Moodle, avec la question de catégorie."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<quiz>\n\n'
+        '  <question type="category">\n'
+        '    <category>\n'
+        f'      <text>$course$/top/{echapper_xml(nom_categorie)}</text>\n'
+        '    </category>\n'
+        '  </question>\n\n'
+    )
+
+
+def generer_lots_xml(questions, nom_categorie, octets_max=OCTETS_MAX_LOT, questions_max=QUESTIONS_MAX_LOT):
+    """
+    Génère les documents XML Moodle au fil de la lecture des questions, chacun limité
+    à octets_max octets et questions_max questions. Les questions invalides sont
+    signalées et ignorées.
+
+    Args:
+        questions: Itérable de questions (voir lire_questions)
+        nom_categorie: Nom de catégorie écrit dans chaque document
+
+    Yields:
+        tuple: (document XML en octets, nombre de questions)
+    """
+    entete = entete_xml(nom_categorie).encode('utf-8')
+    pied = PIED_XML.encode('utf-8')
+    morceaux = []
+    taille = len(entete) + len(pied)
+
+    for numero, question in enumerate(questions, 1):
+        try:
+            morceau = generer_xml_question(question, numero).encode('utf-8')
+        except ValueError as e:
+            print(f"   ⚠ Question {numero} ignorée : {e}")
+            continue
+
+        if morceaux and (len(morceaux) >= questions_max or taille + len(morceau) > octets_max):
+            yield entete + b''.join(morceaux) + pied, len(morceaux)
+            morceaux = []
+            taille = len(entete) + len(pied)
+
+        morceaux.append(morceau)
+        taille += len(morceau)
+
+    if morceaux:
+        yield entete + b''.join(morceaux) + pied, len(morceaux)
+
+
+class ImportateurQuestions:
+    """
+    Accès aux fonctions du plugin local_questionimporter, avec mise en cache
+    des listes de cours et de catégories.
+
+    Args:
+        client: ClientMoodle connecté au site
+        duree_cache: Durée de validité du cache, en secondes
+        fichier_cache: Fichier JSON où conserver le cache entre deux exécutions (optionnel)
+    """
+
+    def __init__(self, client, duree_cache=DUREE_CACHE, fichier_cache=None):
+        self.client = client
+        self.duree_cache = duree_cache
+        self.fichier_cache = fichier_cache
+        self._verrou = threading.Lock()
+        self._cache = {}
+
+        if fichier_cache and os.path.exists(fichier_cache):
+            try:
+                with open(fichier_cache, encoding='utf-8') as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                self._cache = {}
+
+    def _appel_en_cache(self, fonction, **parametres):
+        cle = f"{fonction}:{json.dumps(parametres, sort_keys=True)}"
+        with self._verrou:
+            entree = self._cache.get(cle)
+            if entree and entree['expire'] > time.time():
+                return entree['valeur']
+
+        valeur = self.client.appeler(fonction, **parametres)
+
+        with self._verrou:
+            self._cache[cle] = {'expire': time.time() + self.duree_cache, 'valeur': valeur}
+            if self.fichier_cache:
+                with open(self.fichier_cache, 'w', encoding='utf-8') as f:
+                    json.dump(self._cache, f, ensure_ascii=False)
+        return valeur
+
+    def cours(self):
+        """Liste des cours où l'utilisateur peut ajouter des questions."""
+        return self._appel_en_cache('local_questionimporter_get_courses')
+
+    def categories(self, id_cours):
+        """Liste des catégories de questions d'un cours."""
+        return self._appel_en_cache('local_questionimporter_get_question_categories', courseid=int(id_cours))
+
+    def trouver_categorie(self, id_cours, categorie):
+        """
+        Retrouve l'identifiant d'une catégorie à partir de son identifiant ou de son nom.
+
+        Raises:
+            ValueError: Si la catégorie n'existe pas dans le cours
+        """
+        for candidate in self.categories(id_cours):
+            if str(candidate['id']) == str(categorie) or candidate['name'] == categorie:
+                return candidate['id']
+        raise ValueError(f"catégorie '{categorie}' introuvable dans le cours {id_cours}")
+
+    def importer_xml(self, id_categorie, xml):
+        """
+        Envoie un document XML Moodle dans une catégorie.
+
+        Returns:
+            dict: Réponse du plugin {'success', 'message', 'imported', 'errors'}
+        """
+        # Un lot renvoyé après une réponse perdue serait importé deux fois
+        return self.client.appeler(
+            'local_questionimporter_import_questions', idempotent=False,
+            categoryid=int(id_categorie),
+            xmlcontent=base64.b64encode(xml).decode('ascii'),
+        )
+
+    def importer_fichier(self, fichier, id_categorie, nom_categorie, octets_max=OCTETS_MAX_LOT,
+                         questions_max=QUESTIONS_MAX_LOT):
+        """
+        Importe toutes les questions d'un fichier Excel dans une catégorie, lot par lot.
+
+        Returns:
+            tuple: (questions envoyées, questions importées, erreurs)
+        """
+        envoyees = importees = 0
+        erreurs = []
+        for numero_lot, (xml, nb_questions) in enumerate(
+                generer_lots_xml(lire_questions(fichier), nom_categorie, octets_max, questions_max), 1):
+            envoyees += nb_questions
+            resultat = self.importer_xml(id_categorie, xml)
+            importees += resultat.get('imported', 0)
+            if not resultat.get('success'):
+                erreurs.append(f"lot {numero_lot} : {resultat.get('message')}")
+            erreurs.extend(f"lot {numero_lot} : {erreur}" for erreur in resultat.get('errors') or [])
+            print(f"   📤 {Path(fichier).name} lot {numero_lot} : {resultat.get('imported', 0)}/{nb_questions} question(s)")
+        return envoyees, importees, erreurs
+
+
+def main(argv=None, prog=None):
+    """Fonction principale."""
+    print("📚 Import de questions dans Moodle")
+    print("=" * 50)
+
+    parser = argparse.ArgumentParser(
+        prog=prog or "python importer_questions.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Exemple:
+  MOODLE_TOKEN=... python importer_questions.py --url https://moodle.exemple.fr --cours 12 \\
+      anatomie.xlsx=Anatomie biochimie.xlsx=57
+
+📌 Chaque fichier est associé à une catégorie par son identifiant ou son nom.
+   Le jeton du service web questionimporter est lu dans la variable MOODLE_TOKEN."""
+    )
+    parser.add_argument('imports', nargs='*', metavar='fichier.xlsx=catégorie',
+                        help="fichier Excel de questions et catégorie de destination")
+    parser.add_argument('--url', required=True, help="URL du site Moodle")
+    parser.add_argument('--cours', help="identifiant du cours (sans fichier : liste ses catégories)")
+    parser.add_argument('--octets-max', type=entier_positif, default=OCTETS_MAX_LOT,
+                        help=f"taille maximale du XML d'un lot (défaut : {OCTETS_MAX_LOT})")
+    parser.add_argument('--questions-max', type=entier_positif, default=QUESTIONS_MAX_LOT,
+                        help=f"nombre maximal de questions par lot (défaut : {QUESTIONS_MAX_LOT})")
+    parser.add_argument('--requetes', type=entier_positif, default=4, help="catégories importées simultanément (défaut : 4)")
+    parser.add_argument('--cache', metavar='FICHIER',
+                        help="fichier de cache des listes de cours et de catégories")
+    args = parser.parse_args(argv)
+
+    jeton = os.environ.get('MOODLE_TOKEN')
+    if not jeton:
+        parser.error("le jeton du service web doit être fourni dans la variable d'environnement MOODLE_TOKEN")
+
+    with ClientMoodle(args.url, jeton, nb_connexions=args.requetes) as client:
+        importateur = ImportateurQuestions(client, fichier_cache=args.cache)
+
+        try:
+            if not args.cours:
+                print("\n📋 Cours disponibles :")
+                for cours in importateur.cours():
+                    print(f"   {cours['id']:>6}  {cours['shortname']:<20} {cours['fullname']}")
+                return
+
+            if not args.imports:
+                print(f"\n📋 Catégories du cours {args.cours} :")
+                for categorie in importateur.categories(args.cours):
+                    print(f"   {categorie['id']:>6}  {categorie['name']} ({categorie['questioncount']} question(s))")
+                return
+
+            taches = []
+            for element in args.imports:
+                fichier, separateur, categorie = element.rpartition('=')
+                if not separateur or not fichier:
+                    parser.error(f"format attendu fichier.xlsx=catégorie : {element}")
+                if not os.path.exists(fichier):
+                    print(f"❌ Fichier non trouvé : {fichier}")
+                    sys.exit(1)
+                id_categorie = importateur.trouver_categorie(args.cours, categorie)
+                taches.append((fichier, id_categorie, categorie))
+        except (ErreurMoodle, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        print(f"\n🚀 Import de {len(taches)} fichier(s), {args.requetes} catégorie(s) en parallèle")
+        debut = time.perf_counter()
+
+        def importer(tache):
+            fichier, id_categorie, categorie = tache
+            try:
+                return importateur.importer_fichier(fichier, id_categorie, categorie,
+                                                    args.octets_max, args.questions_max)
+            except (ErreurMoodle, ValueError) as e:
+                return 0, 0, [str(e)]
+
+        with ThreadPoolExecutor(max_workers=args.requetes) as executor:
+            resultats = list(executor.map(importer, taches))
+
+        print()
+        total_importees = 0
+        nb_erreurs = 0
+        for (fichier, _, categorie), (envoyees, importees, erreurs) in zip(taches, resultats):
+            total_importees += importees
+            nb_erreurs += len(erreurs)
+            symbole = "✓" if not erreurs and importees == envoyees else "⚠"
+            print(f"{symbole} {Path(fichier).name} → {categorie} : {importees}/{envoyees} question(s) importée(s)")
+            for erreur in erreurs:
+                print(f"   • {erreur}")
+
+        print(f"\n✅ {total_importees} question(s) importée(s) en {time.perf_counter() - debut:.2f} s")
+        if nb_erreurs:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index binaire compact des licences (fichiers .licidx).
+
+Écrit par sumup_licences à côté de chaque fichier XLSX de licences, et lu par
+traiter_colle par projection mémoire (mmap) : aucune désérialisation n'est
+nécessaire, la recherche d'un numéro se fait par dichotomie sur le tableau trié.
+
+Structure du fichier (petit-boutiste) :
+    - en-tête (24 octets) : signature b'LICIDX01', nombre de numéros (uint64),
+      nombre de licences (uint32), taille de la table des noms en octets (uint32)
+    - numéros d'anonymat triés (int64 x N)
+    - code de licence de chaque numéro (uint16 x N)
+    - table des noms de licences (UTF-8, séparés par des retours à la ligne)
+"""
+
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from pathlib import Path
+
+EXTENSION_INDEX = '.licidx'
+SIGNATURE = b'LICIDX01'
+ENTETE = struct.Struct('<8sQII')
+NB_LICENCES_MAX = 2 ** 16  # codes de licence stockés en uint16
+
+
+def chemin_index(fichier_licences):
+    """
+    Renvoie le chemin de l'index associé à un fichier de licences.
+
+    Args:
+        fichier_licences: Chemin du fichier XLSX de licences
+
+    Returns:
+        Path: Même chemin avec l'extension .licidx
+    """
+    return Path(fichier_licences).with_suffix(EXTENSION_INDEX)
+
+
+def ecrire_index_licences(fichier_index, numeros, licences):
+    """
+    Écrit un index binaire de licences.
+
+    Le fichier est d'abord écrit à côté puis renommé, pour qu'un lecteur
+    ne projette jamais un index à moitié écrit. Un numéro présent plusieurs fois
+    n'est écrit qu'une fois, avec sa dernière licence : comme colle.lire_licences
+    sur le fichier XLSX, où la dernière ligne l'emporte.
+
+    Args:
+        fichier_index: Chemin du fichier .licidx à créer
+        numeros: Numéros d'anonymat (entiers)
+        licences: Nom de licence de chaque numéro
+
+    Returns:
+        int: Nombre de numéros écrits (doublons exclus)
+    """
+    import numpy as np
+
+    numeros = np.asarray(numeros, dtype=np.int64)
+    licences = np.asarray(licences, dtype=object)
+    if len(numeros) != len(licences):
+        raise ValueError("les tableaux des numéros et des licences n'ont pas la même longueur")
+
+    noms, codes = np.unique(licences.astype(str), return_inverse=True)
+    if len(noms) > NB_LICENCES_MAX:
+        raise ValueError(f"trop de licences différentes ({len(noms)}, maximum {NB_LICENCES_MAX})")
+    for nom in noms:
+        if '\n' in nom:
+            raise ValueError(f"nom de licence invalide : {nom!r}")
+
+    # Position de la dernière occurrence de chaque numéro, dans l'ordre des numéros
+    _, premieres_inversees = np.unique(numeros[::-1], return_index=True)
+    ordre = len(numeros) - 1 - premieres_inversees
+    table_noms = '\n'.join(noms).encode('utf-8')
+
+    fichier_index = Path(fichier_index)
+    fichier_temp = fichier_index.with_name(fichier_index.name + '.tmp')
+    with open(fichier_temp, 'wb') as f:
+        f.write(ENTETE.pack(SIGNATURE, len(ordre), len(noms), len(table_noms)))
+        f.write(numeros[ordre].astype('<i8').tobytes())
+        f.write(codes[ordre].astype('<u2').tobytes())
+        f.write(table_noms)
+    os.replace(fichier_temp, fichier_index)
+
+    return len(ordre)
+
+
+class IndexLicences(MutableMapping):
+    """
+    Dictionnaire {numero: licence} adossé à un fichier .licidx projeté en mémoire.
+
+    S'utilise comme le dictionnaire renvoyé par traiter_colle.lire_fichier_licences :
+    les clés sont les numéros sous forme de chaînes. Les assignations (par exemple
+    l'assignation interactive de licences) sont conservées en mémoire sans
+    modifier le fichier. Si un numéro apparaît plusieurs fois dans l'index (écrit
+    par une version précédente), la dernière occurrence est utilisée.
+    """
+
+    def __init__(self, fichier_index):
+        import numpy as np
+
+        with open(fichier_index, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < ENTETE.size:
+            raise ValueError(f"{fichier_index} : fichier d'index tronqué")
+
+        signature, nb_numeros, nb_licences, taille_table = ENTETE.unpack_from(self._mmap, 0)
+        if signature != SIGNATURE:
+            raise ValueError(f"{fichier_index} : ce n'est pas un index de licences")
+
+        debut_codes = ENTETE.size + 8 * nb_numeros
+        debut_noms = debut_codes + 2 * nb_numeros
+        if len(self._mmap) < debut_noms + taille_table:
+            raise ValueError(f"{fichier_index} : fichier d'index tronqué")
+
+        self._numeros = np.frombuffer(self._mmap, dtype='<i8', count=nb_numeros, offset=ENTETE.size)
+        self._codes = np.frombuffer(self._mmap, dtype='<u2', count=nb_numeros, offset=debut_codes)
+        table = bytes(self._mmap[debut_noms:debut_noms + taille_table]).decode('utf-8')
+        self._noms = table.split('\n') if nb_licences else []
+        self._ajouts = {}
+        self._nb_uniques = None
+
+    def _position(self, numero):
+        """Position (dernière occurrence) du numéro dans le tableau trié, ou None s'il est absent."""
+        try:
+            valeur = int(numero)
+        except (TypeError, ValueError):
+            return None
+        position = int(self._numeros.searchsorted(valeur, side='right')) - 1
+        if position >= 0 and self._numeros[position] == valeur:
+            return position
+        return None
+
+    def __getitem__(self, numero):
+        if numero in self._ajouts:
+            return self._ajouts[numero]
+        position = self._position(numero)
+        if position is None:
+            raise KeyError(numero)
+        return self._noms[self._codes[position]]
+
+    def __contains__(self, numero):
+        return numero in self._ajouts or self._position(numero) is not None
+
+    def __setitem__(self, numero, licence):
+        self._ajouts[numero] = licence
+
+    def __delitem__(self, numero):
+        if numero not in self._ajouts:
+            raise TypeError("l'index des licences est en lecture seule")
+        del self._ajouts[numero]
+
+    def __iter__(self):
+        yield from self._ajouts
+        precedent = None
+        for valeur in self._numeros:
+            if valeur == precedent:
+                continue
+            precedent = valeur
+            numero = str(int(valeur))
+            if numero not in self._ajouts:
+                yield numero
+
+    def __len__(self):
+        if self._nb_uniques is None:
+            self._nb_uniques = len(self._numeros) - int((self._numeros[1:] == self._numeros[:-1]).sum())
+        ajouts_hors_index = sum(1 for numero in self._ajouts if self._position(numero) is None)
+        return self._nb_uniques + ajouts_hors_index
+
+
+def ouvrir_index_licences(fichier_index):
+    """
+    Ouvre un index de licences par projection mémoire.
+
+    Args:
+        fichier_index: Chemin du fichier .licidx
+
+    Returns:
+        IndexLicences: Dictionnaire {numero: licence} en lecture seule sur le disque
+    """
+    return IndexLicences(fichier_index)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journal des scripts en ligne de commande (traiter_colle, sumup_licences).
+
+Les messages passent par le module logging, avec trois niveaux de verbosité :
+    -q  seuls les avertissements et les erreurs ;
+        (défaut) les bilans, et quelques exemples par liste d'anomalies ;
+    -v  le détail de chaque élément.
+
+Les anomalies sont comptées (compteurs agrégés, affichés en fin de traitement) au
+lieu d'être listées une à une sur la console. Avec --details FICHIER, chaque message
+et chaque élément est écrit en JSON lines par un thread dédié : les boucles de
+traitement ne bloquent jamais sur l'écriture.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from collections import Counter
+
+NOM_JOURNAL = 'outils'
+
+# Éléments d'une liste affichés sur la console au niveau normal
+EXEMPLES_MAX = 10
+
+# Anomalies comptées pendant le traitement : {type: nombre}
+compteurs = Counter()
+
+_etat = {'verbosite': 0, 'ecouteur': None}
+
+
+class _Console(logging.StreamHandler):
+    """Écrit sur la sortie standard courante (y compris quand elle est redirigée après coup)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, valeur):
+        pass
+
+
+class FormatJSON(logging.Formatter):
+    """Une ligne JSON par message : horodatage, niveau, source, message et champs structurés."""
+
+    def format(self, record):
+        ligne = {
+            'horodatage': round(record.created, 3),
+            'niveau': record.levelname,
+            'source': record.name,
+            'message': record.getMessage().strip(),
+        }
+        ligne.update(getattr(record, 'details', None) or {})
+        return json.dumps(ligne, ensure_ascii=False, default=str)
+
+
+def obtenir_journal(nom):
+    """Journal d'un script (enfant du journal 'outils')."""
+    return logging.getLogger(f"{NOM_JOURNAL}.{nom}")
+
+
+def _arreter_ecouteur():
+    ecouteur = _etat['ecouteur']
+    if ecouteur is not None:
+        ecouteur.stop()
+        for handler in ecouteur.handlers:
+            handler.close()
+        _etat['ecouteur'] = None
+
+
+def configurer_journal(verbosite=0, fichier_details=None):
+    """
+    Configure la sortie des messages.
+
+    Args:
+        verbosite: -1 (avertissements seulement), 0 (normal) ou 1 et plus (détail)
+        fichier_details: Fichier JSON lines recevant tous les messages, ou None
+    """
+    racine = logging.getLogger(NOM_JOURNAL)
+    _arreter_ecouteur()
+    for handler in racine.handlers[:]:
+        racine.removeHandler(handler)
+
+    niveau_console = logging.WARNING if verbosite < 0 else logging.INFO if verbosite == 0 else logging.DEBUG
+    console = _Console()
+    console.setFormatter(logging.Formatter('%(message)s'))
+    console.setLevel(niveau_console)
+    racine.addHandler(console)
+    niveau = niveau_console
+
+    if fichier_details:
+        # Écriture du fichier par un thread dédié : l'appelant ne fait que déposer le message
+        file_attente = queue.SimpleQueue()
+        fichier = logging.FileHandler(fichier_details, mode='w', encoding='utf-8')
+        fichier.setFormatter(FormatJSON())
+        # Les lignes vides de mise en page n'ont pas leur place dans le fichier
+        fichier.addFilter(lambda record: bool(record.getMessage().strip()))
+        ecouteur = logging.handlers.QueueListener(file_attente, fichier)
+        ecouteur.start()
+        _etat['ecouteur'] = ecouteur
+        racine.addHandler(logging.handlers.QueueHandler(file_attente))
+        niveau = logging.DEBUG
+
+    racine.setLevel(niveau)
+    racine.propagate = False
+    _etat['verbosite'] = verbosite
+
+
+def ajouter_options(parser):
+    """Ajoute les options -v, -q et --details à un analyseur argparse."""
+    groupe = parser.add_mutually_exclusive_group()
+    groupe.add_argument('-v', '--verbeux', action='count', default=0,
+                        help="afficher le détail de chaque anomalie")
+    groupe.add_argument('-q', '--silencieux', action='store_true',
+                        help="n'afficher que les avertissements et les erreurs")
+    parser.add_argument('--details', metavar='JSONL',
+                        help="écrire tous les messages et le détail des anomalies dans un fichier JSON lines")
+
+
+def configurer_depuis_options(args):
+    """Configure le journal d'après les options ajoutées par ajouter_options."""
+    configurer_journal(-1 if args.silencieux else args.verbeux, args.details)
+
+
+def detailler(journal, elements, formater, type_detail, exemples=EXEMPLES_MAX):
+    """
+    Journalise une liste d'éléments : les premiers au niveau INFO, les suivants au niveau
+    DEBUG (console avec -v, fichier --details). Si personne ne reçoit le niveau DEBUG, la
+    liste n'est pas parcourue au-delà des exemples.
+
+    Args:
+        journal: Journal (logging.Logger)
+        elements: Liste de dicts (champs structurés de chaque élément)
+        formater: Fonction dict → texte affiché
+        type_detail: Type de l'élément, ajouté aux champs structurés
+        exemples: Nombre d'éléments affichés au niveau normal
+    """
+    detail = journal.isEnabledFor(logging.DEBUG)
+    for rang, element in enumerate(elements):
+        if rang >= exemples and not detail:
+            break
+        niveau = logging.INFO if rang < exemples else logging.DEBUG
+        journal.log(niveau, formater(element), extra={'details': {'type': type_detail, **element}})
+
+    restants = len(elements) - exemples
+    if restants > 0 and _etat['verbosite'] < 1:
+        journal.info(f"   … et {restants} autre(s) (liste complète : option -v ou --details)")
+
+
+def compter(type_anomalie, nombre=1):
+    """Ajoute des anomalies au compteur agrégé."""
+    if nombre:
+        compteurs[type_anomalie] += nombre
+
+
+def resumer_compteurs(journal, libelles):
+    """
+    Journalise le bilan des compteurs, puis les remet à zéro.
+
+    Args:
+        journal: Journal (logging.Logger)
+        libelles: {type: libellé affiché}, dans l'ordre d'affichage
+    """
+    if not compteurs:
+        return
+    elements = [f"{compteurs[type_anomalie]} {libelle}" for type_anomalie, libelle in libelles.items()
+                if compteurs[type_anomalie]]
+    journal.info(f"📊 Anomalies : {', '.join(elements)}", extra={'details': {'type': 'compteurs', **compteurs}})
+    compteurs.clear()
+
+
+# Configuration par défaut (console, niveau normal) tant qu'un script ne l'a pas changée
+configurer_journal()
+atexit.register(_arreter_ecouteur)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture en flux des feuilles de calcul OpenDocument (.ods).
+
+Le fichier content.xml de l'archive est analysé au fil de l'eau (iterparse) :
+les lignes sont produites une par une et libérées aussitôt, sans construire
+l'arbre complet du document comme le fait odfpy. Les attributs de répétition
+(table:number-rows-repeated, table:number-columns-repeated) sont développés,
+et seules les colonnes demandées sont conservées.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+ESPACE_TABLE = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+ESPACE_OFFICE = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+ESPACE_TEXTE = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+
+TABLE = f'{{{ESPACE_TABLE}}}table'
+LIGNE = f'{{{ESPACE_TABLE}}}table-row'
+CELLULE = f'{{{ESPACE_TABLE}}}table-cell'
+CELLULE_MASQUEE = f'{{{ESPACE_TABLE}}}covered-table-cell'
+NOM_TABLE = f'{{{ESPACE_TABLE}}}name'
+LIGNES_REPETEES = f'{{{ESPACE_TABLE}}}number-rows-repeated'
+COLONNES_REPETEES = f'{{{ESPACE_TABLE}}}number-columns-repeated'
+TYPE_VALEUR = f'{{{ESPACE_OFFICE}}}value-type'
+VALEUR = f'{{{ESPACE_OFFICE}}}value'
+PARAGRAPHE = f'{{{ESPACE_TEXTE}}}p'
+ESPACES = f'{{{ESPACE_TEXTE}}}s'
+TABULATION = f'{{{ESPACE_TEXTE}}}tab'
+SAUT_LIGNE = f'{{{ESPACE_TEXTE}}}line-break'
+ANNOTATION = f'{{{ESPACE_OFFICE}}}annotation'
+
+# Attribut office:*-value contenant la valeur selon le type de la cellule
+ATTRIBUTS_VALEUR = {
+    'date': f'{{{ESPACE_OFFICE}}}date-value',
+    'time': f'{{{ESPACE_OFFICE}}}time-value',
+    'boolean': f'{{{ESPACE_OFFICE}}}boolean-value',
+}
+TYPES_NUMERIQUES = {'float', 'percentage', 'currency'}
+
+
+def _texte_paragraphe(element):
+    """Reconstitue le texte d'un paragraphe text:p (espaces, tabulations et sauts de ligne compris)."""
+    morceaux = [element.text or '']
+    for enfant in element:
+        if enfant.tag == ESPACES:
+            morceaux.append(' ' * int(enfant.get(f'{{{ESPACE_TEXTE}}}c', 1)))
+        elif enfant.tag == TABULATION:
+            morceaux.append('\t')
+        elif enfant.tag == SAUT_LIGNE:
+            morceaux.append('\n')
+        elif enfant.tag == ANNOTATION:
+            pass
+        else:
+            morceaux.append(_texte_paragraphe(enfant))
+        morceaux.append(enfant.tail or '')
+    return ''.join(morceaux)
+
+
+def valeur_cellule(cellule):
+    """
+    Renvoie la valeur d'une cellule : float pour les nombres, bool pour les booléens,
+    texte ISO pour les dates et heures, texte affiché sinon, None si la cellule est vide.
+    Seuls les paragraphes propres à la cellule sont lus : pas ceux de ses commentaires
+    (office:annotation).
+    """
+    type_valeur = cellule.get(TYPE_VALEUR)
+    if type_valeur in TYPES_NUMERIQUES:
+        return float(cellule.get(VALEUR))
+    if type_valeur == 'boolean':
+        return cellule.get(ATTRIBUTS_VALEUR['boolean']) == 'true'
+    if type_valeur in ATTRIBUTS_VALEUR:
+        return cellule.get(ATTRIBUTS_VALEUR[type_valeur])
+
+    texte = '\n'.join(_texte_paragraphe(p) for p in cellule.findall(PARAGRAPHE))
+    return texte or None
+
+
+def _lire_ligne(ligne, colonnes, derniere_colonne):
+    """
+    Extrait les colonnes demandées d'un élément table:table-row, ou toutes les
+    cellules jusqu'à la dernière cellule remplie si colonnes vaut None.
+    """
+    if colonnes is None:
+        valeurs = []
+        cellules_vides_en_attente = 0
+        for cellule in ligne:
+            if cellule.tag not in (CELLULE, CELLULE_MASQUEE):
+                continue
+            repetitions = int(cellule.get(COLONNES_REPETEES, 1))
+            valeur = valeur_cellule(cellule)
+            if valeur is None:
+                cellules_vides_en_attente += repetitions
+                continue
+            valeurs.extend([None] * cellules_vides_en_attente)
+            cellules_vides_en_attente = 0
+            valeurs.extend([valeur] * repetitions)
+        return tuple(valeurs)
+
+    valeurs = {}
+    position = 0
+    for cellule in ligne:
+        if cellule.tag not in (CELLULE, CELLULE_MASQUEE):
+            continue
+        repetitions = int(cellule.get(COLONNES_REPETEES, 1))
+        fin = position + repetitions
+        if any(position <= colonne < fin for colonne in colonnes):
+            valeur = valeur_cellule(cellule)
+            for colonne in colonnes:
+                if position <= colonne < fin:
+                    valeurs[colonne] = valeur
+        position = fin
+        if position > derniere_colonne:
+            break
+    return tuple(valeurs.get(colonne) for colonne in colonnes)
+
+
+def iterer_lignes_ods(fichier_path, colonnes=(0, 1), feuille=0):
+    """
+    Génère les lignes d'une feuille .ods, réduites aux colonnes demandées.
+
+    Les lignes vides répétées en fin de feuille (LibreOffice en déclare souvent
+    plus d'un million) ne sont pas produites ; les lignes vides situées entre
+    deux lignes remplies le sont, pour conserver la numérotation.
+
+    Args:
+        fichier_path: Chemin du fichier .ods (ou objet fichier)
+        colonnes: Indices des colonnes à extraire (0 = colonne A), ou None pour
+                  toutes les cellules jusqu'à la dernière cellule remplie de la ligne
+        feuille: Indice (à partir de 0) ou nom de la feuille
+
+    Yields:
+        tuple: Valeurs des colonnes demandées (None pour une cellule vide) ;
+               avec colonnes=None, une ligne vide est un tuple vide
+
+    Raises:
+        ValueError: Si la feuille n'existe pas
+    """
+    colonnes = tuple(colonnes) if colonnes is not None else None
+    derniere_colonne = max(colonnes) if colonnes is not None else None
+    ligne_vide = (None,) * len(colonnes) if colonnes is not None else ()
+
+    with zipfile.ZipFile(fichier_path) as archive, archive.open('content.xml') as contenu:
+        numero_table = -1
+        table = None
+        lignes_vides_en_attente = 0
+
+        for evenement, element in ET.iterparse(contenu, events=('start', 'end')):
+            if element.tag == TABLE:
+                if evenement == 'start':
+                    numero_table += 1
+                    if numero_table == feuille or element.get(NOM_TABLE) == feuille:
+                        table = element
+                elif element is table:
+                    return
+                continue
+
+            if evenement != 'end' or element.tag != LIGNE:
+                continue
+            if table is None:
+                element.clear()
+                continue
+
+            valeurs = _lire_ligne(element, colonnes, derniere_colonne)
+            repetitions = int(element.get(LIGNES_REPETEES, 1))
+
+            # Libérer la ligne traitée (et ses éventuels conteneurs de groupes de lignes)
+            element.clear()
+            del table[:]
+
+            if valeurs == ligne_vide:
+                lignes_vides_en_attente += repetitions
+                continue
+
+            for _ in range(lignes_vides_en_attente):
+                yield ligne_vide
+            lignes_vides_en_attente = 0
+            for _ in range(repetitions):
+                yield valeurs
+
+    raise ValueError(f"{fichier_path} : feuille {feuille!r} introuvable")
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture commune des fichiers tabulaires (CSV, XLSX, XLS, ODS) pour les scripts
+traiter_colle, sumup_licences et import_user_moodle.
+
+Le format est détecté d'après le contenu du fichier et non son extension. Seules
+les colonnes demandées sont conservées, et le moteur le plus rapide disponible
+est utilisé :
+    - python-calamine (lecteur en Rust) pour XLSX, XLS et ODS s'il est installé ;
+    - sinon openpyxl en lecture seule (XLSX), lecteur_ods (ODS) ou pandas (XLS) ;
+    - le lecteur C de pandas pour le CSV.
+"""
+
+import importlib.util
+import io
+import zipfile
+from pathlib import Path
+
+from lecteur_ods import iterer_lignes_ods
+
+FORMATS = ('csv', 'xlsx', 'xls', 'ods')
+
+SIGNATURE_ZIP = b'PK\x03\x04'
+SIGNATURE_OLE2 = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+SIGNATURE_LICIDX = b'LICIDX01'
+TYPE_MIME_ODS = b'application/vnd.oasis.opendocument.spreadsheet'
+
+MOTEUR_CALAMINE = 'calamine'
+MOTEUR_FLUX = 'flux'
+
+
+class ErreurFormat(ValueError):
+    """Format de fichier non reconnu ou non pris en charge."""
+
+
+class ErreurColonnes(ValueError):
+    """
+    Colonnes demandées absentes du fichier.
+
+    Attributes:
+        manquantes: Colonnes demandées introuvables
+        disponibles: Colonnes présentes dans le fichier
+    """
+
+    def __init__(self, manquantes, disponibles):
+        super().__init__(f"colonnes introuvables : {manquantes} (colonnes trouvées : {disponibles})")
+        self.manquantes = manquantes
+        self.disponibles = disponibles
+
+
+def _nom_source(source):
+    """Nom lisible d'un chemin ou d'un flux, pour les messages d'erreur."""
+    if isinstance(source, (str, Path)):
+        return str(source)
+    return getattr(source, 'name', 'flux en mémoire')
+
+
+def detecter_format(source):
+    """
+    Détecte le format d'un fichier d'après ses premiers octets.
+
+    Args:
+        source: Chemin du fichier ou flux binaire (sa position est conservée)
+
+    Returns:
+        str: 'xlsx', 'ods', 'xls', 'licidx' (index de licences) ou 'csv' (texte)
+
+    Raises:
+        ErreurFormat: Si le fichier est une archive zip qui n'est pas un classeur
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            debut = f.read(len(SIGNATURE_OLE2))
+    else:
+        position = source.tell()
+        debut = source.read(len(SIGNATURE_OLE2))
+        source.seek(position)
+
+    if debut.startswith(SIGNATURE_OLE2):
+        return 'xls'
+    if debut.startswith(SIGNATURE_LICIDX):
+        return 'licidx'
+    if not debut.startswith(SIGNATURE_ZIP):
+        return 'csv'
+
+    archive = zipfile.ZipFile(source)
+    try:
+        noms = set(archive.namelist())
+        if 'xl/workbook.xml' in noms:
+            return 'xlsx'
+        if 'content.xml' in noms and ('mimetype' not in noms or archive.read('mimetype').strip() == TYPE_MIME_ODS):
+            return 'ods'
+    finally:
+        archive.close()
+        if not isinstance(source, (str, Path)):
+            source.seek(position)
+
+    raise ErreurFormat(f"{_nom_source(source)} : archive zip qui n'est pas un classeur XLSX ou ODS")
+
+
+def calamine_disponible():
+    """Indique si le lecteur python-calamine est installé."""
+    return importlib.util.find_spec('python_calamine') is not None
+
+
+def _choisir_moteur(moteur):
+    if moteur is None:
+        return MOTEUR_CALAMINE if calamine_disponible() else MOTEUR_FLUX
+    if moteur not in (MOTEUR_CALAMINE, MOTEUR_FLUX):
+        raise ValueError(f"moteur inconnu : {moteur}")
+    return moteur
+
+
+def _normaliser_calamine(valeur):
+    """
+    Aligne une valeur lue par calamine sur openpyxl : cellule vide → None (calamine
+    renvoie une chaîne vide), nombre entier → int (calamine renvoie toujours un float).
+    """
+    if valeur == '':
+        return None
+    if isinstance(valeur, float) and valeur.is_integer():
+        return int(valeur)
+    return valeur
+
+
+def _lignes_calamine(source, feuille):
+    from python_calamine import load_workbook
+
+    classeur = load_workbook(source)
+    try:
+        if isinstance(feuille, int):
+            table = classeur.get_sheet_by_index(feuille)
+        else:
+            table = classeur.get_sheet_by_name(feuille)
+        # iter_rows() commence à la première colonne non vide : les colonnes vides
+        # de gauche sont rétablies pour que les positions restent celles de la feuille
+        decalage = (None,) * (table.start[1] if table.start else 0)
+        for ligne in table.iter_rows():
+            yield decalage + tuple(_normaliser_calamine(valeur) for valeur in ligne)
+    finally:
+        classeur.close()
+
+
+def _lignes_openpyxl(source, feuille):
+    from openpyxl import load_workbook
+
+    classeur = load_workbook(source, read_only=True, data_only=True)
+    try:
+        table = classeur.worksheets[feuille] if isinstance(feuille, int) else classeur[feuille]
+        yield from table.iter_rows(values_only=True)
+    finally:
+        classeur.close()
+
+
+def _lignes_pandas(source, feuille):
+    import pandas as pd
+
+    df = pd.read_excel(source, sheet_name=feuille, header=None)
+    yield from df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def _lignes_brutes(source, format_fichier, feuille, moteur):
+    """Lignes complètes d'une feuille de classeur, selon le moteur choisi."""
+    if moteur == MOTEUR_CALAMINE:
+        return _lignes_calamine(source, feuille)
+    if format_fichier == 'xlsx':
+        return _lignes_openpyxl(source, feuille)
+    if format_fichier == 'ods':
+        return iterer_lignes_ods(source, colonnes=None, feuille=feuille)
+    return _lignes_pandas(source, feuille)
+
+
+def _noms_entete(ligne):
+    """Noms de colonnes d'une ligne d'en-tête, nommés et dédoublonnés comme le fait pandas."""
+    noms = []
+    vus = {}
+    for position, valeur in enumerate(ligne):
+        nom = f"Unnamed: {position}" if valeur is None or valeur == '' else valeur
+        if isinstance(nom, float) and nom.is_integer():
+            nom = int(nom)
+        if nom in vus:
+            vus[nom] += 1
+            nom = f"{nom}.{vus[nom]}"
+        else:
+            vus[nom] = 0
+        noms.append(nom)
+    return noms
+
+
+def _resoudre_colonnes(noms, colonnes, entete):
+    """
+    Traduit la sélection de colonnes en positions.
+
+    Args:
+        noms: Noms des colonnes du fichier (ou positions s'il n'y a pas d'en-tête)
+        colonnes: None (toutes), fonction de filtre sur le nom, ou liste de noms/positions
+        entete: True si les noms proviennent d'une ligne d'en-tête
+
+    Returns:
+        tuple: (positions, noms retenus)
+    """
+    if colonnes is None:
+        return list(range(len(noms))), list(noms)
+
+    if callable(colonnes):
+        positions = [position for position, nom in enumerate(noms) if colonnes(nom)]
+        if not positions:
+            raise ErreurColonnes([getattr(colonnes, '__name__', 'filtre')], list(noms))
+        return positions, [noms[position] for position in positions]
+
+    positions = []
+    manquantes = []
+    for colonne in colonnes:
+        if isinstance(colonne, int) and not entete:
+            # Une position au-delà de la dernière colonne donne une colonne vide
+            positions.append(colonne)
+        elif colonne in noms:
+            positions.append(noms.index(colonne))
+        else:
+            manquantes.append(colonne)
+    if manquantes:
+        raise ErreurColonnes(manquantes, list(noms))
+    return positions, list(colonnes)
+
+
+def _selectionner(lignes, positions):
+    """Réduit chaque ligne aux positions demandées, sans produire les lignes vides finales."""
+    ligne_vide = (None,) * len(positions)
+    lignes_vides_en_attente = 0
+    for ligne in lignes:
+        largeur = len(ligne)
+        valeurs = tuple(ligne[position] if position < largeur else None for position in positions)
+        if valeurs == ligne_vide:
+            lignes_vides_en_attente += 1
+            continue
+        for _ in range(lignes_vides_en_attente):
+            yield ligne_vide
+        lignes_vides_en_attente = 0
+        yield valeurs
+
+
+def _ouvrir_classeur(source, colonnes, entete, feuille, moteur):
+    """Renvoie (noms des colonnes retenues, itérateur des lignes de données) d'un classeur."""
+    format_fichier = detecter_format(source)
+    if format_fichier not in FORMATS or format_fichier == 'csv':
+        raise ErreurFormat(f"{_nom_source(source)} : ce n'est pas un classeur XLSX, XLS ou ODS")
+
+    lignes = iter(_lignes_brutes(source, format_fichier, feuille, _choisir_moteur(moteur)))
+    if entete:
+        noms = _noms_entete(next(lignes, ()))
+    elif colonnes is None or callable(colonnes):
+        # Sans en-tête, la largeur n'est connue qu'en lisant les lignes
+        lignes = list(lignes)
+        noms = list(range(max((len(ligne) for ligne in lignes), default=0)))
+    else:
+        noms = []
+
+    positions, noms_retenus = _resoudre_colonnes(noms, colonnes, entete)
+    return noms_retenus, _selectionner(lignes, positions)
+
+
+def iterer_lignes(source, colonnes=None, entete=True, feuille=0, moteur=None):
+    """
+    Génère les lignes de données d'un classeur, réduites aux colonnes demandées.
+
+    Args:
+        source: Chemin du fichier ou flux binaire
+        colonnes: None (toutes), fonction de filtre sur le nom de colonne,
+                  ou liste de noms (avec en-tête) ou de positions (0 = colonne A)
+        entete: True si la première ligne contient les noms de colonnes
+        feuille: Indice ou nom de la feuille
+        moteur: 'calamine' ou 'flux' (par défaut, le plus rapide disponible)
+
+    Yields:
+        tuple: Valeurs des colonnes demandées (None pour une cellule vide)
+
+    Raises:
+        ErreurFormat: Si le fichier n'est pas un classeur
+        ErreurColonnes: Si des colonnes demandées sont absentes
+    """
+    _, lignes = _ouvrir_classeur(source, colonnes, entete, feuille, moteur)
+    yield from lignes
+
+
+def lire_tableau(source, colonnes=None, entete=True, feuille=0, separateur=';', moteur=None):
+    """
+    Lit un fichier CSV, XLSX, XLS ou ODS dans un DataFrame, réduit aux colonnes demandées.
+
+    Args:
+        source: Chemin du fichier ou flux binaire
+        colonnes: Voir iterer_lignes
+        entete: True si la première ligne contient les noms de colonnes
+        feuille: Indice ou nom de la feuille (classeurs uniquement)
+        separateur: Séparateur des fichiers CSV
+        moteur: Moteur de lecture des classeurs (voir iterer_lignes)
+
+    Returns:
+        DataFrame: Colonnes nommées d'après l'en-tête, ou numérotées selon leur
+                   position dans le fichier s'il n'y a pas d'en-tête
+
+    Raises:
+        ErreurFormat: Si le format n'est pas pris en charge
+        ErreurColonnes: Si des colonnes demandées sont absentes
+    """
+    import pandas as pd
+
+    if detecter_format(source) == 'csv':
+        return _lire_csv(source, colonnes, entete, separateur)
+
+    noms, lignes = _ouvrir_classeur(source, colonnes, entete, feuille, moteur)
+    return pd.DataFrame(list(lignes), columns=noms)
+
+
+def _lire_csv(source, colonnes, entete, separateur):
+    import pandas as pd
+
+    if not entete:
+        df = pd.read_csv(source, sep=separateur, header=None)
+        _, noms = _resoudre_colonnes(list(df.columns), colonnes, entete)
+        return df.reindex(columns=noms)
+
+    # En-tête lu seul d'abord, pour ne parser ensuite que les colonnes utiles
+    if isinstance(source, io.IOBase):
+        position = source.tell()
+        noms = list(pd.read_csv(source, sep=separateur, nrows=0).columns)
+        source.seek(position)
+    else:
+        noms = list(pd.read_csv(source, sep=separateur, nrows=0).columns)
+
+    _, noms_retenus = _resoudre_colonnes(noms, colonnes, entete)
+    return pd.read_csv(source, sep=separateur, usecols=noms_retenus)[noms_retenus]
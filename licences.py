@@ -0,0 +1,681 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Construction des fichiers de licences, sous forme de bibliothèque.
+
+Les numéros d'anonymat sont lus dans des classeurs dont le nom est celui de la licence
+(rangés dans des sous-dossiers ou des archives zip), classés par catégorie de routage,
+puis écrits dans un classeur et un index .licidx par catégorie.
+
+Comme colle, ce module n'écrit rien sur la console et n'arrête jamais le programme :
+chaque étape renvoie un résultat typé et les erreurs sont des exceptions dérivées de
+ErreurLicences. sumup_licences en est l'interface en ligne de commande.
+"""
+
+import io
+import json
+import os
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+
+from index_licences import chemin_index, ecrire_index_licences
+from lecture_tableaux import lire_tableau
+from mesures import etape
+
+# Nom de la colonne regroupant les numéros qui ne correspondent à aucune catégorie
+CATEGORIE_NON_ROUTES = 'non routés'
+
+# Puissances de 10 représentables en int64 (10^0 à 10^18)
+PUISSANCES_DE_10 = [10 ** exposant for exposant in range(19)]
+
+
+class ErreurLicences(Exception):
+    """Erreur de construction des fichiers de licences."""
+
+
+class ErreurDossier(ErreurLicences):
+    """Dossier source absent, ou qui n'est pas un dossier."""
+
+
+class ErreurSources(ErreurLicences):
+    """Aucun classeur, ou aucun numéro d'anonymat, dans le dossier source."""
+
+
+class ErreurDoublons(ErreurLicences):
+    """
+    Numéros présents dans plusieurs licences d'une même catégorie, refusés par l'appelant.
+
+    Attributes:
+        doublons: {catégorie: {numero: [licences]}}
+    """
+
+    def __init__(self, doublons):
+        nombre = sum(len(numeros) for numeros in doublons.values())
+        super().__init__(f"{nombre} numéro(s) en doublon dans {', '.join(doublons)}")
+        self.doublons = doublons
+
+    def __reduce__(self):
+        return type(self), (self.doublons,)
+
+
+@dataclass
+class SourceLue:
+    """
+    Numéros lus dans un classeur de licence.
+
+    Attributes:
+        nom: Chemin affiché (relatif au dossier source, archives comprises)
+        licence: Nom de la licence, ou None pour une archive illisible
+        numeros: Numéros d'anonymat uniques
+        duree: Durée de lecture en secondes
+        erreur: Exception levée par la lecture, ou None
+    """
+    nom: str
+    licence: str
+    numeros: list
+    duree: float = 0.0
+    erreur: Exception = None
+
+
+@dataclass
+class Classement:
+    """
+    Numéros classés par catégorie de routage.
+
+    Attributes:
+        routage: Catégories de routage
+        numeros: Tableau de tous les numéros lus
+        codes: Indice de catégorie de chaque numéro (-1 si non routé)
+        repartition: Tableau croisé licence x catégorie (dernière colonne : non routés)
+        df_routes: Numéros routés triés par (catégorie, licence, numéro)
+        bornes: Tranche de df_routes de chaque catégorie : bornes[i]:bornes[i + 1]
+        doublons: {catégorie: {numero: [licences]}} pour les catégories qui en ont
+        duree: Durée du classement en secondes
+    """
+    routage: list
+    numeros: object
+    codes: object
+    repartition: object
+    df_routes: object
+    bornes: object
+    doublons: dict
+    duree: float
+
+    @property
+    def comptes_categories(self):
+        """Nombre de numéros par catégorie (Series, non routés compris)."""
+        return self.repartition.sum(axis=0)
+
+    @property
+    def nb_routes(self):
+        """Nombre de numéros routés vers une catégorie."""
+        return int((self.codes >= 0).sum())
+
+    def non_routes(self, nombre=10):
+        """Premiers numéros non routés (distincts, triés)."""
+        import numpy as np
+
+        return np.unique(self.numeros[self.codes < 0])[:nombre]
+
+    def tranche(self, code):
+        """Numéros et licences routés vers la catégorie d'indice code."""
+        return self.df_routes.iloc[self.bornes[code]:self.bornes[code + 1]]
+
+
+@dataclass
+class FichierCategorie:
+    """
+    Fichiers écrits pour une catégorie.
+
+    Attributes:
+        categorie: Catégorie de routage
+        nb_etudiants: Nombre d'étudiants de la catégorie
+        fichier: Classeur écrit, ou None si la catégorie est vide
+        index: Index .licidx écrit, ou None si la catégorie est vide
+    """
+    categorie: dict
+    nb_etudiants: int
+    fichier: str = None
+    index: str = None
+
+
+@dataclass
+class ResultatLicences:
+    """
+    Résultat complet de construire_licences.
+
+    Attributes:
+        dossier: Dossier source
+        sources: Classeurs lus (SourceLue)
+        classement: Classement des numéros
+        fichiers: Fichiers écrits par catégorie (FichierCategorie)
+        durees: {'lecture', 'classement', 'ecriture', 'total'} en secondes
+    """
+    dossier: Path
+    sources: list
+    classement: Classement
+    fichiers: list
+    durees: dict = field(default_factory=dict)
+
+
+def _est_colonne_client(colonne):
+    """Colonne des numéros d'anonymat : nommée « Client » (insensible à la casse), hors « Nom client »."""
+    return 'client' in str(colonne).lower() and 'nom' not in str(colonne).lower()
+
+
+def lire_numeros_anonymat(source):
+    """
+    Lit les numéros d'anonymat d'un classeur (première colonne « Client »).
+
+    Args:
+        source: Chemin du classeur ou flux binaire en mémoire
+
+    Returns:
+        list: Numéros d'anonymat uniques (convertis en entiers)
+
+    Raises:
+        lecture_tableaux.ErreurColonnes: Si aucune colonne « Client » n'existe
+    """
+    import pandas as pd
+
+    df = lire_tableau(source, colonnes=_est_colonne_client)
+
+    # Supprimer NaN et doublons, puis convertir en entiers (pour gérer les floats comme 9245.0)
+    return [int(num) for num in df[df.columns[0]].dropna().unique() if pd.notna(num)]
+
+
+def _sources_archive(archive, nom_archive):
+    """
+    Parcourt une archive zip et génère les classeurs qu'elle contient, sans extraction sur disque.
+    Les archives imbriquées sont parcourues récursivement.
+
+    Args:
+        archive: Chemin de l'archive ou flux binaire en mémoire
+        nom_archive: Nom de l'archive à afficher dans les messages
+
+    Yields:
+        tuple: (nom_affiche, nom_licence, flux binaire du classeur) ;
+               pour une archive illisible, (nom_archive, None, exception)
+    """
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                membre = PurePosixPath(info.filename)
+                if info.is_dir() or '__MACOSX' in membre.parts or membre.name.startswith(('~$', '._')):
+                    continue
+
+                extension = membre.suffix.lower()
+                if extension not in ('.xlsx', '.zip'):
+                    continue
+
+                nom_affiche = f"{nom_archive}/{info.filename}"
+                donnees = io.BytesIO(zf.read(info))
+
+                if extension == '.xlsx':
+                    yield nom_affiche, membre.stem.upper(), donnees
+                else:
+                    yield from _sources_archive(donnees, nom_affiche)
+    except zipfile.BadZipFile as e:
+        yield nom_archive, None, e
+
+
+def decouvrir_sources(dossier):
+    """
+    Parcourt récursivement un dossier et génère les classeurs de licences au fur et à mesure.
+
+    Les fichiers .xlsx sont renvoyés par leur chemin, ceux contenus dans des archives .zip
+    sous forme de flux en mémoire. Comme il s'agit d'un générateur, l'extraction des
+    numéros commence dès le premier classeur trouvé, avant la fin du parcours.
+
+    Args:
+        dossier: Chemin (Path) du dossier racine
+
+    Yields:
+        tuple: (nom_affiche, nom_licence, source) où source est un Path ou un flux binaire ;
+               pour une archive illisible, nom_licence est None et source l'exception
+    """
+    for racine, sous_dossiers, fichiers in os.walk(dossier):
+        sous_dossiers.sort()
+        for nom in sorted(fichiers):
+            # Ignorer les fichiers de verrouillage d'Excel
+            if nom.startswith('~$'):
+                continue
+
+            chemin = Path(racine) / nom
+            nom_affiche = str(chemin.relative_to(dossier))
+            extension = chemin.suffix.lower()
+
+            if extension == '.xlsx':
+                yield nom_affiche, chemin.stem.upper(), chemin
+            elif extension == '.zip':
+                yield from _sources_archive(chemin, nom_affiche)
+
+
+def verifier_dossier(dossier_source):
+    """
+    Vérifie le dossier source.
+
+    Returns:
+        Path: Le dossier
+
+    Raises:
+        ErreurDossier: Si le dossier n'existe pas ou n'est pas un dossier
+    """
+    dossier = Path(dossier_source)
+    if not dossier.exists():
+        raise ErreurDossier(f"Le dossier '{dossier}' n'existe pas.")
+    if not dossier.is_dir():
+        raise ErreurDossier(f"'{dossier}' n'est pas un dossier.")
+    return dossier
+
+
+def lire_sources(dossier):
+    """
+    Lit les numéros d'anonymat de chaque classeur du dossier, au fur et à mesure de la découverte.
+    Le nom du fichier, sans extension, est le nom de la licence.
+
+    Args:
+        dossier: Dossier source (voir decouvrir_sources)
+
+    Yields:
+        SourceLue: Un classeur lu ; une lecture en échec a une liste de numéros vide et une erreur
+    """
+    for nom_affiche, nom_licence, source in decouvrir_sources(dossier):
+        if nom_licence is None:
+            yield SourceLue(nom_affiche, None, [], erreur=source)
+            continue
+
+        debut = time.perf_counter()
+        with etape(f'lecture:{nom_affiche}') as mesure:
+            try:
+                numeros = lire_numeros_anonymat(source)
+                erreur = None
+            except Exception as e:
+                numeros, erreur = [], e
+            mesure.lignes = len(numeros)
+        yield SourceLue(nom_affiche, nom_licence, numeros, round(time.perf_counter() - debut, 4), erreur)
+
+
+def routage_par_defaut(fichier_sortie_17="licences_1_7.xlsx", fichier_sortie_9="licences_9.xlsx"):
+    """
+    Construit le routage historique : numéros commençant par 1 ou 7, et numéros commençant par 9.
+
+    Args:
+        fichier_sortie_17: Nom du fichier de sortie pour les numéros commençant par 1 ou 7
+        fichier_sortie_9: Nom du fichier de sortie pour les numéros commençant par 9
+
+    Returns:
+        list: Liste des catégories de routage
+    """
+    return [
+        {'nom': '1_7', 'description': 'numéros 1 et 7', 'fichier': fichier_sortie_17,
+         'prefixes': ['1', '7'], 'plages': []},
+        {'nom': '9', 'description': 'numéros 9', 'fichier': fichier_sortie_9,
+         'prefixes': ['9'], 'plages': []},
+    ]
+
+
+def charger_routage(fichier_config):
+    """
+    Charge une configuration de routage depuis un fichier JSON.
+
+    Format attendu :
+        {"categories": [
+            {"nom": "1_7", "fichier": "licences_1_7.xlsx", "prefixes": ["1", "7"]},
+            {"nom": "8", "fichier": "licences_8.xlsx", "plages": [[8000, 8999]]}
+        ]}
+
+    Une catégorie peut combiner préfixes et plages (bornes incluses, nombres entiers).
+    Si un numéro
+    correspond à plusieurs catégories, la première dans l'ordre du fichier l'emporte.
+
+    Args:
+        fichier_config: Chemin vers le fichier JSON
+
+    Returns:
+        list: Liste des catégories de routage
+
+    Raises:
+        ValueError: Si la configuration est invalide
+    """
+    with open(fichier_config, encoding='utf-8') as f:
+        config = json.load(f)
+
+    categories = config.get('categories') if isinstance(config, dict) else None
+    if not categories or not isinstance(categories, list):
+        raise ValueError("la configuration doit contenir une liste 'categories' non vide")
+
+    routage = []
+    noms = set()
+    for i, categorie in enumerate(categories, 1):
+        if not isinstance(categorie, dict):
+            raise ValueError(f"catégorie n°{i} : objet {{\"nom\": ..., ...}} attendu, pas {categorie!r}")
+        nom = str(categorie.get('nom', '')).strip()
+        if not nom:
+            raise ValueError(f"catégorie n°{i} : le champ 'nom' est obligatoire")
+        if nom in noms:
+            raise ValueError(f"catégorie '{nom}' définie plusieurs fois")
+        if nom == CATEGORIE_NON_ROUTES:
+            raise ValueError(f"le nom de catégorie '{CATEGORIE_NON_ROUTES}' est réservé")
+        noms.add(nom)
+
+        fichier = categorie.get('fichier') or f"licences_{nom}.xlsx"
+        if not isinstance(fichier, str):
+            raise ValueError(f"catégorie '{nom}' : le champ 'fichier' doit être un chemin, pas {fichier!r}")
+
+        for champ in ('prefixes', 'plages'):
+            if not isinstance(categorie.get(champ, []), list):
+                raise ValueError(f"catégorie '{nom}' : le champ '{champ}' doit être une liste")
+
+        prefixes = [str(prefixe).strip() for prefixe in categorie.get('prefixes', [])]
+        for prefixe in prefixes:
+            if not prefixe.isdigit() or prefixe[0] == '0':
+                raise ValueError(f"catégorie '{nom}' : préfixe invalide '{prefixe}'")
+
+        plages = []
+        for plage in categorie.get('plages', []):
+            if not (isinstance(plage, list) and len(plage) == 2
+                    and all(isinstance(borne, int) and not isinstance(borne, bool) for borne in plage)
+                    and plage[0] <= plage[1]):
+                raise ValueError(f"catégorie '{nom}' : plage invalide {plage!r} "
+                                 f"(attendu [début, fin], deux entiers avec début ≤ fin)")
+            plages.append((plage[0], plage[1]))
+
+        if not prefixes and not plages:
+            raise ValueError(f"catégorie '{nom}' : aucun préfixe ni aucune plage définis")
+
+        routage.append({
+            'nom': nom,
+            'description': categorie.get('description', f"catégorie {nom}"),
+            'fichier': fichier,
+            'prefixes': prefixes,
+            'plages': plages,
+        })
+
+    return routage
+
+
+def classer_numeros(numeros, routage):
+    """
+    Attribue une catégorie de routage à chaque numéro d'anonymat.
+
+    Le classement se fait par arithmétique entière sur le tableau complet :
+    le nombre de chiffres est obtenu par recherche dans les puissances de 10,
+    et le préfixe par division entière.
+
+    Args:
+        numeros: Tableau (ou liste) d'entiers
+        routage: Liste des catégories de routage
+
+    Returns:
+        np.ndarray: Indice de catégorie pour chaque numéro (-1 si non routé)
+    """
+    import numpy as np
+
+    numeros = np.asarray(numeros, dtype=np.int64)
+    codes = np.full(numeros.shape, -1, dtype=np.int64)
+    puissances = np.array(PUISSANCES_DE_10, dtype=np.int64)
+
+    # Nombre de chiffres de chaque numéro (0 pour les numéros négatifs ou nuls)
+    nb_chiffres = np.searchsorted(puissances, numeros, side='right')
+
+    for code, categorie in enumerate(routage):
+        correspond = np.zeros(numeros.shape, dtype=bool)
+
+        for prefixe in categorie['prefixes']:
+            longueur = len(prefixe)
+            decalage = np.maximum(nb_chiffres - longueur, 0)
+            correspond |= (nb_chiffres >= longueur) & (numeros // puissances[decalage] == int(prefixe))
+
+        for borne_min, borne_max in categorie['plages']:
+            correspond |= (numeros >= borne_min) & (numeros <= borne_max)
+
+        # La première catégorie qui correspond l'emporte
+        codes[correspond & (codes == -1)] = code
+
+    return codes
+
+
+def classer_licences(sources, routage):
+    """
+    Classe les numéros lus par catégorie de routage et repère les doublons.
+
+    Args:
+        sources: Classeurs lus (SourceLue)
+        routage: Liste des catégories de routage
+
+    Returns:
+        Classement: Répartition, numéros routés triés et doublons
+
+    Raises:
+        ErreurSources: Si aucun classeur n'a été lu, ou s'ils ne contiennent aucun numéro
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not any(source.licence is not None for source in sources):
+        raise ErreurSources("Aucun fichier .xlsx trouvé dans le dossier (ni dans ses sous-dossiers ou archives zip)")
+    numeros_par_fichier = [(source.licence, np.asarray(source.numeros, dtype=np.int64))
+                           for source in sources if source.numeros]
+    if not numeros_par_fichier:
+        raise ErreurSources("Aucun étudiant trouvé dans les fichiers.")
+
+    debut = time.perf_counter()
+
+    # Tableaux à plat : numéro, indice de licence, indice de catégorie
+    noms_licences = np.array(sorted({nom for nom, _ in numeros_par_fichier}), dtype=object)
+    indice_licence = {nom: i for i, nom in enumerate(noms_licences)}
+    numeros = np.concatenate([tableau for _, tableau in numeros_par_fichier])
+    licences = np.concatenate([
+        np.full(len(tableau), indice_licence[nom], dtype=np.int64) for nom, tableau in numeros_par_fichier
+    ])
+    codes = classer_numeros(numeros, routage)
+
+    # Tableau croisé licence x catégorie, la dernière colonne regroupant les numéros non routés
+    nb_categories = len(routage)
+    noms_categories = [categorie['nom'] for categorie in routage] + [CATEGORIE_NON_ROUTES]
+    repartition = pd.crosstab(
+        pd.Categorical.from_codes(licences, noms_licences),
+        pd.Categorical.from_codes(np.where(codes < 0, nb_categories, codes), noms_categories),
+        rownames=['Licence'], colnames=['Catégorie'], dropna=False
+    ).reindex(index=noms_licences, columns=noms_categories, fill_value=0)
+
+    # Un seul tri (catégorie, licence, numéro) : chaque catégorie devient une tranche contiguë
+    routes = codes >= 0
+    ordre = np.lexsort((numeros[routes], licences[routes], codes[routes]))
+    codes_tries = codes[routes][ordre]
+    df_routes = pd.DataFrame({
+        'Numéro Anonymat': numeros[routes][ordre],
+        'Licence': noms_licences[licences[routes][ordre]],
+    })
+    bornes = np.searchsorted(codes_tries, np.arange(nb_categories + 1))
+
+    # Un doublon est un même numéro présent plusieurs fois dans une même catégorie
+    en_doublon = pd.MultiIndex.from_arrays([codes_tries, df_routes['Numéro Anonymat']]).duplicated(keep=False)
+    doublons = {}
+    for code, categorie in enumerate(routage):
+        tranche = slice(bornes[code], bornes[code + 1])
+        df_doublons = df_routes[tranche][en_doublon[tranche]]
+        if not df_doublons.empty:
+            doublons[categorie['nom']] = {
+                int(numero): list(licences_doublon)
+                for numero, licences_doublon in df_doublons.groupby('Numéro Anonymat')['Licence']
+            }
+
+    return Classement(routage, numeros, codes, repartition, df_routes, bornes, doublons,
+                      time.perf_counter() - debut)
+
+
+def _ecrire_feuille_statistiques(writer, repartition, df_categories, df_fichiers):
+    """
+    Ajoute la feuille "Statistiques" à un classeur de licences en cours d'écriture.
+
+    Args:
+        writer: pd.ExcelWriter ouvert
+        repartition: Tableau croisé licence x catégorie
+        df_categories: Effectifs et doublons par catégorie
+        df_fichiers: Numéros et durée de lecture par fichier source
+    """
+    tableau = repartition.copy()
+    tableau['Total'] = tableau.sum(axis=1)
+    tableau.loc['TOTAL'] = tableau.sum(axis=0)
+
+    tableau.to_excel(writer, sheet_name='Statistiques')
+    ligne = len(tableau) + 3
+    df_categories.to_excel(writer, sheet_name='Statistiques', startrow=ligne, index=False)
+    ligne += len(df_categories) + 3
+    df_fichiers.to_excel(writer, sheet_name='Statistiques', startrow=ligne, index=False)
+
+
+def _tableau_categories(classement):
+    """Effectifs et doublons par catégorie (non routés compris)."""
+    import pandas as pd
+
+    routage = classement.routage
+    return pd.DataFrame({
+        'Catégorie': [categorie['nom'] for categorie in routage] + [CATEGORIE_NON_ROUTES],
+        'Fichier': [categorie['fichier'] for categorie in routage] + [''],
+        'Numéros': classement.comptes_categories.to_numpy(),
+        'Numéros en doublon': [len(classement.doublons.get(categorie['nom'], {})) for categorie in routage] + [0],
+    })
+
+
+def _tableau_fichiers(sources):
+    """Numéros et durée de lecture par classeur lu."""
+    import pandas as pd
+
+    return pd.DataFrame([
+        {'Fichier': source.nom, 'Licence': source.licence, 'Numéros': len(source.numeros),
+         'Durée lecture (s)': source.duree}
+        for source in sources if source.licence is not None
+    ])
+
+
+def ecrire_fichiers_licences(classement, sources):
+    """
+    Écrit, pour chaque catégorie non vide, le classeur des licences (liste des étudiants
+    puis feuille « Statistiques ») et son index binaire .licidx.
+
+    Args:
+        classement: Classement renvoyé par classer_licences
+        sources: Classeurs lus, pour la feuille « Statistiques »
+
+    Returns:
+        list: Un FichierCategorie par catégorie, dans l'ordre du routage
+    """
+    import pandas as pd
+
+    df_categories = _tableau_categories(classement)
+    df_fichiers = _tableau_fichiers(sources)
+
+    # Écrire toutes les catégories en un seul passage sur le tableau trié
+    fichiers = []
+    for code, categorie in enumerate(classement.routage):
+        df_categorie = classement.tranche(code)
+        if df_categorie.empty:
+            fichiers.append(FichierCategorie(categorie, 0))
+            continue
+        # La liste des étudiants reste la première feuille, lue par traiter_colle
+        with etape(f"fichier:{categorie['nom']}", lignes=len(df_categorie)):
+            with pd.ExcelWriter(categorie['fichier'], engine='openpyxl') as writer:
+                df_categorie.to_excel(writer, index=False)
+                _ecrire_feuille_statistiques(writer, classement.repartition, df_categories, df_fichiers)
+
+        # Index binaire compact, lu directement par traiter_colle
+        fichier_index = chemin_index(categorie['fichier'])
+        with etape(f"index:{categorie['nom']}", lignes=len(df_categorie)):
+            ecrire_index_licences(fichier_index, df_categorie['Numéro Anonymat'], df_categorie['Licence'])
+        fichiers.append(FichierCategorie(categorie, len(df_categorie), categorie['fichier'], str(fichier_index)))
+    return fichiers
+
+
+def ecrire_resume(resultat, fichier_resume):
+    """
+    Écrit le résumé JSON d'une construction (volumétrie et coût de chaque exécution),
+    lisible par les outils de suivi.
+
+    Args:
+        resultat: ResultatLicences
+        fichier_resume: Chemin du fichier JSON
+    """
+    classement = resultat.classement
+    resume = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'dossier_source': str(Path(resultat.dossier).absolute()),
+        'total_numeros': int(len(classement.numeros)),
+        'total_routes': classement.nb_routes,
+        'durees_s': {nom: round(duree, 4) for nom, duree in resultat.durees.items()},
+        'categories': [
+            {
+                'nom': ligne['Catégorie'],
+                'fichier': ligne['Fichier'] or None,
+                'numeros': int(ligne['Numéros']),
+                'numeros_en_doublon': int(ligne['Numéros en doublon']),
+            }
+            for ligne in _tableau_categories(classement).to_dict('records')
+        ],
+        'licences': {
+            licence: {
+                'total': int(ligne.sum()),
+                'categories': {nom: int(nombre) for nom, nombre in ligne.items()},
+            }
+            for licence, ligne in classement.repartition.iterrows()
+        },
+        'fichiers': [
+            {
+                'fichier': source.nom,
+                'licence': source.licence,
+                'numeros': len(source.numeros),
+                'duree_lecture_s': source.duree,
+            }
+            for source in resultat.sources if source.licence is not None
+        ],
+    }
+    with open(fichier_resume, 'w', encoding='utf-8') as f:
+        json.dump(resume, f, ensure_ascii=False, indent=2)
+
+
+def construire_licences(dossier_source, routage=None, fichier_resume="resume_licences.json", garder_doublons=True):
+    """
+    Construit les fichiers de licences d'un dossier en une seule fois.
+
+    Args:
+        dossier_source: Dossier contenant les classeurs (sous-dossiers et archives zip compris)
+        routage: Liste des catégories de routage (par défaut : numéros 1/7 et 9)
+        fichier_resume: Fichier JSON de résumé, ou None pour ne pas l'écrire
+        garder_doublons: Si False, lève ErreurDoublons au lieu d'écrire des fichiers avec doublons
+
+    Returns:
+        ResultatLicences: Sources lues, classement et fichiers écrits
+
+    Raises:
+        ErreurDossier: Si le dossier source est invalide
+        ErreurSources: Si le dossier ne contient aucun classeur ou aucun numéro
+        ErreurDoublons: Si garder_doublons est False et qu'il y a des doublons
+    """
+    debut = time.perf_counter()
+    if routage is None:
+        routage = routage_par_defaut()
+
+    dossier = verifier_dossier(dossier_source)
+    sources = list(lire_sources(dossier))
+    classement = classer_licences(sources, routage)
+    duree_lecture = time.perf_counter() - debut - classement.duree
+    if classement.doublons and not garder_doublons:
+        raise ErreurDoublons(classement.doublons)
+
+    debut_ecriture = time.perf_counter()
+    fichiers = ecrire_fichiers_licences(classement, sources)
+    resultat = ResultatLicences(dossier, sources, classement, fichiers, {
+        'lecture': duree_lecture,
+        'classement': classement.duree,
+        'ecriture': time.perf_counter() - debut_ecriture,
+        'total': time.perf_counter() - debut,
+    })
+
+    if fichier_resume:
+        ecrire_resume(resultat, fichier_resume)
+    return resultat
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure des étapes d'un traitement : durée, temps CPU, pic de mémoire et nombre de lignes.
+
+Les modules de traitement entourent chaque étape de « with mesures.etape(nom) » ; tant
+que les mesures ne sont pas activées, etape() renvoie un contexte vide partagé et ne
+coûte qu'un appel de fonction. Les scripts les activent avec --rapport (rapport JSON
+écrit en fin d'exécution, y compris en cas d'arrêt sur erreur) et --profil (profil
+cProfile, lisible avec « python -m pstats »).
+
+Le pic de mémoire est mesuré par tracemalloc, qui ralentit l'exécution tant que les
+mesures sont actives ; les étapes imbriquées sont nommées « parent/enfant ».
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+
+class Etape:
+    """
+    Mesures d'une étape.
+
+    Attributes:
+        nom: Nom complet (« parent/enfant » pour une étape imbriquée)
+        lignes: Nombre de lignes traitées, renseigné par l'appelant (ou None)
+    """
+
+    __slots__ = ('nom', 'lignes', 'duree', 'cpu', 'memoire_debut', 'memoire_pic')
+
+    def __init__(self, nom, lignes=None):
+        self.nom = nom
+        self.lignes = lignes
+        self.duree = self.cpu = 0.0
+        self.memoire_debut = self.memoire_pic = 0
+
+    def description(self):
+        """Mesures de l'étape, pour le rapport JSON."""
+        description = {
+            'etape': self.nom,
+            'duree_s': round(self.duree, 6),
+            'cpu_s': round(self.cpu, 6),
+            'memoire_debut_o': self.memoire_debut,
+            'memoire_pic_o': self.memoire_pic,
+        }
+        if self.lignes is not None:
+            description['lignes'] = int(self.lignes)
+        return description
+
+
+# Contexte renvoyé quand les mesures sont désactivées : l'attribut lignes est accepté et ignoré
+_ETAPE_INACTIVE = Etape('')
+_CONTEXTE_INACTIF = nullcontext(_ETAPE_INACTIVE)
+
+
+class Mesures:
+    """Enregistreur des étapes d'une exécution (un seul par processus : mesures.mesures)."""
+
+    def __init__(self):
+        self.actif = False
+        self.etapes = []
+        self.pile = []
+        self.profileur = None
+        self.debut = None
+
+    def activer(self, fichier_rapport=None, fichier_profil=None, commande=None):
+        """
+        Active les mesures ; le rapport et le profil sont écrits à la fin du processus.
+
+        Args:
+            fichier_rapport: Fichier JSON du rapport, ou None
+            fichier_profil: Fichier du profil cProfile, ou None
+            commande: Nom de la commande, repris dans le rapport
+        """
+        self.actif = True
+        self.etapes = []
+        self.commande = commande or os.path.basename(sys.argv[0])
+        self.date = datetime.now().isoformat(timespec='seconds')
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.debut = (time.perf_counter(), time.process_time())
+        if fichier_profil:
+            import cProfile
+
+            self.profileur = cProfile.Profile()
+            self.profileur.enable()
+        atexit.register(self.terminer, fichier_rapport, fichier_profil)
+
+    def etape(self, nom, lignes=None):
+        """
+        Contexte mesurant une étape.
+
+        Args:
+            nom: Nom de l'étape
+            lignes: Nombre de lignes traitées, s'il est connu d'avance
+
+        Returns:
+            Context manager renvoyant l'Etape (dont l'attribut lignes peut être renseigné)
+        """
+        if not self.actif:
+            return _CONTEXTE_INACTIF
+        return self._mesurer(nom, lignes)
+
+    @contextmanager
+    def _mesurer(self, nom, lignes):
+        if self.pile:
+            nom = f"{self.pile[-1].nom}/{nom}"
+        etape = Etape(nom, lignes)
+
+        # Le pic atteint jusqu'ici appartient aux étapes englobantes, avant sa remise à zéro
+        etape.memoire_debut, pic = tracemalloc.get_traced_memory()
+        for englobante in self.pile:
+            englobante.memoire_pic = max(englobante.memoire_pic, pic)
+        tracemalloc.reset_peak()
+
+        self.pile.append(etape)
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield etape
+        finally:
+            etape.duree = time.perf_counter() - debut
+            etape.cpu = time.process_time() - debut_cpu
+            pic = tracemalloc.get_traced_memory()[1]
+            self.pile.pop()
+            etape.memoire_pic = max(etape.memoire_pic, pic)
+            for englobante in self.pile:
+                englobante.memoire_pic = max(englobante.memoire_pic, etape.memoire_pic)
+            self.etapes.append(etape)
+
+    def rapport(self):
+        """
+        Rapport de l'exécution.
+
+        Returns:
+            dict: Commande, totaux et mesures de chaque étape (dans l'ordre de fin)
+        """
+        debut, debut_cpu = self.debut
+        pic = max([tracemalloc.get_traced_memory()[1]] + [etape.memoire_pic for etape in self.etapes])
+        return {
+            'commande': self.commande,
+            'date': self.date,
+            'python': sys.version.split()[0],
+            'duree_s': round(time.perf_counter() - debut, 6),
+            'cpu_s': round(time.process_time() - debut_cpu, 6),
+            'memoire_pic_o': pic,
+            'etapes': [etape.description() for etape in self.etapes],
+        }
+
+    def terminer(self, fichier_rapport=None, fichier_profil=None):
+        """Arrête les mesures et écrit le rapport et le profil demandés."""
+        if not self.actif:
+            return
+        if self.profileur is not None:
+            self.profileur.disable()
+            self.profileur.dump_stats(fichier_profil)
+            self.profileur = None
+        if fichier_rapport:
+            with open(fichier_rapport, 'w', encoding='utf-8') as f:
+                json.dump(self.rapport(), f, ensure_ascii=False, indent=2)
+        tracemalloc.stop()
+        self.actif = False
+
+
+mesures = Mesures()
+etape = mesures.etape
+
+
+def ajouter_options(parser):
+    """Ajoute les options --rapport et --profil à un analyseur argparse."""
+    parser.add_argument('--rapport', metavar='JSON',
+                        help="écrire un rapport des étapes (durée, CPU, pic de mémoire, lignes) dans un fichier JSON")
+    parser.add_argument('--profil', metavar='FICHIER',
+                        help="écrire un profil cProfile de l'exécution (lisible avec python -m pstats)")
+
+
+def activer_depuis_options(args, commande=None):
+    """Active les mesures si --rapport ou --profil est donné."""
+    if args.rapport or args.profil:
+        mesures.activer(args.rapport, args.profil, commande)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Point d'entrée unique des outils en ligne de commande.
+
+    python outils.py <commande> [arguments...]
+
+Chaque commande correspond à un script existant, importé seulement quand la
+commande est lancée : « python outils.py --help » ne charge ni pandas ni numpy,
+et tkinter n'est chargé que si un dialogue de sélection de fichier est ouvert.
+Avec --temps, le temps de démarrage (import du module de la commande) et le temps
+d'exécution sont affichés à la fin, avec les bibliothèques lourdes chargées.
+"""
+
+import time
+
+DEBUT = time.perf_counter()
+
+import argparse
+import importlib
+import sys
+
+# Commande → (module, description)
+COMMANDES = {
+    'colle': ('traiter_colle', "répartir les notes d'une colle par licence"),
+    'licences': ('sumup_licences', "construire les fichiers de licences à partir des fichiers par licence"),
+    'moodle-users': ('import_user_moodle', "convertir une liste d'étudiants en CSV d'import Moodle"),
+    'questions': ('importer_questions', "importer des questions dans la banque de questions Moodle"),
+    'service': ('service_colle', "lancer le service HTTP local de traitement des colles"),
+    'surveiller': ('surveillance_colle', "traiter automatiquement les fichiers de notes déposés dans un dossier"),
+}
+
+# Bibliothèques dont le chargement est signalé par --temps
+MODULES_LOURDS = ['pandas', 'numpy', 'openpyxl', 'python_calamine', 'tkinter']
+
+
+def afficher_temps(debut_commande, fin_import):
+    """Affiche les temps de démarrage et d'exécution, et les bibliothèques lourdes chargées."""
+    fin = time.perf_counter()
+    charges = [module for module in MODULES_LOURDS if module in sys.modules]
+    print(f"\n⏱  Démarrage  : {(debut_commande - DEBUT) * 1000:.1f} ms", file=sys.stderr)
+    print(f"⏱  Import     : {(fin_import - debut_commande) * 1000:.1f} ms", file=sys.stderr)
+    print(f"⏱  Exécution  : {(fin - fin_import) * 1000:.1f} ms", file=sys.stderr)
+    print(f"⏱  Total      : {(fin - DEBUT) * 1000:.1f} ms", file=sys.stderr)
+    print(f"📦 Chargés    : {', '.join(charges) if charges else 'aucune bibliothèque lourde'}", file=sys.stderr)
+
+
+def main(argv=None):
+    """Fonction principale."""
+    liste_commandes = '\n'.join(f"  {nom:<14} {description}" for nom, (_, description) in COMMANDES.items())
+    parser = argparse.ArgumentParser(
+        prog="python outils.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Outils CREM en ligne de commande",
+        epilog=f"""Commandes :
+{liste_commandes}
+
+Aide d'une commande : python outils.py <commande> --help"""
+    )
+    parser.add_argument('--temps', action='store_true',
+                        help="afficher le temps de démarrage et d'exécution (sur la sortie d'erreur)")
+    parser.add_argument('commande', choices=COMMANDES, metavar='commande', help="commande à lancer (voir ci-dessous)")
+    parser.add_argument('arguments', nargs=argparse.REMAINDER, help="arguments de la commande")
+    args = parser.parse_args(argv)
+
+    nom_module, _ = COMMANDES[args.commande]
+    debut_commande = time.perf_counter()
+    module = importlib.import_module(nom_module)
+    fin_import = time.perf_counter()
+
+    try:
+        module.main(args.arguments, prog=f"python outils.py {args.commande}")
+    finally:
+        if args.temps:
+            afficher_temps(debut_commande, fin_import)
+
+
+if __name__ == "__main__":
+    main()
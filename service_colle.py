@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Service HTTP local de traitement des colles.
+
+Les pages web traiter-colle et sumup-licences font tout le calcul dans le navigateur,
+ce qui ne tient pas en mémoire sur les grosses promotions. Ce service reçoit le fichier
+de notes et le fichier des licences, place le traitement dans une file bornée servie
+par un pool de processus, et renvoie le classeur de résultats en flux.
+
+Chaque processus du pool garde en mémoire les modules importés et les derniers
+fichiers de licences lus (identifiés par l'empreinte SHA-256 de leur contenu) : un
+même fichier de licences envoyé plusieurs fois n'est analysé qu'une fois par processus.
+
+Routes :
+    POST   /licences               corps : fichier des licences → {"licences": empreinte}
+    POST   /jobs                   multipart : notes, licences (ou licences_id), groupes (JSON), sortie
+    POST   /jobs?attendre=1        idem, et renvoie directement le classeur
+    GET    /jobs/<id>              état du traitement
+    GET    /jobs/<id>/resultat     classeur de résultats
+    DELETE /jobs/<id>              supprime le traitement et ses fichiers
+    GET    /metriques              file d'attente, traitements et latences (JSON)
+    GET    /sante                  vérification de disponibilité
+
+Exemple sur la machine locale :
+    python service_colle.py --port 8000
+    curl -F notes=@notes.csv -F licences=@licences_1_7.licidx \\
+         -F 'groupes={"Groupe A": ["LAS1", "PASS"]}' \\
+         'http://localhost:8000/jobs?attendre=1' -o resultats.xlsx
+"""
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+
+# Taille maximale d'une requête (fichiers compris)
+TAILLE_MAX_REQUETE = 64 * 1024 * 1024
+
+# Fichiers de licences gardés en mémoire par processus
+LICENCES_EN_CACHE = 8
+
+# Durée de conservation des traitements terminés (secondes)
+DUREE_CONSERVATION = 3600
+
+# Nombre de durées conservées pour le calcul des percentiles
+ECHANTILLONS_LATENCE = 1000
+
+# Identifiant d'un fichier de licences : empreinte SHA-256 en hexadécimal
+MOTIF_EMPREINTE = re.compile(r'[0-9a-f]{64}')
+
+# Caractères remplacés dans les noms de fichiers fournis par le client (le nom du
+# classeur revient dans l'en-tête Content-Disposition)
+CARACTERES_INTERDITS = re.compile(r'[^\w.-]+')
+MOTIF_EXTENSION = re.compile(r'\.[a-z0-9]{1,8}')
+
+# Relances d'un traitement interrompu par la mort d'un processus du pool
+RELANCES_MAX = 1
+
+TAILLE_BLOC = 64 * 1024
+TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Cache des licences du processus courant : empreinte → {numero: licence}
+_licences_en_cache = OrderedDict()
+
+
+def _initialiser_processus():
+    """Importe les bibliothèques lourdes au démarrage du processus, avant le premier traitement."""
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    import colle  # noqa: F401
+
+
+def _licences(chemin, empreinte):
+    """
+    Renvoie les licences d'un fichier, depuis le cache du processus si possible.
+
+    Returns:
+        tuple: (dict_licences, True si le cache a servi)
+    """
+    import colle
+
+    if empreinte in _licences_en_cache:
+        _licences_en_cache.move_to_end(empreinte)
+        return _licences_en_cache[empreinte], True
+
+    dict_licences = colle.lire_licences(chemin)
+    _licences_en_cache[empreinte] = dict_licences
+    if len(_licences_en_cache) > LICENCES_EN_CACHE:
+        _licences_en_cache.popitem(last=False)
+    return dict_licences, False
+
+
+def traiter_job(fichier_notes, fichier_licences, empreinte_licences, groupes, fichier_sortie):
+    """
+    Traite une colle dans un processus du pool : lecture, répartition par licence
+    et écriture du classeur. Les étudiants absents du fichier des licences vont dans
+    la feuille « Sans Licence ».
+
+    Args:
+        fichier_notes: Chemin du fichier de notes
+        fichier_licences: Chemin du fichier des licences
+        empreinte_licences: Empreinte du fichier des licences (clé du cache)
+        groupes: dict {'Groupe A': [licences], ...}
+        fichier_sortie: Chemin du classeur à écrire
+
+    Returns:
+        dict: Bilan du traitement (chemin, feuilles, effectifs, cache, durée)
+
+    Raises:
+        colle.ErreurColle: Si un fichier est invalide ou si l'écriture échoue
+    """
+    import colle
+
+    debut = time.perf_counter()
+    notes = colle.lire_notes(fichier_notes)
+    dict_licences, cache = _licences(fichier_licences, empreinte_licences)
+    repartition = colle.organiser_donnees(notes.notes, dict_licences)
+    sortie = colle.creer_fichier_sortie(repartition.etudiants_par_licence, notes.taux_reussite, fichier_sortie,
+                                        groupes, repartition.etudiants_ignores)
+    return {
+        'chemin': sortie.chemin,
+        'feuilles': sortie.feuilles,
+        'groupes_non_crees': sortie.groupes_non_crees,
+        'notes': len(notes.notes),
+        'sans_licence': len(repartition.etudiants_ignores),
+        'erreurs_validation': notes.erreurs,
+        'cache_licences': cache,
+        'pid': os.getpid(),
+        'duree_s': round(time.perf_counter() - debut, 4),
+    }
+
+
+class ErreurRequete(Exception):
+    """Requête invalide : renvoyée au client avec son code HTTP."""
+
+    def __init__(self, message, statut=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.statut = statut
+
+
+@dataclass
+class Job:
+    """
+    Traitement soumis au service.
+
+    Attributes:
+        id: Identifiant
+        dossier: Dossier de travail (fichiers reçus et résultat)
+        parametres: Arguments de traiter_job
+        etat: 'en_attente', 'en_cours', 'termine' ou 'echec'
+        soumis, debut, fin: Horodatages (time.monotonic)
+        bilan: Bilan renvoyé par traiter_job
+        erreur: Message d'erreur en cas d'échec
+    """
+    id: str
+    dossier: Path
+    parametres: tuple
+    etat: str = 'en_attente'
+    soumis: float = field(default_factory=time.monotonic)
+    debut: float = None
+    fin: float = None
+    bilan: dict = None
+    erreur: str = None
+    termine: threading.Event = field(default_factory=threading.Event)
+
+    def description(self):
+        """État du traitement, pour les réponses JSON."""
+        description = {'id': self.id, 'etat': self.etat}
+        if self.debut is not None:
+            description['attente_s'] = round(self.debut - self.soumis, 4)
+        if self.fin is not None:
+            description['traitement_s'] = round(self.fin - self.debut, 4)
+        if self.bilan is not None:
+            description['bilan'] = {cle: valeur for cle, valeur in self.bilan.items() if cle != 'chemin'}
+            description['resultat'] = f"/jobs/{self.id}/resultat"
+        if self.erreur is not None:
+            description['erreur'] = self.erreur
+        return description
+
+
+def nom_fichier_sur(nom, defaut):
+    """
+    Nom de base (sans dossier ni extension) d'un nom de fichier fourni par le client,
+    réduit aux lettres, chiffres, « _ », « - » et « . » : ni séparateur de chemin, ni
+    guillemet, ni retour à la ligne.
+    """
+    nom = CARACTERES_INTERDITS.sub('_', Path(nom.replace('\\', '/')).stem).strip('._')
+    return nom[:100] or defaut
+
+
+def _percentiles(durees):
+    """Moyenne, p50, p95 et maximum d'une série de durées (secondes)."""
+    if not durees:
+        return {'nombre': 0}
+    triees = sorted(durees)
+    rang = lambda p: triees[min(len(triees) - 1, int(p * len(triees)))]
+    return {
+        'nombre': len(triees),
+        'moyenne_s': round(sum(triees) / len(triees), 4),
+        'p50_s': round(rang(0.50), 4),
+        'p95_s': round(rang(0.95), 4),
+        'max_s': round(triees[-1], 4),
+    }
+
+
+class ServiceColle:
+    """
+    File d'attente bornée et pool de processus.
+
+    Un thread de distribution par processus prend les traitements dans la file et les
+    confie au pool : la profondeur de la file et le nombre de traitements en cours
+    sont donc connus exactement. Si un processus meurt (mémoire épuisée, signal), le
+    pool est recréé et le traitement interrompu relancé une fois.
+    """
+
+    def __init__(self, dossier, nb_processus=None, taille_file=None, duree_conservation=DUREE_CONSERVATION):
+        self.dossier = Path(dossier)
+        (self.dossier / 'licences').mkdir(parents=True, exist_ok=True)
+        (self.dossier / 'jobs').mkdir(exist_ok=True)
+        self.nb_processus = nb_processus or os.cpu_count() or 1
+        self.duree_conservation = duree_conservation
+        self.file = queue.Queue(maxsize=taille_file or 4 * self.nb_processus)
+        self.pool = self._creer_pool()
+        self.jobs = {}
+        self.verrou = threading.Lock()
+        self.demarrage = time.monotonic()
+        self.compteurs = {'soumis': 0, 'termines': 0, 'echecs': 0, 'refuses': 0, 'cache_licences': 0,
+                          'pools_recrees': 0}
+        self.en_cours = 0
+        self.latences = {nom: deque(maxlen=ECHANTILLONS_LATENCE) for nom in ('attente', 'traitement', 'total')}
+
+        for _ in range(self.nb_processus):
+            threading.Thread(target=self._distribuer, daemon=True).start()
+
+    def _creer_pool(self):
+        """Pool de processus, modules lourds importés au démarrage de chaque processus."""
+        return ProcessPoolExecutor(max_workers=self.nb_processus, initializer=_initialiser_processus)
+
+    def _remplacer_pool(self, pool):
+        """Remplace un pool cassé, sauf si un autre thread de distribution l'a déjà fait."""
+        with self.verrou:
+            if self.pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = self._creer_pool()
+                self.compteurs['pools_recrees'] += 1
+
+    def _executer(self, job):
+        """
+        Exécute un traitement dans le pool. Un pool cassé par la mort d'un de ses
+        processus n'accepte plus rien : il est remplacé et le traitement relancé.
+
+        Raises:
+            BrokenProcessPool: Si le traitement casse encore le pool après RELANCES_MAX relances
+        """
+        for relance in range(RELANCES_MAX + 1):
+            with self.verrou:
+                pool = self.pool
+            try:
+                return pool.submit(traiter_job, *job.parametres).result()
+            except BrokenProcessPool:
+                self._remplacer_pool(pool)
+                if relance == RELANCES_MAX:
+                    raise
+
+    def enregistrer_licences(self, contenu):
+        """
+        Enregistre un fichier de licences sous l'empreinte de son contenu.
+
+        Returns:
+            str: Empreinte SHA-256 (identifiant du fichier)
+        """
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        chemin = self.dossier / 'licences' / empreinte
+        if not chemin.exists():
+            temporaire = chemin.with_suffix('.tmp')
+            temporaire.write_bytes(contenu)
+            temporaire.replace(chemin)
+        return empreinte
+
+    def soumettre(self, notes, nom_notes, empreinte_licences, groupes, nom_sortie):
+        """
+        Place un traitement dans la file.
+
+        Returns:
+            Job: Le traitement créé
+
+        Raises:
+            ErreurRequete: Si l'empreinte des licences est invalide ou inconnue, ou si la file est pleine
+        """
+        # L'empreinte devient un nom de fichier : rien d'autre qu'un condensat hexadécimal
+        if not MOTIF_EMPREINTE.fullmatch(empreinte_licences):
+            raise ErreurRequete("licences_id invalide : empreinte SHA-256 attendue (64 caractères hexadécimaux)")
+        fichier_licences = self.dossier / 'licences' / empreinte_licences
+        if not fichier_licences.is_file():
+            raise ErreurRequete(f"fichier de licences inconnu : {empreinte_licences}", HTTPStatus.NOT_FOUND)
+
+        self._nettoyer()
+        job_id = uuid.uuid4().hex
+        dossier_job = self.dossier / 'jobs' / job_id
+        dossier_job.mkdir()
+        extension = Path(nom_notes).suffix.lower()
+        fichier_notes = dossier_job / f"notes{extension if MOTIF_EXTENSION.fullmatch(extension) else ''}"
+        fichier_notes.write_bytes(notes)
+        fichier_sortie = dossier_job / f"{nom_fichier_sur(nom_sortie, 'resultats')}.xlsx"
+
+        job = Job(job_id, dossier_job, (str(fichier_notes), str(fichier_licences), empreinte_licences,
+                                         groupes, str(fichier_sortie)))
+        with self.verrou:
+            try:
+                self.file.put_nowait(job)
+            except queue.Full:
+                self.compteurs['refuses'] += 1
+                shutil.rmtree(dossier_job, ignore_errors=True)
+                raise ErreurRequete("file d'attente pleine, réessayez plus tard",
+                                    HTTPStatus.SERVICE_UNAVAILABLE) from None
+            self.jobs[job_id] = job
+            self.compteurs['soumis'] += 1
+        return job
+
+    def _distribuer(self):
+        """Boucle d'un thread de distribution : un traitement à la fois vers le pool."""
+        import colle
+
+        while True:
+            job = self.file.get()
+            with self.verrou:
+                job.etat = 'en_cours'
+                job.debut = time.monotonic()
+                self.en_cours += 1
+            try:
+                bilan = self._executer(job)
+                etat, erreur = 'termine', None
+            except BrokenProcessPool:
+                bilan, etat, erreur = None, 'echec', "processus de traitement interrompu (mémoire épuisée ?)"
+            except colle.ErreurColle as e:
+                bilan, etat, erreur = None, 'echec', str(e)
+            except Exception as e:
+                bilan, etat, erreur = None, 'echec', f"{type(e).__name__} : {e}"
+
+            with self.verrou:
+                job.fin = time.monotonic()
+                job.bilan, job.etat, job.erreur = bilan, etat, erreur
+                self.en_cours -= 1
+                self.compteurs['termines' if etat == 'termine' else 'echecs'] += 1
+                if bilan and bilan['cache_licences']:
+                    self.compteurs['cache_licences'] += 1
+                self.latences['attente'].append(job.debut - job.soumis)
+                self.latences['traitement'].append(job.fin - job.debut)
+                self.latences['total'].append(job.fin - job.soumis)
+            job.termine.set()
+
+    def job(self, job_id):
+        """Traitement d'identifiant donné, ou ErreurRequete 404."""
+        with self.verrou:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise ErreurRequete(f"traitement inconnu : {job_id}", HTTPStatus.NOT_FOUND)
+        return job
+
+    def supprimer(self, job_id):
+        """Supprime un traitement terminé et ses fichiers."""
+        job = self.job(job_id)
+        if not job.termine.is_set():
+            raise ErreurRequete("traitement en cours", HTTPStatus.CONFLICT)
+        with self.verrou:
+            self.jobs.pop(job_id, None)
+        shutil.rmtree(job.dossier, ignore_errors=True)
+
+    def _nettoyer(self):
+        """Supprime les traitements terminés depuis plus de duree_conservation secondes."""
+        limite = time.monotonic() - self.duree_conservation
+        with self.verrou:
+            expires = [job for job in self.jobs.values() if job.fin is not None and job.fin < limite]
+            for job in expires:
+                del self.jobs[job.id]
+        for job in expires:
+            shutil.rmtree(job.dossier, ignore_errors=True)
+
+    def metriques(self):
+        """Profondeur de file, traitements en cours, compteurs et latences."""
+        with self.verrou:
+            return {
+                'disponible_depuis_s': round(time.monotonic() - self.demarrage, 1),
+                'processus': self.nb_processus,
+                'file': {'profondeur': self.file.qsize(), 'capacite': self.file.maxsize},
+                'en_cours': self.en_cours,
+                'compteurs': dict(self.compteurs),
+                'latences': {nom: _percentiles(durees) for nom, durees in self.latences.items()},
+            }
+
+    def arreter(self):
+        """Arrête le pool de processus."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def lire_formulaire(type_contenu, corps):
+    """
+    Décode un corps multipart/form-data.
+
+    Returns:
+        dict: {nom du champ: (nom de fichier ou None, contenu en octets)}
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {type_contenu}\r\n\r\n".encode('latin-1') + corps
+    )
+    if not message.is_multipart():
+        raise ErreurRequete("corps multipart/form-data attendu")
+
+    champs = {}
+    for partie in message.iter_parts():
+        nom = partie.get_param('name', header='content-disposition')
+        if nom:
+            champs[nom] = (partie.get_filename(), partie.get_payload(decode=True) or b'')
+    return champs
+
+
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    """Routes HTTP du service (voir la documentation du module)."""
+
+    server_version = "ServiceColle/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if self.server.journal:
+            sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+    def _repondre_json(self, donnees, statut=HTTPStatus.OK, entetes=None):
+        corps = json.dumps(donnees, ensure_ascii=False, indent=2).encode('utf-8')
+        self.send_response(statut)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _repondre_fichier(self, chemin):
+        """Envoie un classeur par blocs, sans le charger en mémoire."""
+        chemin = Path(chemin)
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', TYPE_XLSX)
+        self.send_header('Content-Length', str(chemin.stat().st_size))
+        # Nom ASCII entre guillemets pour les anciens clients, nom exact encodé (RFC 6266)
+        nom_ascii = chemin.name.encode('ascii', 'replace').decode('ascii').replace('?', '_').replace('"', '_')
+        self.send_header('Content-Disposition',
+                         f'attachment; filename="{nom_ascii}"; filename*=UTF-8\'\'{quote(chemin.name)}')
+        self.end_headers()
+        with open(chemin, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, TAILLE_BLOC)
+
+    def _lire_corps(self):
+        longueur = self.headers.get('Content-Length')
+        if longueur is None:
+            raise ErreurRequete("en-tête Content-Length manquant", HTTPStatus.LENGTH_REQUIRED)
+        try:
+            longueur = int(longueur)
+        except ValueError:
+            longueur = -1
+        # Dans les deux cas d'erreur le corps n'est pas lu : la connexion ne peut pas resservir
+        if longueur < 0:
+            self.close_connection = True
+            raise ErreurRequete("en-tête Content-Length invalide")
+        if longueur > self.server.taille_max:
+            self.close_connection = True
+            raise ErreurRequete("requête trop volumineuse", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        return self.rfile.read(longueur)
+
+    def _traiter(self, methode):
+        url = urlsplit(self.path)
+        morceaux = [morceau for morceau in url.path.split('/') if morceau]
+        try:
+            if methode == 'GET' and morceaux == ['sante']:
+                self._repondre_json({'etat': 'ok'})
+            elif methode == 'GET' and morceaux == ['metriques']:
+                self._repondre_json(self.service.metriques())
+            elif methode == 'POST' and morceaux == ['licences']:
+                empreinte = self.service.enregistrer_licences(self._lire_corps())
+                self._repondre_json({'licences': empreinte}, HTTPStatus.CREATED)
+            elif methode == 'POST' and morceaux == ['jobs']:
+                self._soumettre(parse_qs(url.query))
+            elif methode == 'GET' and len(morceaux) == 2 and morceaux[0] == 'jobs':
+                self._repondre_json(self.service.job(morceaux[1]).description())
+            elif methode == 'GET' and len(morceaux) == 3 and morceaux[0] == 'jobs' and morceaux[2] == 'resultat':
+                self._envoyer_resultat(self.service.job(morceaux[1]))
+            elif methode == 'DELETE' and len(morceaux) == 2 and morceaux[0] == 'jobs':
+                self.service.supprimer(morceaux[1])
+                self.send_response(HTTPStatus.NO_CONTENT)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            else:
+                raise ErreurRequete(f"route inconnue : {methode} {url.path}", HTTPStatus.NOT_FOUND)
+        except ErreurRequete as e:
+            entetes = {'Retry-After': '5'} if e.statut == HTTPStatus.SERVICE_UNAVAILABLE else None
+            self._repondre_json({'erreur': str(e)}, e.statut, entetes)
+
+    def _soumettre(self, parametres):
+        champs = lire_formulaire(self.headers.get('Content-Type', ''), self._lire_corps())
+        if 'notes' not in champs:
+            raise ErreurRequete("champ 'notes' manquant")
+
+        if 'licences' in champs:
+            empreinte = self.service.enregistrer_licences(champs['licences'][1])
+        elif 'licences_id' in champs:
+            empreinte = champs['licences_id'][1].decode('ascii', 'replace').strip().lower()
+        else:
+            raise ErreurRequete("champ 'licences' ou 'licences_id' manquant")
+
+        groupes = {}
+        if 'groupes' in champs:
+            try:
+                groupes = json.loads(champs['groupes'][1])
+            except ValueError as e:
+                raise ErreurRequete(f"champ 'groupes' : JSON invalide ({e})") from None
+            from colle import ErreurGroupes, valider_groupes
+
+            try:
+                groupes = valider_groupes(groupes)
+            except ErreurGroupes as e:
+                raise ErreurRequete(f"champ 'groupes' : {e}") from None
+
+        nom_notes = champs['notes'][0] or 'notes'
+        nom_sortie = champs['sortie'][1].decode('utf-8', 'replace') if 'sortie' in champs else 'resultats.xlsx'
+        job = self.service.soumettre(champs['notes'][1], nom_notes, empreinte, groupes, nom_sortie)
+
+        if parametres.get('attendre', ['0'])[0] not in ('', '0'):
+            job.termine.wait()
+            self._envoyer_resultat(job)
+        else:
+            self._repondre_json(job.description(), HTTPStatus.ACCEPTED, {'Location': f"/jobs/{job.id}"})
+
+    def _envoyer_resultat(self, job):
+        if not job.termine.is_set():
+            raise ErreurRequete("traitement non terminé", HTTPStatus.CONFLICT)
+        if job.etat == 'echec':
+            raise ErreurRequete(job.erreur, HTTPStatus.UNPROCESSABLE_ENTITY)
+        self._repondre_fichier(job.bilan['chemin'])
+
+    def do_GET(self):
+        self._traiter('GET')
+
+    def do_POST(self):
+        self._traiter('POST')
+
+    def do_DELETE(self):
+        self._traiter('DELETE')
+
+
+def creer_serveur(hote, port, service, taille_max=TAILLE_MAX_REQUETE, journal=True):
+    """
+    Crée le serveur HTTP (un thread par connexion) adossé au service.
+
+    Returns:
+        ThreadingHTTPServer: Serveur prêt pour serve_forever()
+    """
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireRequetes)
+    serveur.daemon_threads = True
+    serveur.service = service
+    serveur.taille_max = taille_max
+    serveur.journal = journal
+    return serveur
+
+
+def entier_positif(texte):
+    """
+    Convertit un argument en entier strictement positif (type argparse)
+    """
+    try:
+        valeur = int(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"nombre entier attendu : {texte}")
+    if valeur <= 0:
+        raise argparse.ArgumentTypeError(f"nombre strictement positif attendu : {texte}")
+    return valeur
+
+
+def main(argv=None, prog=None):
+    """Fonction principale."""
+    parser = argparse.ArgumentParser(
+        prog=prog or "python service_colle.py",
+        description="Service HTTP local de traitement des colles"
+    )
+    parser.add_argument('--hote', default='127.0.0.1', help="adresse d'écoute (défaut : 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8000, help="port d'écoute (défaut : 8000)")
+    parser.add_argument('--processus', type=entier_positif, help="processus de traitement (défaut : nombre de cœurs)")
+    parser.add_argument('--file', type=entier_positif, help="traitements en attente au maximum (défaut : 4 par processus)")
+    parser.add_argument('--dossier', help="dossier de travail (défaut : dossier temporaire)")
+    parser.add_argument('--taille-max', type=entier_positif, default=TAILLE_MAX_REQUETE // (1024 * 1024),
+                        help=f"taille maximale d'une requête en Mio (défaut : {TAILLE_MAX_REQUETE // (1024 * 1024)})")
+    parser.add_argument('--conservation', type=int, default=DUREE_CONSERVATION,
+                        help=f"durée de conservation des résultats en secondes (défaut : {DUREE_CONSERVATION})")
+    args = parser.parse_args(argv)
+
+    dossier = args.dossier or tempfile.mkdtemp(prefix='service_colle_')
+    service = ServiceColle(dossier, args.processus, args.file, args.conservation)
+    serveur = creer_serveur(args.hote, args.port, service, args.taille_max * 1024 * 1024)
+
+    print(f"🚀 Service de traitement des colles sur http://{args.hote}:{args.port}")
+    print(f"   {service.nb_processus} processus, file de {service.file.maxsize} traitement(s)")
+    print(f"   📁 Dossier de travail : {dossier}")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹ Arrêt du service")
+    finally:
+        serveur.server_close()
+        service.arreter()
+
+
+if __name__ == "__main__":
+    main()
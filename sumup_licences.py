@@ -3,232 +3,248 @@
 """
 Script pour construire un fichier Excel avec les numéros d'anonymat et licences
 à partir de plusieurs fichiers xlsx dont le nom correspond à la licence.
+Les fichiers peuvent être rangés dans des sous-dossiers ou dans des archives zip.
 """
 
-import pandas as pd
-import os
+import argparse
 import sys
-from pathlib import Path
+import time
 
+from journal import ajouter_options, compter, configurer_depuis_options, detailler, obtenir_journal, resumer_compteurs
+from lecture_tableaux import ErreurColonnes
+from licences import (CATEGORIE_NON_ROUTES, ErreurLicences, ResultatLicences, charger_routage, classer_licences,
+                      ecrire_fichiers_licences, ecrire_resume, lire_sources, routage_par_defaut, verifier_dossier)
+import mesures
+from mesures import etape
 
-def extraire_numeros_anonymat(fichier_path):
-    """
-    Extrait les numéros d'anonymat d'un fichier Excel.
-    
-    Args:
-        fichier_path: Chemin vers le fichier Excel
-        
-    Returns:
-        list: Liste des numéros d'anonymat uniques (convertis en entiers)
-    """
-    try:
-        # Lire le fichier avec header
-        df = pd.read_excel(fichier_path, header=0)
-        
-        # Chercher la colonne qui contient les numéros d'anonymat
-        # On cherche une colonne nommée "Client" ou contenant "client" (insensible à la casse)
-        colonne_client = None
-        for col in df.columns:
-            if 'client' in str(col).lower() and 'nom' not in str(col).lower():
-                colonne_client = col
-                break
-        
-        if colonne_client is None:
-            print(f"  ⚠ Attention : Colonne 'Client' non trouvée dans {fichier_path.name}")
-            print(f"     Colonnes disponibles : {df.columns.tolist()}")
-            return []
-        
-        # Extraire les numéros d'anonymat (supprimer NaN et doublons)
-        numeros = df[colonne_client].dropna().unique()
-        
-        # Convertir en entiers (pour gérer les floats comme 9245.0)
-        numeros = [int(num) for num in numeros if pd.notna(num)]
-        
-        return numeros
-        
-    except Exception as e:
-        print(f"  ✗ Erreur lors de la lecture de {fichier_path.name} : {e}")
-        return []
+journal = obtenir_journal('sumup_licences')
+
+# Libellés des anomalies comptées pendant le traitement
+ANOMALIES = {
+    'source_illisible': "fichier(s) illisible(s)",
+    'source_sans_numero': "fichier(s) sans numéro",
+    'numero_non_route': "numéro(s) non routé(s)",
+    'doublon': "numéro(s) en doublon",
+}
 
 
-def construire_fichier_licences(dossier_source, fichier_sortie_17="licences_1_7.xlsx", fichier_sortie_9="licences_9.xlsx"):
+def _afficher_erreur_lecture(nom_fichier, erreur):
+    """Affiche l'erreur de lecture d'un classeur de licence."""
+    if isinstance(erreur, ErreurColonnes):
+        journal.warning(f"  ⚠ Attention : Colonne 'Client' non trouvée dans {nom_fichier}")
+        journal.info(f"     Colonnes disponibles : {erreur.disponibles}")
+    else:
+        journal.error(f"  ✗ Erreur lors de la lecture de {nom_fichier} : {erreur}")
+
+
+def construire_fichier_licences(dossier_source, fichier_sortie_17="licences_1_7.xlsx", fichier_sortie_9="licences_9.xlsx",
+                                routage=None, fichier_resume="resume_licences.json", interactif=True):
     """
-    Construit deux fichiers Excel avec les numéros d'anonymat et licences.
-    Un fichier pour les numéros commençant par 1 ou 7, un autre pour ceux commençant par 9.
-    
+    Construit un fichier Excel par catégorie avec les numéros d'anonymat et licences.
+    Par défaut, un fichier pour les numéros commençant par 1 ou 7, un autre pour ceux commençant par 9.
+
+    Interface console de licences.construire_licences : chaque étape est affichée, et
+    l'utilisateur choisit de garder ou non les doublons (gardés sans question si interactif est faux).
+
     Args:
-        dossier_source: Chemin du dossier contenant les fichiers xlsx
+        dossier_source: Chemin du dossier contenant les fichiers xlsx (sous-dossiers et archives zip compris)
         fichier_sortie_17: Nom du fichier de sortie pour les numéros commençant par 1 ou 7
         fichier_sortie_9: Nom du fichier de sortie pour les numéros commençant par 9
+        routage: Liste des catégories de routage (voir charger_routage).
+                 Si None, utilise le routage historique 1/7 et 9.
+        fichier_resume: Nom du fichier JSON de résumé (statistiques et durées), ou None pour ne pas l'écrire
+        interactif: False pour ne poser aucune question (lancement avec un dossier en argument)
     """
-    print("=" * 70)
-    print("Construction des fichiers des licences")
-    print("=" * 70)
-    print()
-    
-    # Convertir en Path
-    dossier = Path(dossier_source)
+    if routage is None:
+        routage = routage_par_defaut(fichier_sortie_17, fichier_sortie_9)
     
-    # Vérifier que le dossier existe
-    if not dossier.exists():
-        print(f"✗ Erreur : Le dossier '{dossier}' n'existe pas.")
-        sys.exit(1)
-    
-    if not dossier.is_dir():
-        print(f"✗ Erreur : '{dossier}' n'est pas un dossier.")
-        sys.exit(1)
-    
-    # Trouver tous les fichiers .xlsx dans le dossier
-    fichiers_xlsx = list(dossier.glob("*.xlsx"))
+    debut = time.perf_counter()
+
+    journal.info("=" * 70)
+    journal.info("Construction des fichiers des licences")
+    journal.info("=" * 70)
+    journal.info("")
     
-    if not fichiers_xlsx:
-        print(f"✗ Aucun fichier .xlsx trouvé dans le dossier '{dossier}'")
+    try:
+        dossier = verifier_dossier(dossier_source)
+    except ErreurLicences as e:
+        journal.error(f"✗ Erreur : {e}")
         sys.exit(1)
     
-    print(f"📁 Dossier source : {dossier.absolute()}")
-    print(f"📊 {len(fichiers_xlsx)} fichier(s) .xlsx trouvé(s)")
-    print()
-    print("-" * 70)
-    print("Traitement des fichiers...")
-    print("-" * 70)
-    print()
+    journal.info(f"📁 Dossier source : {dossier.absolute()}")
+    journal.info(f"🔀 {len(routage)} catégorie(s) de routage : {', '.join(c['nom'] for c in routage)}")
+    journal.info("")
+    journal.info("-" * 70)
+    journal.info("Traitement des fichiers...")
+    journal.info("-" * 70)
+    journal.info("")
     
-    # Listes pour stocker les étudiants par catégorie
-    etudiants_1_7 = []  # Numéros commençant par 1 ou 7
-    etudiants_9 = []     # Numéros commençant par 9
-    stats_licences = {}
-    stats_par_categorie = {'1_7': {}, '9': {}}
-    
-    # Parcourir chaque fichier
-    for fichier in sorted(fichiers_xlsx):
-        # Le nom du fichier (sans extension) est le nom de la licence
-        nom_licence = fichier.stem.upper()
-        
-        print(f"📄 Traitement de : {fichier.name}")
-        print(f"   Licence : {nom_licence}")
+    # Traiter chaque classeur dès qu'il est découvert
+    sources = []
+    with etape('lecture_sources') as mesure:
+        for source in lire_sources(dossier):
+            sources.append(source)
+            if source.licence is None:
+                compter('source_illisible')
+                journal.error(f"  ✗ Archive illisible {source.nom} : {source.erreur}")
+                journal.info("")
+                continue
         
-        # Extraire les numéros d'anonymat
-        numeros = extraire_numeros_anonymat(fichier)
+            journal.info(f"📄 Traitement de : {source.nom}")
+            journal.info(f"   Licence : {source.licence}")
+            if source.erreur is not None:
+                compter('source_illisible')
+                _afficher_erreur_lecture(source.nom, source.erreur)
         
-        if numeros:
-            print(f"   ✓ {len(numeros)} numéro(s) d'anonymat trouvé(s)")
-            
-            # Compter par catégorie
-            count_1_7 = 0
-            count_9 = 0
-            
-            # Répartir par catégorie selon le premier chiffre
-            for numero in numeros:
-                premier_chiffre = str(numero)[0]
-                
-                if premier_chiffre in ['1', '7']:
-                    etudiants_1_7.append({
-                        'Numéro Anonymat': numero,
-                        'Licence': nom_licence
-                    })
-                    count_1_7 += 1
-                elif premier_chiffre == '9':
-                    etudiants_9.append({
-                        'Numéro Anonymat': numero,
-                        'Licence': nom_licence
-                    })
-                    count_9 += 1
-            
-            stats_licences[nom_licence] = len(numeros)
-            stats_par_categorie['1_7'][nom_licence] = count_1_7
-            stats_par_categorie['9'][nom_licence] = count_9
-            
-            print(f"      → {count_1_7} numéro(s) commençant par 1 ou 7")
-            print(f"      → {count_9} numéro(s) commençant par 9")
-        else:
-            print(f"   ⚠ Aucun numéro d'anonymat trouvé")
+            if source.numeros:
+                journal.info(f"   ✓ {len(source.numeros)} numéro(s) d'anonymat trouvé(s)")
+            else:
+                compter('source_sans_numero', source.erreur is None)
+                journal.warning(f"   ⚠ Aucun numéro d'anonymat trouvé")
         
-        print()
+            journal.info("")
+        mesure.lignes = sum(len(source.numeros) for source in sources)
     
-    # Vérifier qu'on a des données
-    if not etudiants_1_7 and not etudiants_9:
-        print("✗ Aucun étudiant trouvé dans les fichiers.")
+    nb_fichiers = sum(source.licence is not None for source in sources)
+    if nb_fichiers:
+        journal.info(f"📊 {nb_fichiers} fichier(s) .xlsx traité(s)")
+        journal.info("")
+    
+    try:
+        with etape('classement') as mesure:
+            classement = classer_licences(sources, routage)
+            mesure.lignes = len(classement.numeros)
+    except ErreurLicences as e:
+        journal.error(f"✗ {e}")
         sys.exit(1)
+    duree_lecture = time.perf_counter() - debut - classement.duree
+    comptes_categories = classement.comptes_categories
     
-    print("=" * 70)
-    print("Vérification des doublons...")
-    print("=" * 70)
-    print()
+    journal.info("=" * 70)
+    journal.info("Répartition par catégorie")
+    journal.info("=" * 70)
+    journal.info("")
+    for categorie in routage:
+        journal.info(f"  • {categorie['nom']:<15} : {comptes_categories[categorie['nom']]:>5} numéro(s)  → {categorie['fichier']}")
+    journal.info(f"  • {CATEGORIE_NON_ROUTES:<15} : {comptes_categories[CATEGORIE_NON_ROUTES]:>5} numéro(s)")
     
-    # Fonction pour vérifier les doublons
-    def verifier_doublons(etudiants, categorie):
-        if not etudiants:
-            return True
-        
-        df = pd.DataFrame(etudiants)
-        doublons = df[df.duplicated(subset=['Numéro Anonymat'], keep=False)]
-        
-        if not doublons.empty:
-            print(f"⚠ ATTENTION : Doublons dans la catégorie {categorie} :")
-            for numero in doublons['Numéro Anonymat'].unique():
-                licences = df[df['Numéro Anonymat'] == numero]['Licence'].tolist()
-                print(f"  Numéro {numero} : {', '.join(licences)}")
-            print()
-            return False
-        return True
+    compter('numero_non_route', int(comptes_categories[CATEGORIE_NON_ROUTES]))
+    if comptes_categories[CATEGORIE_NON_ROUTES]:
+        exemples = classement.non_routes()
+        journal.warning(f"    ⚠ Exemples de numéros non routés : {', '.join(str(n) for n in exemples)}")
+    journal.info("")
     
-    doublons_ok = True
-    doublons_ok = verifier_doublons(etudiants_1_7, "numéros 1 et 7") and doublons_ok
-    doublons_ok = verifier_doublons(etudiants_9, "numéros 9") and doublons_ok
+    journal.info("=" * 70)
+    journal.info("Vérification des doublons...")
+    journal.info("=" * 70)
+    journal.info("")
     
-    if not doublons_ok:
+    for categorie in routage:
+        doublons = classement.doublons.get(categorie['nom'])
+        if not doublons:
+            continue
+        compter('doublon', len(doublons))
+        journal.warning(f"⚠ ATTENTION : {len(doublons)} doublon(s) dans la catégorie {categorie['description']} :")
+        detailler(journal, [{'categorie': categorie['nom'], 'numero': numero, 'licences': licences_doublon}
+                            for numero, licences_doublon in doublons.items()],
+                  lambda doublon: f"  Numéro {doublon['numero']} : {', '.join(doublon['licences'])}",
+                  'doublon')
+        journal.info("")
+    
+    if classement.doublons and not interactif:
+        journal.warning("⚠ Doublons conservés (mode non interactif)")
+        journal.info("")
+    elif classement.doublons:
         reponse = input("Voulez-vous continuer et garder tous les doublons ? (o/n) : ").lower()
         if reponse != 'o':
-            print("Traitement annulé.")
+            journal.info("Traitement annulé.")
             sys.exit(0)
-        print()
+        journal.info("")
     
-    # Créer et sauvegarder le fichier pour les numéros 1 et 7
-    if etudiants_1_7:
-        df_1_7 = pd.DataFrame(etudiants_1_7)
-        df_1_7 = df_1_7.sort_values(['Licence', 'Numéro Anonymat'])
-        df_1_7.to_excel(fichier_sortie_17, index=False, engine='openpyxl')
-        print(f"✓ Fichier '{fichier_sortie_17}' créé avec {len(df_1_7)} étudiants (numéros 1 et 7)")
-    else:
-        print(f"⚠ Aucun étudiant avec numéro commençant par 1 ou 7")
+    debut_ecriture = time.perf_counter()
+    with etape('ecriture', lignes=classement.nb_routes):
+        fichiers = ecrire_fichiers_licences(classement, sources)
+    for fichier in fichiers:
+        categorie = fichier.categorie
+        if fichier.fichier is None:
+            journal.warning(f"⚠ Aucun étudiant dans la catégorie {categorie['description']}")
+            continue
+        journal.info(f"✓ Fichier '{fichier.fichier}' créé avec {fichier.nb_etudiants} étudiants ({categorie['description']})")
+        journal.info(f"  ↳ Index '{fichier.index}' créé")
+    duree_ecriture = time.perf_counter() - debut_ecriture
     
-    # Créer et sauvegarder le fichier pour les numéros 9
-    if etudiants_9:
-        df_9 = pd.DataFrame(etudiants_9)
-        df_9 = df_9.sort_values(['Licence', 'Numéro Anonymat'])
-        df_9.to_excel(fichier_sortie_9, index=False, engine='openpyxl')
-        print(f"✓ Fichier '{fichier_sortie_9}' créé avec {len(df_9)} étudiants (numéros 9)")
-    else:
-        print(f"⚠ Aucun étudiant avec numéro commençant par 9")
+    if fichier_resume:
+        ecrire_resume(ResultatLicences(dossier, sources, classement, fichiers, {
+            'lecture': duree_lecture,
+            'classement': classement.duree,
+            'ecriture': duree_ecriture,
+            'total': time.perf_counter() - debut,
+        }), fichier_resume)
+        journal.info(f"✓ Résumé '{fichier_resume}' créé")
     
     # Afficher les statistiques détaillées
-    print()
-    print("=" * 70)
-    print("STATISTIQUES DÉTAILLÉES")
-    print("=" * 70)
-    print()
-    print(f"📊 Total d'étudiants : {len(etudiants_1_7) + len(etudiants_9)}")
-    print()
-    print("Répartition globale par licence :")
-    for licence in sorted(stats_licences.keys()):
-        total = stats_licences[licence]
-        count_1_7 = stats_par_categorie['1_7'].get(licence, 0)
-        count_9 = stats_par_categorie['9'].get(licence, 0)
-        print(f"  • {licence:<15} : {total:>3} total  ({count_1_7:>3} dans 1/7, {count_9:>3} dans 9)")
+    journal.info("")
+    journal.info("=" * 70)
+    journal.info("STATISTIQUES DÉTAILLÉES")
+    journal.info("=" * 70)
+    journal.info("")
+    journal.info(f"📊 Total d'étudiants : {classement.nb_routes}")
+    journal.info("")
+    journal.info("Répartition globale par licence :")
+    for licence, ligne in classement.repartition.iterrows():
+        details = ", ".join(f"{ligne[categorie['nom']]:>3} dans {categorie['nom']}" for categorie in routage)
+        if ligne[CATEGORIE_NON_ROUTES]:
+            details += f", {ligne[CATEGORIE_NON_ROUTES]:>3} non routés"
+        journal.info(f"  • {licence:<15} : {ligne.sum():>3} total  ({details})")
     
-    print()
-    print(f"📄 Fichier 1/7 : {len(etudiants_1_7)} étudiants")
-    print(f"📄 Fichier 9   : {len(etudiants_9)} étudiants")
-    print()
-    print("=" * 70)
+    journal.info("")
+    for categorie in routage:
+        journal.info(f"📄 Fichier {categorie['nom']:<6}: {comptes_categories[categorie['nom']]} étudiants")
+    journal.warning(f"⚠ Non routés   : {comptes_categories[CATEGORIE_NON_ROUTES]} numéro(s)")
+    resumer_compteurs(journal, ANOMALIES)
+    journal.info("")
+    journal.info("=" * 70)
+
 
+def main(argv=None, prog=None):
+    """
+    Fonction principale.
+
+    Sans argument, le dossier et les fichiers de sortie sont demandés interactivement ;
+    avec un dossier en argument, les options (ou leurs valeurs par défaut) sont utilisées
+    et aucune question n'est posée : les doublons éventuels sont gardés.
+    """
+    parser = argparse.ArgumentParser(
+        prog=prog or "python sumup_licences.py",
+        description="Construction des fichiers de licences à partir des fichiers xlsx par licence"
+    )
+    parser.add_argument('dossier', nargs='?', help="dossier contenant les fichiers xlsx (ou archives zip)")
+    parser.add_argument('--routage', metavar='JSON', help="fichier de configuration du routage")
+    parser.add_argument('--sortie-17', default="licences_1_7.xlsx",
+                        help="fichier de sortie des numéros 1 et 7 (défaut : licences_1_7.xlsx)")
+    parser.add_argument('--sortie-9', default="licences_9.xlsx",
+                        help="fichier de sortie des numéros 9 (défaut : licences_9.xlsx)")
+    ajouter_options(parser)
+    mesures.ajouter_options(parser)
+    args = parser.parse_args(argv)
+    configurer_depuis_options(args)
+    mesures.activer_depuis_options(args, 'sumup_licences')
+
+    if args.dossier:
+        routage = None
+        if args.routage:
+            try:
+                routage = charger_routage(args.routage)
+            except (OSError, ValueError) as e:
+                print(f"✗ Erreur dans la configuration du routage : {e}")
+                sys.exit(1)
+        construire_fichier_licences(args.dossier, args.sortie_17, args.sortie_9, routage=routage, interactif=False)
+        return
 
-def main():
-    """Fonction principale."""
     print()
     
     # Demander le dossier source
-    print("Veuillez entrer le chemin du dossier contenant les fichiers xlsx :")
+    print("Veuillez entrer le chemin du dossier contenant les fichiers xlsx (ou archives zip) :")
     print("(appuyez sur Entrée pour utiliser le dossier courant)")
     dossier = input("➜ ").strip()
     
@@ -237,6 +253,22 @@ def main():
     
     print()
     
+    # Demander une éventuelle configuration de routage
+    print("Fichier de configuration du routage (JSON) [aucun : numéros 1/7 et 9] :")
+    fichier_routage = input("➜ ").strip()
+    
+    print()
+    
+    if fichier_routage:
+        try:
+            routage = charger_routage(fichier_routage)
+        except (OSError, ValueError) as e:
+            print(f"✗ Erreur dans la configuration du routage : {e}")
+            sys.exit(1)
+        
+        construire_fichier_licences(dossier, routage=routage)
+        return
+    
     # Demander le nom du fichier de sortie pour les numéros 1 et 7
     print("Nom du fichier de sortie pour les numéros 1 et 7 [licences_1_7.xlsx] :")
     fichier_sortie_17 = input("➜ ").strip()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Traitement automatique des exports de colle déposés dans un dossier.
+
+Le dossier de dépôt est surveillé par scrutation : le contenu du dossier n'est relu
+que lorsque sa date de modification change (ajout, renommage ou suppression d'un
+fichier), puis chaque nouveau fichier de notes est suivi jusqu'à ce que sa taille et
+sa date de modification restent stables pendant --delai secondes, pour ne jamais
+lire un fichier en cours de copie.
+
+Les fichiers prêts sont traités en parallèle par un pool de processus (ceux du
+service HTTP, voir service_colle) qui gardent en mémoire les modules importés et le
+fichier des licences, chargé dès le démarrage de chaque processus. Le fichier des
+licences est lu une première fois au lancement, pour signaler aussitôt un fichier
+invalide ; il est ensuite surveillé : une nouvelle version, une fois stable et lisible,
+est copiée et utilisée pour les traitements suivants, sans redémarrage.
+
+Si un processus du pool meurt (mémoire épuisée, signal), le pool est recréé et les
+fichiers qu'il traitait sont relancés une fois.
+
+Chaque fichier traité est déplacé dans DEPOT/traites, ou dans DEPOT/erreurs avec un
+fichier .erreur.txt en cas d'échec ; le classeur de résultats est écrit dans le
+dossier de sortie sous le nom <fichier>_resultats.xlsx, numéroté (_1, _2, ...) si ce
+nom est déjà pris.
+
+Exemple :
+    python surveillance_colle.py depot --licences licences_1_7.licidx --sortie resultats
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from journal import ajouter_options, configurer_depuis_options, obtenir_journal
+from service_colle import _initialiser_processus, _licences, entier_positif, traiter_job
+
+journal = obtenir_journal('surveillance_colle')
+
+# Extensions des fichiers de notes pris en charge
+EXTENSIONS_NOTES = {'.csv', '.xlsx', '.xls', '.ods'}
+
+# Fichiers temporaires des copies en cours et des suites bureautiques
+SUFFIXES_TEMPORAIRES = ('.tmp', '.part', '.crdownload', '.partial')
+
+DOSSIER_TRAITES = 'traites'
+DOSSIER_ERREURS = 'erreurs'
+
+# Scrutation du dossier et stabilité exigée avant traitement (secondes)
+INTERVALLE = 1.0
+DELAI_STABILITE = 2.0
+
+TAILLE_BLOC = 1024 * 1024
+
+# Relances d'un fichier dont le traitement a été interrompu par la mort d'un processus
+RELANCES_MAX = 1
+
+
+def empreinte_fichier(chemin):
+    """Empreinte SHA-256 du contenu d'un fichier."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(TAILLE_BLOC), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _signature(chemin):
+    """(taille, date de modification) d'un fichier, ou None s'il a disparu."""
+    try:
+        etat = os.stat(chemin)
+    except FileNotFoundError:
+        return None
+    return etat.st_size, etat.st_mtime_ns
+
+
+def _est_fichier_notes(entree):
+    nom = entree.name
+    if nom.startswith(('.', '~$')) or nom.lower().endswith(SUFFIXES_TEMPORAIRES):
+        return False
+    return Path(nom).suffix.lower() in EXTENSIONS_NOTES and entree.is_file()
+
+
+def _initialiser_surveillance(fichier_licences, empreinte):
+    """Démarrage d'un processus du pool : modules importés et licences chargées."""
+    _initialiser_processus()
+    _licences(fichier_licences, empreinte)
+
+
+class Stabilite:
+    """
+    Suivi des fichiers en cours d'écriture : un fichier est prêt quand sa signature
+    (taille, date de modification) n'a pas changé depuis delai secondes.
+    """
+
+    def __init__(self, delai):
+        self.delai = delai
+        self.suivis = {}
+
+    def observer(self, chemin, maintenant):
+        """
+        Met à jour le suivi d'un fichier.
+
+        Returns:
+            bool: True si le fichier est prêt (il n'est alors plus suivi)
+        """
+        signature = _signature(chemin)
+        if signature is None:
+            self.suivis.pop(chemin, None)
+            return False
+        precedente, depuis = self.suivis.get(chemin, (None, maintenant))
+        if signature != precedente:
+            self.suivis[chemin] = (signature, maintenant)
+            return False
+        if signature[0] > 0 and maintenant - depuis >= self.delai:
+            del self.suivis[chemin]
+            return True
+        return False
+
+
+class Surveillance:
+    """
+    Surveillance d'un dossier de dépôt.
+
+    Attributes:
+        depot: Dossier surveillé
+        sortie: Dossier des classeurs de résultats
+        fichier_licences: Fichier des licences surveillé
+        groupes: dict {'Groupe A': [licences], ...}
+        nb_processus: Nombre de processus de traitement
+
+    Raises:
+        FileNotFoundError: Si le fichier des licences n'existe pas
+        colle.ErreurColle: Si le fichier des licences est illisible ou invalide
+    """
+
+    def __init__(self, depot, fichier_licences, sortie, groupes=None, nb_processus=None,
+                 intervalle=INTERVALLE, delai=DELAI_STABILITE):
+        import colle
+
+        self.depot = Path(depot)
+        self.sortie = Path(sortie)
+        self.fichier_licences = Path(fichier_licences)
+        self.groupes = groupes or {}
+        self.nb_processus = nb_processus or os.cpu_count() or 1
+        self.intervalle = intervalle
+        self.arret = threading.Event()
+
+        self.stabilite = Stabilite(delai)
+        self.stabilite_licences = Stabilite(delai)
+        self.date_depot = None
+        self.en_cours = {}
+        self.relances = {}
+        self.sorties = {}
+        self.pool = None
+        self.bilan = {'traites': 0, 'echecs': 0}
+
+        for dossier in (self.depot / DOSSIER_TRAITES, self.depot / DOSSIER_ERREURS, self.sortie):
+            dossier.mkdir(parents=True, exist_ok=True)
+        self._copies = tempfile.TemporaryDirectory(prefix='licences_')
+        self.signature_licences = _signature(self.fichier_licences)
+        if self.signature_licences is None:
+            raise FileNotFoundError(f"Le fichier {self.fichier_licences} n'existe pas.")
+        self.licences, self.empreinte = self._copier_licences()
+        # Lu ici plutôt que dans l'initialisation des processus : un fichier invalide
+        # arrête le lancement avec son erreur, au lieu de casser le pool
+        colle.lire_licences(self.fichier_licences)
+
+    def _copier_licences(self):
+        """
+        Copie le fichier des licences (les processus lisent la copie, que le fichier
+        surveillé soit réécrit ou non pendant un traitement).
+
+        Returns:
+            tuple: (chemin de la copie, empreinte)
+        """
+        empreinte = empreinte_fichier(self.fichier_licences)
+        copie = Path(self._copies.name) / f"{empreinte[:16]}{self.fichier_licences.suffix.lower()}"
+        if not copie.exists():
+            shutil.copyfile(self.fichier_licences, copie)
+        return str(copie), empreinte
+
+    def _verifier_licences(self, maintenant):
+        """Adopte une nouvelle version stable du fichier des licences."""
+        signature = _signature(self.fichier_licences)
+        if signature is None or signature == self.signature_licences:
+            self.stabilite_licences.suivis.clear()
+            return
+        if not self.stabilite_licences.observer(self.fichier_licences, maintenant):
+            return
+        self.signature_licences = signature
+        licences, empreinte = self._copier_licences()
+        if empreinte != self.empreinte:
+            import colle
+
+            try:
+                colle.lire_licences(self.fichier_licences)
+            except colle.ErreurColle as e:
+                journal.error(f"✗ Fichier des licences invalide, version précédente conservée : {e}")
+                return
+            self.licences, self.empreinte = licences, empreinte
+            journal.info(f"🔄 Fichier des licences rechargé : {self.fichier_licences} ({empreinte[:12]})")
+
+    def _nouveaux_fichiers(self, maintenant):
+        """Fichiers de notes devenus stables depuis le dernier passage."""
+        try:
+            date_depot = os.stat(self.depot).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if date_depot != self.date_depot:
+            # Contenu du dossier modifié : les nouveaux fichiers rejoignent le suivi
+            self.date_depot = date_depot
+            with os.scandir(self.depot) as entrees:
+                for entree in entrees:
+                    chemin = Path(entree.path)
+                    if chemin not in self.stabilite.suivis and chemin not in self.en_cours.values() \
+                            and _est_fichier_notes(entree):
+                        self.stabilite.suivis[chemin] = (None, maintenant)
+        return [chemin for chemin in list(self.stabilite.suivis) if self.stabilite.observer(chemin, maintenant)]
+
+    def _creer_pool(self):
+        """Pool de processus, initialisés avec le fichier des licences courant."""
+        return ProcessPoolExecutor(self.nb_processus, initializer=_initialiser_surveillance,
+                                   initargs=(self.licences, self.empreinte))
+
+    def _nom_sortie(self, fichier):
+        """
+        Classeur de résultats d'un fichier, numéroté comme dans _deplacer pour ne pas écraser
+        un résultat existant ni celui d'un traitement en cours (colle.csv et colle.xlsx
+        déposés ensemble, ou même nom déposé de nouveau).
+        """
+        reservees = set(self.sorties.values())
+        destination = self.sortie / f"{fichier.stem}_resultats.xlsx"
+        rang = 1
+        while destination.exists() or destination in reservees:
+            destination = self.sortie / f"{fichier.stem}_resultats_{rang}.xlsx"
+            rang += 1
+        return destination
+
+    def _soumettre(self, fichier):
+        # Une relance garde le classeur choisi au premier lancement
+        if fichier not in self.sorties:
+            self.sorties[fichier] = self._nom_sortie(fichier)
+        fichier_sortie = self.sorties[fichier]
+        journal.info(f"📥 {fichier.name} : traitement lancé")
+        parametres = (str(fichier), self.licences, self.empreinte, self.groupes, str(fichier_sortie))
+        try:
+            future = self.pool.submit(traiter_job, *parametres)
+        except BrokenProcessPool:
+            # Un processus est mort : le pool n'accepte plus rien, il est remplacé
+            journal.warning("⚠ Pool de processus interrompu : redémarrage")
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._creer_pool()
+            future = self.pool.submit(traiter_job, *parametres)
+        self.en_cours[future] = fichier
+
+    def _terminer(self, future):
+        fichier = self.en_cours.pop(future)
+        try:
+            bilan = future.result()
+        except BrokenProcessPool as e:
+            relances = self.relances.get(fichier, 0)
+            if relances < RELANCES_MAX and fichier.exists():
+                self.relances[fichier] = relances + 1
+                journal.warning(f"⚠ {fichier.name} : processus de traitement interrompu, nouvelle tentative")
+                self._soumettre(fichier)
+            else:
+                self._echec(fichier, f"processus de traitement interrompu ({e})")
+            return
+        except Exception as e:
+            self._echec(fichier, e)
+            return
+
+        self.relances.pop(fichier, None)
+        self.sorties.pop(fichier, None)
+        self.bilan['traites'] += 1
+        _deplacer(fichier, self.depot / DOSSIER_TRAITES)
+        cache = "licences en cache" if bilan['cache_licences'] else "licences lues"
+        journal.info(f"✓ {fichier.name} → {bilan['chemin']} ({bilan['notes']} notes, "
+                     f"{bilan['sans_licence']} sans licence, {bilan['duree_s']:.2f} s, {cache})",
+                     extra={'details': {'type': 'traitement', 'fichier': fichier.name,
+                                        **{cle: valeur for cle, valeur in bilan.items()
+                                           if cle != 'erreurs_validation'}}})
+
+    def _echec(self, fichier, erreur):
+        """Déplace un fichier en échec dans DEPOT/erreurs, avec son message d'erreur."""
+        self.relances.pop(fichier, None)
+        self.sorties.pop(fichier, None)
+        self.bilan['echecs'] += 1
+        destination = _deplacer(fichier, self.depot / DOSSIER_ERREURS)
+        destination.with_name(destination.name + '.erreur.txt').write_text(f"{erreur}\n", encoding='utf-8')
+        journal.error(f"✗ {fichier.name} : {erreur}")
+
+    def executer(self, une_fois=False):
+        """
+        Surveille le dossier jusqu'à l'arrêt (signal ou arreter()).
+
+        Args:
+            une_fois: Traiter les fichiers présents au démarrage, puis s'arrêter
+        """
+        self.pool = self._creer_pool()
+        try:
+            while not self.arret.is_set():
+                maintenant = time.monotonic()
+                self._verifier_licences(maintenant)
+                for fichier in self._nouveaux_fichiers(maintenant):
+                    self._soumettre(fichier)
+
+                if une_fois and not self.en_cours and not self.stabilite.suivis:
+                    break
+                if self.en_cours:
+                    termines, _ = wait(list(self.en_cours), timeout=self.intervalle, return_when=FIRST_COMPLETED)
+                    for future in termines:
+                        self._terminer(future)
+                else:
+                    self.arret.wait(self.intervalle)
+
+            # Les traitements lancés vont à leur terme (relances comprises)
+            while self.en_cours:
+                termines, _ = wait(list(self.en_cours), return_when=FIRST_COMPLETED)
+                for future in termines:
+                    self._terminer(future)
+        finally:
+            self.pool.shutdown()
+        self._copies.cleanup()
+
+    def arreter(self, *_):
+        """Demande l'arrêt (les traitements en cours sont terminés)."""
+        self.arret.set()
+
+
+def _deplacer(fichier, dossier):
+    """Déplace un fichier dans un dossier, sans écraser un fichier du même nom."""
+    destination = dossier / fichier.name
+    rang = 1
+    while destination.exists():
+        destination = dossier / f"{fichier.stem}_{rang}{fichier.suffix}"
+        rang += 1
+    shutil.move(str(fichier), str(destination))
+    return destination
+
+
+def main(argv=None, prog=None):
+    """Fonction principale."""
+    parser = argparse.ArgumentParser(
+        prog=prog or "python surveillance_colle.py",
+        description="Traitement automatique des fichiers de notes déposés dans un dossier"
+    )
+    parser.add_argument('depot', help="dossier de dépôt surveillé")
+    parser.add_argument('--licences', required=True, metavar='FICHIER',
+                        help="fichier des licences (rechargé quand il est modifié)")
+    parser.add_argument('--sortie', default='resultats', metavar='DOSSIER',
+                        help="dossier des classeurs de résultats (défaut : resultats)")
+    parser.add_argument('--groupes', metavar='JSON',
+                        help='groupes à créer, ex. {"Groupe A": ["LAS1", "PASS"], "Tous": "*"} (fichier JSON)')
+    parser.add_argument('--processus', type=entier_positif, default=None,
+                        help="nombre de traitements simultanés (défaut : nombre de cœurs)")
+    parser.add_argument('--intervalle', type=float, default=INTERVALLE,
+                        help=f"intervalle de scrutation en secondes (défaut : {INTERVALLE})")
+    parser.add_argument('--delai', type=float, default=DELAI_STABILITE,
+                        help=f"secondes sans modification avant de traiter un fichier (défaut : {DELAI_STABILITE})")
+    parser.add_argument('--une-fois', action='store_true',
+                        help="traiter les fichiers présents puis s'arrêter")
+    ajouter_options(parser)
+    args = parser.parse_args(argv)
+    configurer_depuis_options(args)
+
+    from colle import ErreurColle, charger_groupes
+
+    groupes = {}
+    if args.groupes:
+        try:
+            groupes = charger_groupes(args.groupes)
+        except ErreurColle as e:
+            journal.error(f"✗ Fichier de groupes invalide : {e}")
+            raise SystemExit(1)
+
+    try:
+        surveillance = Surveillance(args.depot, args.licences, args.sortie, groupes, args.processus,
+                                    args.intervalle, args.delai)
+    except OSError as e:
+        journal.error(f"✗ {e}")
+        raise SystemExit(1)
+    except ErreurColle as e:
+        journal.error(f"✗ Fichier des licences invalide : {e}")
+        raise SystemExit(1)
+
+    # Ctrl+C ou SIGTERM : fin propre, après les traitements en cours
+    signal.signal(signal.SIGINT, surveillance.arreter)
+    signal.signal(signal.SIGTERM, surveillance.arreter)
+    journal.info(f"👀 Surveillance de {surveillance.depot.resolve()} ({surveillance.nb_processus} processus)")
+    journal.info(f"   📋 Licences : {surveillance.fichier_licences} ({surveillance.empreinte[:12]})")
+    journal.info(f"   📁 Résultats : {surveillance.sortie.resolve()}")
+    surveillance.executer(args.une_fois)
+    journal.info(f"⏹ Arrêt de la surveillance : {surveillance.bilan['traites']} fichier(s) traité(s), "
+                 f"{surveillance.bilan['echecs']} échec(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Configuration pytest des tests des scripts Python (les tests jest sont les *.test.js)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,224 @@
+"""
+Tests de client_moodle, de la création des utilisateurs (import_user_moodle) et de
+l'import de questions (importer_questions), contre un faux Moodle servi en local
+(http.server, port 0).
+"""
+
+import json
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import pandas as pd
+import pytest
+
+import import_user_moodle
+import importer_questions
+from client_moodle import ClientMoodle, ErreurMoodle, ErreurTransport
+
+
+class FauxMoodle:
+    """
+    Faux webservice/rest/server.php : chaque requête est enregistrée puis passée à
+    repondre(fonction, parametres), qui renvoie (code HTTP, objet JSON).
+    """
+
+    def __init__(self, repondre):
+        self.repondre = repondre
+        self.appels = []
+        faux = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                corps = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+                parametres = dict(parse_qsl(corps))
+                fonction = parametres.pop('wsfunction')
+                faux.appels.append(fonction)
+                code, reponse = faux.repondre(fonction, parametres)
+                donnees = json.dumps(reponse).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(donnees)))
+                self.end_headers()
+                self.wfile.write(donnees)
+
+            def log_message(self, *args):
+                pass
+
+        self.serveur = ThreadingHTTPServer(('127.0.0.1', 0), Gestionnaire)
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}"
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def fermer(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+
+@pytest.fixture
+def faux_moodle():
+    serveurs = []
+
+    def demarrer(repondre):
+        serveur = FauxMoodle(repondre)
+        serveurs.append(serveur)
+        return serveur
+
+    yield demarrer
+    for serveur in serveurs:
+        serveur.fermer()
+
+
+def _client(url):
+    return ClientMoodle(url, 'jeton', tentatives=3, attente_initiale=0.001)
+
+
+def _noms(parametres):
+    """Valeurs des paramètres users[i][username] (ou values[i]) d'un appel."""
+    return [valeur for cle, valeur in parametres.items() if re.fullmatch(r'(users\[\d+\]\[username\]|values\[\d+\])', cle)]
+
+
+def test_erreur_transitoire_retentee(faux_moodle):
+    codes = iter([503, 200])
+    moodle = faux_moodle(lambda fonction, parametres: (next(codes), {'ok': 1}))
+    with _client(moodle.url) as client:
+        assert client.appeler('core_webservice_get_site_info') == {'ok': 1}
+    assert len(moodle.appels) == 2
+
+
+def test_creation_non_retentee_apres_envoi(faux_moodle):
+    moodle = faux_moodle(lambda fonction, parametres: (502, {}))
+    with _client(moodle.url) as client, pytest.raises(ErreurTransport) as erreur:
+        client.appeler('core_user_create_users', idempotent=False, users=[{'username': '1234'}])
+    assert erreur.value.envoyee
+    assert len(moodle.appels) == 1
+
+
+def test_creation_retentee_si_non_traitee(faux_moodle):
+    codes = iter([429, 200])
+    moodle = faux_moodle(lambda fonction, parametres: (next(codes), []))
+    with _client(moodle.url) as client:
+        client.appeler('core_user_create_users', idempotent=False, users=[{'username': '1234'}])
+    assert len(moodle.appels) == 2
+
+
+def test_connexion_refusee_retentee():
+    with socket.socket() as libre:
+        libre.bind(('127.0.0.1', 0))
+        port = libre.getsockname()[1]
+    with _client(f"http://127.0.0.1:{port}") as client, pytest.raises(ErreurTransport) as erreur:
+        client.appeler('core_user_create_users', idempotent=False, users=[])
+    assert not erreur.value.envoyee
+
+
+def test_exception_moodle(faux_moodle):
+    moodle = faux_moodle(lambda fonction, parametres: (200, {
+        'exception': 'invalid_parameter_exception', 'errorcode': 'invalidparameter', 'message': 'Paramètre invalide'}))
+    with _client(moodle.url) as client, pytest.raises(ErreurMoodle) as erreur:
+        client.appeler('core_user_create_users', idempotent=False, users=[])
+    assert not isinstance(erreur.value, ErreurTransport)
+    assert erreur.value.code == 'invalidparameter'
+    assert len(moodle.appels) == 1
+
+
+def _emails(*anonymats):
+    return pd.DataFrame({'anonymat': list(anonymats), 'email': [f"{a}@exemple.fr" for a in anonymats]})
+
+
+def test_bisection_isole_les_refus(faux_moodle):
+    crees = []
+
+    def repondre(fonction, parametres):
+        if fonction == 'core_user_create_users':
+            noms = _noms(parametres)
+            if '1003' in noms:
+                return 200, {'exception': 'moodle_exception', 'message': 'Nom déjà utilisé'}
+            crees.extend(noms)
+            return 200, [{'username': nom} for nom in noms]
+        return 200, {'warnings': []}
+
+    moodle = faux_moodle(repondre)
+    with _client(moodle.url) as client:
+        assert not import_user_moodle.provisionner_utilisateurs(
+            _emails('1001', '1002', '1003', '1004'), client, cohort_id='C1', taille_lot=4, nb_requetes=1)
+    assert sorted(crees) == ['1001', '1002', '1004']
+    assert moodle.appels.count('core_cohort_add_cohort_members') == 1
+
+
+def test_reponse_perdue_sans_doublon(faux_moodle):
+    crees = []
+    premiere = []
+
+    def repondre(fonction, parametres):
+        noms = _noms(parametres)
+        if fonction == 'core_user_create_users':
+            assert not set(noms) & set(crees), "compte créé deux fois"
+            crees.extend(noms)
+            if not premiere:
+                # Création faite, mais réponse perdue par le proxy
+                premiere.append(True)
+                return 504, {}
+            return 200, [{'username': nom} for nom in noms]
+        if fonction == 'core_user_get_users_by_field':
+            return 200, [{'username': nom} for nom in noms if nom in crees]
+        return 200, {'warnings': []}
+
+    moodle = faux_moodle(repondre)
+    with _client(moodle.url) as client:
+        assert import_user_moodle.provisionner_utilisateurs(
+            _emails('1001', '1002'), client, cohort_id='C1', taille_lot=1, nb_requetes=1)
+    assert sorted(crees) == ['1001', '1002']
+
+
+def test_panne_sans_bisection(faux_moodle):
+    moodle = faux_moodle(lambda fonction, parametres: (503, {}))
+    with _client(moodle.url) as client:
+        assert not import_user_moodle.provisionner_utilisateurs(
+            _emails('1001', '1002', '1003', '1004'), client, cohort_id='C1', taille_lot=4, nb_requetes=1)
+    # Un envoi, puis des vérifications retentées : jamais de lot coupé en deux ni de cohorte
+    assert moodle.appels.count('core_user_create_users') == 1
+    assert 'core_cohort_add_cohort_members' not in moodle.appels
+
+
+def test_import_questions(faux_moodle, tmp_path):
+    fichier = tmp_path / 'questions.xlsx'
+    pd.DataFrame([{'SNO': 1, 'Questions': 'Q ?', 'Type': 'MCQ', 'option 1': 'A', 'option 2': 'B',
+                   'Correct Answer': 'A', 'Points': 1}]).to_excel(fichier, index=False)
+    reponses = iter([(200, {'success': True, 'message': '', 'imported': 1, 'errors': []}),
+                     (502, {})])
+    moodle = faux_moodle(lambda fonction, parametres: next(reponses))
+
+    with _client(moodle.url) as client:
+        importateur = importer_questions.ImportateurQuestions(client)
+        assert importateur.importer_fichier(fichier, 7, 'Anatomie') == (1, 1, [])
+        # Lot peut-être importé : pas de second envoi
+        with pytest.raises(ErreurTransport):
+            importateur.importer_fichier(fichier, 7, 'Anatomie')
+    assert len(moodle.appels) == 2
+
+
+def test_pool_de_connexions_vide_refuse():
+    with pytest.raises(ValueError):
+        ClientMoodle('http://127.0.0.1', 'jeton', nb_connexions=0)
+
+
+@pytest.mark.parametrize('option', ['--requetes=0', '--octets-max=0', '--questions-max=-1'])
+def test_import_questions_refuse_les_valeurs_nulles(monkeypatch, capsys, option):
+    monkeypatch.setenv('MOODLE_TOKEN', 'jeton')
+    with pytest.raises(SystemExit) as sortie:
+        importer_questions.main(['--url', 'http://127.0.0.1', option])
+    assert sortie.value.code == 2
+    assert option.split('=')[0] in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('contenu', [b'pas un classeur', b'PK\x05\x06' + b'\x00' * 18])
+def test_import_questions_classeur_illisible(faux_moodle, tmp_path, contenu):
+    fichier = tmp_path / 'questions.xlsx'
+    fichier.write_bytes(contenu)
+    moodle = faux_moodle(lambda fonction, parametres: (200, {}))
+    with _client(moodle.url) as client, pytest.raises(ValueError, match="illisible"):
+        importer_questions.ImportateurQuestions(client).importer_fichier(fichier, 7, 'Anatomie')
+    assert moodle.appels == []
@@ -0,0 +1,158 @@
+"""Tests des traitements de colle.py : numéros proches, fusion de colles et classement des groupes."""
+
+import pandas as pd
+import pytest
+
+import colle
+
+LICENCES = {'1234': 'SV', '1235': 'SV', '7001': 'DROIT', '12345': 'PASS'}
+
+
+@pytest.mark.parametrize('numero, attendus', [
+    ('2134', [('1234', 'transposition')]),
+    ('1236', [('1234', 'substitution'), ('1235', 'substitution')]),
+    ('123', [('1234', 'suppression'), ('1235', 'suppression')]),
+    ('70011', [('7001', 'insertion')]),
+    ('1245', [('1235', 'substitution'), ('12345', 'suppression')]),
+    ('1234', [('1235', 'substitution'), ('12345', 'suppression')]),
+    ('9999', []),
+])
+def test_candidats_a_distance_1(numero, attendus):
+    assert colle.IndexCandidats(LICENCES).candidats(numero) == attendus
+
+
+def test_candidats_exclus():
+    index = colle.IndexCandidats(LICENCES)
+    assert index.candidats('1236', exclus={'1235'}) == [('1234', 'substitution')]
+
+
+def test_propositions_et_affectations_sans_ambiguite():
+    ignores = [('2134', 15.0), ('1236', 12.0), ('1245', 11.0), ('70011', 9.0), ('9999', 8.0)]
+    propositions = colle.proposer_licences(ignores, LICENCES)
+
+    assert [p.numero for p in propositions] == ['2134', '1236', '1245', '70011', '9999']
+    assert propositions[0].licences == [('SV', [('1234', 'transposition')])]
+    # Deux numéros proches de la même licence : la licence est probable, mais pas sûre
+    assert propositions[1].licences == [('SV', [('1234', 'substitution'), ('1235', 'substitution')])]
+    assert propositions[2].licences == [('SV', [('1235', 'substitution')]), ('PASS', [('12345', 'suppression')])]
+    assert propositions[4].licences == []
+    assert [p.licence_sure for p in propositions] == ['SV', None, None, 'DROIT', None]
+    assert colle.affectations_sans_ambiguite(propositions) == {'2134': 'SV', '70011': 'DROIT'}
+
+
+def test_numeros_deja_attribues_exclus():
+    propositions = colle.proposer_licences([('1236', 12.0)], LICENCES, exclus=['1235'])
+    assert colle.affectations_sans_ambiguite(propositions) == {'1236': 'SV'}
+
+    repartition = colle.organiser_donnees({'1234': 14.0, '1236': 12.0}, LICENCES)
+    index = colle.IndexCandidats(LICENCES)
+    propositions = colle.proposer_licences(repartition.etudiants_ignores, LICENCES, exclus=['1234'], index=index)
+    affectations = colle.affectations_sans_ambiguite(propositions)
+    assert affectations == {'1236': 'SV'}
+
+    licences = dict(LICENCES)
+    colle.assigner_licences(repartition, affectations, licences)
+    assert repartition.etudiants_par_licence == {'SV': [('1234', 14.0), ('1236', 12.0)]}
+    assert repartition.etudiants_ignores == [] and licences['1236'] == 'SV'
+
+
+COLLE_A = {'1001': 10.0, '1002': 20.0, '1003': 12.0}
+COLLE_B = {'1001': 14.0, '1002': 10.0}
+
+
+@pytest.mark.parametrize('absence, notes, exclus', [
+    ('zero', {'1001': 13.0, '1002': 12.5, '1003': 3.0}, []),
+    ('renormaliser', {'1001': 13.0, '1002': 12.5, '1003': 12.0}, []),
+    ('exclure', {'1001': 13.0, '1002': 12.5}, ['1003']),
+])
+def test_fusion_selon_la_politique_d_absence(absence, notes, exclus):
+    fusion = colle.fusionner_notes([COLLE_A, COLLE_B], poids=[1, 3], absence=absence)
+    assert fusion.notes == notes
+    assert fusion.exclus == exclus
+    assert fusion.poids == [0.25, 0.75]
+    assert fusion.presents == [3, 2] and fusion.absents == [0, 1]
+
+
+def test_fusion_colle_de_poids_nul():
+    # 1004 n'a composé qu'à une colle de poids nul : aucune note à renormaliser
+    fusion = colle.fusionner_notes([COLLE_A, {'1004': 18.0}], poids=[1, 0], absence='renormaliser')
+    assert fusion.notes == COLLE_A
+    assert fusion.exclus == ['1004']
+
+
+def test_fusion_taux_de_reussite_par_colle():
+    notes = [colle.NotesColle(COLLE_A, {'Q01': 0.5}, [], 0, 3, 2, 'csv'),
+             colle.NotesColle(COLLE_B, {'Q01': 0.25}, [], 0, 2, 2, 'csv')]
+    fusion = colle.fusionner_notes(notes)
+    assert fusion.taux_reussite == {'C1 Q01': 0.5, 'C2 Q01': 0.25}
+    assert fusion.notes == {'1001': 12.0, '1002': 15.0, '1003': 6.0}
+
+
+@pytest.mark.parametrize('liste, poids, absence', [
+    ([COLLE_A, COLLE_B], None, 'ignorer'),
+    ([], None, 'zero'),
+    ([COLLE_A, COLLE_B], [1], 'zero'),
+    ([COLLE_A, COLLE_B], [1, -1], 'zero'),
+    ([COLLE_A, COLLE_B], [0, 0], 'zero'),
+])
+def test_fusion_parametres_invalides(liste, poids, absence):
+    with pytest.raises(colle.ErreurFusion):
+        colle.fusionner_notes(liste, poids, absence)
+
+
+PAR_LICENCE = {
+    'LAS1': [('1001', 18.0), ('1002', 12.0), ('1003', 9.0)],
+    'PASS': [('7001', 15.0), ('7002', 12.0)],
+    'SV': [('8001', 12.0), ('8002', 4.0)],
+}
+
+
+def test_classement_d_un_groupe():
+    classement = colle.classer_groupe(PAR_LICENCE, ['PASS', 'LAS1', 'INCONNUE'])
+    # À note égale, l'ordre des licences du groupe est conservé
+    assert classement == [(('1001', 18.0), 'LAS1'), (('7001', 15.0), 'PASS'), (('7002', 12.0), 'PASS'),
+                          (('1002', 12.0), 'LAS1'), (('1003', 9.0), 'LAS1')]
+    assert colle.classer_groupe(PAR_LICENCE, ['INCONNUE']) == []
+
+
+def test_groupes_qui_se_chevauchent(tmp_path):
+    groupes = colle.valider_groupes({'groupes': [
+        {'nom': 'Santé', 'licences': ['LAS1', 'PASS', 'LAS1']},
+        {'nom': 'Sciences', 'licences': ['SV', 'LAS1']},
+        {'nom': 'Tous', 'licences': 'toutes'},
+        {'nom': 'Vide', 'licences': ['DROIT']},
+    ]})
+    assert groupes == {'Santé': ['LAS1', 'PASS'], 'Sciences': ['SV', 'LAS1'], 'Tous': colle.TOUTES_LICENCES,
+                       'Vide': ['DROIT']}
+
+    resultat = colle.creer_fichier_sortie(PAR_LICENCE, {}, tmp_path / 'resultats.xlsx', groupes)
+    assert resultat.feuilles == {'Général': 7, 'LAS1': 3, 'PASS': 2, 'SV': 2, 'Santé': 5, 'Sciences': 5, 'Tous': 7}
+    assert resultat.groupes_non_crees == {'Vide': "aucun étudiant trouvé"}
+
+    sciences = pd.read_excel(resultat.chemin, sheet_name='Sciences', dtype={'Numéro CREM': str})
+    assert sciences.values.tolist() == [['1001', 18.0, 'LAS1'], ['8001', 12.0, 'SV'], ['1002', 12.0, 'LAS1'],
+                                        ['1003', 9.0, 'LAS1'], ['8002', 4.0, 'SV']]
+
+
+@pytest.mark.parametrize('config, message', [
+    ([], "objet"),
+    ({'groupes': [{'licences': ['SV']}]}, "nom"),
+    ({'A': ['SV'], 'a': ['PASS']}, "plusieurs fois"),
+    ({'Stats': ['SV']}, "réservé"),
+    ({'A/B': ['SV']}, "nom de feuille"),
+    ({'A': 'SV'}, "liste de licences"),
+])
+def test_groupes_invalides(config, message):
+    with pytest.raises(colle.ErreurGroupes, match=message):
+        colle.valider_groupes(config)
+
+
+def test_fichier_de_groupes(tmp_path):
+    fichier = tmp_path / 'groupes.json'
+    fichier.write_text('{"Santé": ["LAS1", "PASS"], "Tous": "*"}', encoding='utf-8')
+    assert colle.charger_groupes(fichier) == {'Santé': ['LAS1', 'PASS'], 'Tous': colle.TOUTES_LICENCES}
+    fichier.write_text('{"Santé": ', encoding='utf-8')
+    with pytest.raises(colle.ErreurFichier):
+        colle.charger_groupes(fichier)
+    with pytest.raises(colle.ErreurFichier):
+        colle.charger_groupes(tmp_path / 'absent.json')
@@ -0,0 +1,10 @@
+"""Tests du générateur de données synthétiques du benchmark."""
+
+import donnees_synthetiques
+
+
+def test_chemins_absolus(tmp_path, monkeypatch):
+    """Les outils mesurés tournent dans un autre dossier : les chemins ne dépendent pas du dossier courant."""
+    monkeypatch.chdir(tmp_path)
+    fichiers = donnees_synthetiques.generer_jeu('donnees', 100)
+    assert all(fichier.is_absolute() and fichier.exists() for fichier in fichiers.values())
@@ -0,0 +1,31 @@
+"""Tests de l'écriture des fichiers de résultats (ecriture_sortie)."""
+
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+import ecriture_sortie
+from lecteur_ods import iterer_lignes_ods
+
+
+def test_ecrivain_abstrait(tmp_path):
+    with pytest.raises(TypeError):
+        ecriture_sortie.Ecrivain(tmp_path / 'resultats')
+
+
+def test_ods_feuille_sans_colonne(tmp_path):
+    fichier = tmp_path / 'resultats.ods'
+    with ecriture_sortie.ouvrir_ecrivain(fichier, 'ods') as ecrivain:
+        ecrivain.ecrire('Stats', pd.DataFrame([]))
+        ecrivain.ecrire('Général', pd.DataFrame({'Numéro CREM': ['1234'], 'Note': [12.5]}))
+
+    with zipfile.ZipFile(fichier) as archive:
+        contenu = archive.read('content.xml').decode('utf-8')
+    assert 'number-columns-repeated="0"' not in contenu
+    assert '<table:table-row></table:table-row>' not in contenu
+    stats = re.search(r'<table:table table:name="Stats">(.*?)</table:table>', contenu).group(1)
+    assert stats == '<table:table-column/><table:table-row><table:table-cell/></table:table-row>'
+    assert list(iterer_lignes_ods(fichier, feuille='Stats')) == []
+    assert list(iterer_lignes_ods(fichier, feuille='Général')) == [('Numéro CREM', 'Note'), ('1234', 12.5)]
@@ -0,0 +1,211 @@
+"""
+Tests de l'export des utilisateurs vers le CSV d'import Moodle (import_user_moodle).
+"""
+
+import csv
+import stat
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import import_user_moodle
+
+
+def _emails(*anonymats):
+    return pd.DataFrame({'anonymat': list(anonymats), 'email': [f"{a}@exemple.fr" for a in anonymats]})
+
+
+def _lire(fichier):
+    with open(fichier, encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_mots_de_passe_en_clair_et_fichiers_proteges(tmp_path):
+    sortie = tmp_path / 'moodle.csv'
+    identifiants = tmp_path / 'identifiants.csv'
+    assert import_user_moodle.creer_csv_moodle(_emails('1001', '1002'), sortie,
+                                               fichier_identifiants=identifiants)
+
+    utilisateurs = _lire(sortie)
+    # Moodle hache lui-même la colonne password : elle contient les mots de passe en clair
+    assert [u['password'] for u in utilisateurs] == [i['password'] for i in _lire(identifiants)]
+    assert all(u['auth'] == 'manual' and not u['password'].startswith('$2') for u in utilisateurs)
+    for fichier in (sortie, identifiants):
+        assert stat.S_IMODE(fichier.stat().st_mode) == 0o600
+
+
+def test_parties_protegees(tmp_path):
+    sortie = tmp_path / 'moodle.csv'
+    assert import_user_moodle.creer_csv_moodle(_emails('1001', '1002', '1003'), sortie, lignes_max=2,
+                                               fichier_identifiants=tmp_path / 'identifiants.csv')
+    parties = sorted(tmp_path.glob('moodle_partie[0-9]*.csv'))
+    assert len(parties) == 2
+    assert all(stat.S_IMODE(partie.stat().st_mode) == 0o600 for partie in parties)
+
+
+def test_identifiants_non_ecrits_si_csv_en_echec(tmp_path):
+    identifiants = tmp_path / 'identifiants.csv'
+    assert not import_user_moodle.creer_csv_moodle(_emails('1001'), tmp_path / 'absent' / 'moodle.csv',
+                                                   fichier_identifiants=identifiants)
+    assert not identifiants.exists()
+
+
+def test_manifeste_sorties_relatives_au_manifeste(tmp_path):
+    dossier = tmp_path / 'lot'
+    dossier.mkdir()
+    manifeste = dossier / 'manifeste.csv'
+    manifeste.write_text("fichier;cohorte;sortie\nlas1.xlsx;C1;las1.csv\npass.xlsx;C2\n", encoding='utf-8')
+    entrees = import_user_moodle.lire_manifeste(manifeste, 'moodle_import.csv')
+    assert entrees == [
+        {'fichier': str(dossier / 'las1.xlsx'), 'cohorte': 'C1', 'sortie': str(dossier / 'las1.csv')},
+        {'fichier': str(dossier / 'pass.xlsx'), 'cohorte': 'C2', 'sortie': 'moodle_import.csv'},
+    ]
+
+
+@pytest.mark.parametrize('option', [['--delta', 'etat.json'], ['--lignes-max', '10'], ['--taille-max', '1M']])
+def test_lot_refuse_les_options_d_un_seul_fichier(tmp_path, capsys, option):
+    with pytest.raises(SystemExit) as sortie:
+        import_user_moodle.main(['--lot', str(tmp_path / 'manifeste.csv'), *option])
+    assert sortie.value.code == 2
+    assert option[0] in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('option', ['--lignes-max=0', '--lignes-max=-5', '--taille-max=0', '--taille-max=-1M',
+                                    '--taille-max=0.0001K'])
+def test_decoupage_refuse_les_valeurs_nulles_ou_negatives(tmp_path, capsys, option):
+    with pytest.raises(SystemExit) as sortie:
+        import_user_moodle.main(['emails.xlsx', str(tmp_path / 'moodle.csv'), option])
+    assert sortie.value.code == 2
+    assert 'strictement positi' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('option', ['--taille-lot=0', '--requetes=0', '--requetes=-2'])
+def test_pousser_refuse_les_valeurs_nulles(tmp_path, capsys, option):
+    with pytest.raises(SystemExit) as sortie:
+        import_user_moodle.main(['emails.xlsx', str(tmp_path / 'moodle.csv'), '--pousser', 'http://127.0.0.1', option])
+    assert sortie.value.code == 2
+    assert option.split('=')[0] in capsys.readouterr().err
+
+
+def test_lot_valide_comme_le_mode_fichier_unique(tmp_path):
+    roster = pd.DataFrame([['ABC1', 'abc1@exemple.fr'], ['1002', 'pas-un-email'], ['1003', '1003@exemple.fr'],
+                           ['1003', '1003@exemple.fr']])
+    roster.to_excel(tmp_path / 'roster.xlsx', index=False, header=False)
+    (tmp_path / 'manifeste.csv').write_text("roster.xlsx;;lot.csv\n", encoding='utf-8')
+
+    import_user_moodle.main([str(tmp_path / 'roster.xlsx'), str(tmp_path / 'seul.csv')])
+    import_user_moodle.main(['--lot', str(tmp_path / 'manifeste.csv'), '--processus', '1'])
+
+    assert _lire(tmp_path / 'lot.csv') == _lire(tmp_path / 'seul.csv')
+    assert [u['username'] for u in _lire(tmp_path / 'lot.csv')] == ['abc1', '1003']
+    assert [r['anonymat'] for r in _lire(tmp_path / 'roster_rejets.csv')] == ['1002', '1003']
+
+
+def test_lot_refuse_un_nombre_de_processus_negatif(tmp_path, capsys):
+    with pytest.raises(SystemExit) as sortie:
+        import_user_moodle.main(['--lot', str(tmp_path / 'manifeste.csv'), '--processus=-1'])
+    assert sortie.value.code == 2
+    assert '--processus' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('contenu', ['{"x": 1}', '{"empreintes": [1, 2]}', '[]', '{"empreintes": {"10', '\xff'])
+def test_etat_tronque_ou_etranger(tmp_path, capsys, contenu):
+    etat = tmp_path / 'etat.json'
+    etat.write_bytes(contenu.encode('latin-1'))
+    with pytest.raises(ValueError, match="fichier d'état"):
+        import_user_moodle.charger_etat(etat)
+
+    _emails('1001').to_excel(tmp_path / 'roster.xlsx', index=False, header=False)
+    import_user_moodle.main([str(tmp_path / 'roster.xlsx'), str(tmp_path / 'moodle.csv'), '--delta', str(etat)])
+    assert "❌ fichier d'état" in capsys.readouterr().out
+    assert not (tmp_path / 'moodle.csv').exists()
+    assert etat.read_bytes() == contenu.encode('latin-1')
+
+
+def test_parties_obsoletes_supprimees(tmp_path):
+    sortie = tmp_path / 'moodle.csv'
+    assert import_user_moodle.creer_csv_moodle(_emails(*map(str, range(1001, 1013))), sortie, lignes_max=4)
+    (tmp_path / 'moodle_partie_notes.csv').write_text('à garder', encoding='utf-8')
+    (tmp_path / 'moodle_parties.csv.bak').write_text('à garder', encoding='utf-8')
+    assert len(list(tmp_path.glob('moodle_partie[0-9]*.csv'))) == 3
+
+    assert import_user_moodle.creer_csv_moodle(_emails('1001', '1002', '1003'), sortie, lignes_max=2)
+    parties = [p['fichier'] for p in _lire(tmp_path / 'moodle_parties.csv')]
+    assert sorted(tmp_path.glob('moodle_partie[0-9]*.csv')) == sorted(map(Path, parties))
+    assert len(parties) == 2
+    assert (tmp_path / 'moodle_partie_notes.csv').exists() and (tmp_path / 'moodle_parties.csv.bak').exists()
+
+
+def test_validation_des_utilisateurs(tmp_path):
+    df = pd.DataFrame({
+        'anonymat': ['ABC1', '1002', 'abc1', 'é3', 'x' * 101, '1006', '1007', '1008', '1009'],
+        'email': ['Abc1@exemple.fr', 'pas-un-email', 'abc1@exemple.fr', 'e3@exemple.fr', 'x@exemple.fr',
+                  '1006@exemple.fr', '1006@EXEMPLE.fr', '1008@exemple.fr', '1009@exemple.fr'],
+    })
+    df.loc[len(df)] = ['1008', 'autre@exemple.fr']
+    valides, rejets = import_user_moodle.valider_utilisateurs(df, tmp_path / 'rejets.csv')
+
+    # Usernames en minuscules, doublon exact (casse comprise) gardé une fois
+    assert valides.values.tolist() == [['abc1', 'Abc1@exemple.fr'], ['1009', '1009@exemple.fr']]
+    raisons = dict(zip(rejets['anonymat'], rejets['raisons']))
+    assert raisons == {
+        '1002': "email invalide",
+        'abc1': "doublon exact d'une ligne précédente",
+        'é3': "username avec caractères non autorisés",
+        'x' * 101: "username de plus de 100 caractères",
+        '1006': "email associé à plusieurs usernames",
+        '1007': "email associé à plusieurs usernames",
+        '1008': "username associé à plusieurs emails",
+    }
+    assert rejets['ligne'].tolist() == [2, 3, 4, 5, 6, 7, 8, 10]
+    assert len(_lire(tmp_path / 'rejets.csv')) == len(rejets)
+
+
+def test_validation_sans_rejet_ni_fichier(tmp_path):
+    valides, rejets = import_user_moodle.valider_utilisateurs(_emails('1001', '1002'), tmp_path / 'rejets.csv')
+    assert valides['anonymat'].tolist() == ['1001', '1002']
+    assert rejets.empty
+    assert not (tmp_path / 'rejets.csv').exists()
+
+
+def test_delta_aller_retour(tmp_path):
+    etat = tmp_path / 'etat.json'
+    assert import_user_moodle.charger_etat(etat).empty
+
+    premier = _emails('1001', '1002', '1003')
+    empreintes = import_user_moodle.calculer_empreintes(premier, 42)
+    delta, supprimes = import_user_moodle.filtrer_delta(premier, empreintes, import_user_moodle.charger_etat(etat))
+    assert delta['anonymat'].tolist() == ['1001', '1002', '1003'] and supprimes == []
+    import_user_moodle.enregistrer_etat(etat, empreintes)
+    assert not (tmp_path / 'etat.json.tmp').exists()
+
+    # 1002 change d'email, 1003 disparaît, 1004 arrive
+    second = pd.DataFrame({'anonymat': ['1001', '1002', '1004'],
+                           'email': ['1001@exemple.fr', 'nouveau@exemple.fr', '1004@exemple.fr']})
+    empreintes = import_user_moodle.calculer_empreintes(second, 42)
+    precedent = import_user_moodle.charger_etat(etat)
+    delta, supprimes = import_user_moodle.filtrer_delta(second, empreintes, precedent)
+    assert delta['anonymat'].tolist() == ['1002', '1004']
+    assert supprimes == ['1003']
+
+    # Changer de cohorte modifie toutes les empreintes
+    delta, _ = import_user_moodle.filtrer_delta(second, import_user_moodle.calculer_empreintes(second, 43), precedent)
+    assert delta['anonymat'].tolist() == ['1001', '1002', '1004']
+
+
+def test_delta_en_ligne_de_commande(tmp_path, capsys):
+    roster, sortie, etat = tmp_path / 'roster.xlsx', tmp_path / 'moodle.csv', tmp_path / 'etat.json'
+    arguments = [str(roster), str(sortie), '--delta', str(etat)]
+    _emails('1001', '1002').to_excel(roster, index=False, header=False)
+    import_user_moodle.main(arguments)
+    assert [u['username'] for u in _lire(sortie)] == ['1001', '1002']
+
+    sortie.unlink()
+    import_user_moodle.main(arguments)
+    assert 'Aucun changement' in capsys.readouterr().out
+    assert not sortie.exists()
+
+    _emails('1001', '1002', '1003').to_excel(roster, index=False, header=False)
+    import_user_moodle.main(arguments)
+    assert [u['username'] for u in _lire(sortie)] == ['1003']
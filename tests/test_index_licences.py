@@ -0,0 +1,19 @@
+"""Tests de l'index binaire des licences (.licidx) face au fichier XLSX équivalent."""
+
+import pandas as pd
+
+import colle
+from index_licences import chemin_index, ecrire_index_licences
+
+
+def test_doublons_identiques_dans_les_deux_formats(tmp_path):
+    df = pd.DataFrame({'Numéro Anonymat': [1234, 7001, 1234, 5, 7001, 1234],
+                       'Licence': ['LAS1', 'SV', 'PASS', 'DROIT', 'SV', 'LAS2']})
+    fichier = tmp_path / 'licences.xlsx'
+    df.to_excel(fichier, index=False)
+    assert ecrire_index_licences(chemin_index(fichier), df['Numéro Anonymat'], df['Licence']) == 3
+
+    depuis_xlsx = colle.lire_licences(fichier)
+    depuis_index = colle.lire_licences(chemin_index(fichier))
+    assert dict(depuis_index) == depuis_xlsx == {'1234': 'LAS2', '7001': 'SV', '5': 'DROIT'}
+    assert len(depuis_index) == 3
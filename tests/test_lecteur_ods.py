@@ -0,0 +1,31 @@
+"""Tests du lecteur ODS en flux."""
+
+import zipfile
+
+from lecteur_ods import iterer_lignes_ods
+
+CONTENU = """<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+    xmlns:dc="http://purl.org/dc/elements/1.1/">
+<office:body><office:spreadsheet><table:table table:name="Feuille1">
+<table:table-row>
+  <table:table-cell office:value-type="string">
+    <office:annotation><dc:creator>Secrétariat</dc:creator><text:p>numéro vérifié</text:p></office:annotation>
+    <text:p>1234</text:p>
+  </table:table-cell>
+  <table:table-cell office:value-type="string"><text:p>Note <text:s/>de <office:annotation><text:p>à revoir</text:p></office:annotation>colle</text:p></table:table-cell>
+  <table:table-cell><office:annotation><text:p>cellule vide commentée</text:p></office:annotation></table:table-cell>
+</table:table-row>
+</table:table></office:spreadsheet></office:body></office:document-content>
+"""
+
+
+def test_commentaires_ignores(tmp_path):
+    fichier = tmp_path / 'commentaires.ods'
+    with zipfile.ZipFile(fichier, 'w') as archive:
+        archive.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet')
+        archive.writestr('content.xml', CONTENU)
+
+    assert list(iterer_lignes_ods(fichier, colonnes=(0, 1, 2))) == [('1234', 'Note  de colle', None)]
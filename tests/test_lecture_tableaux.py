@@ -0,0 +1,27 @@
+"""Tests de lecture_tableaux : mêmes résultats quel que soit le moteur de lecture."""
+
+import pytest
+
+import colle
+import lecture_tableaux
+
+MOTEURS = [lecture_tableaux.MOTEUR_FLUX] + (
+    [lecture_tableaux.MOTEUR_CALAMINE] if lecture_tableaux.calamine_disponible() else [])
+
+
+@pytest.fixture
+def notes_xlsx(tmp_path):
+    """Classeur de notes écrit par l'outil lui-même : colonnes A à C vides, note en D."""
+    fichier = tmp_path / 'notes_178.xlsx'
+    colle._ecrire_notes_xlsx({'1234': 12.5, '9876': 8.0}, {'Q01': 0.5}, fichier)
+    return fichier
+
+
+@pytest.mark.parametrize('moteur', MOTEURS)
+def test_positions_conservees_colonnes_vides_a_gauche(notes_xlsx, moteur):
+    lignes = list(lecture_tableaux.iterer_lignes(notes_xlsx, colonnes=[3, 46], entete=False, moteur=moteur))
+    assert lignes[5:] == [(12.5, '1234'), (8, '9876')]
+
+
+def test_lire_notes_xlsx_moteur_par_defaut(notes_xlsx):
+    assert colle.lire_notes_xlsx(notes_xlsx).notes == {'1234': 12.5, '9876': 8.0}
@@ -0,0 +1,36 @@
+"""Tests de la configuration de routage des licences (licences.charger_routage)."""
+
+import json
+
+import pytest
+
+from licences import charger_routage
+
+
+def _charger(tmp_path, config):
+    fichier = tmp_path / 'routage.json'
+    fichier.write_text(json.dumps(config), encoding='utf-8')
+    return charger_routage(fichier)
+
+
+def test_routage_valide(tmp_path):
+    routage = _charger(tmp_path, {'categories': [{'nom': '1_7', 'prefixes': ['1', 7]},
+                                                 {'nom': '8', 'plages': [[8000, 8999]]}]})
+    assert [(c['nom'], c['prefixes'], c['plages']) for c in routage] == [('1_7', ['1', '7'], []),
+                                                                        ('8', [], [(8000, 8999)])]
+
+
+@pytest.mark.parametrize('config, message', [
+    ({'categories': ['x']}, 'catégorie n°1'),
+    ({'categories': {'nom': '8'}}, "'categories'"),
+    ({'categories': [{'nom': '8', 'plages': [1000]}]}, "catégorie '8'"),
+    ({'categories': [{'nom': '8', 'plages': [[8000, '8999']]}]}, "catégorie '8'"),
+    ({'categories': [{'nom': '8', 'plages': [[8999, 8000]]}]}, "catégorie '8'"),
+    ({'categories': [{'nom': '8', 'plages': [[True, 9]]}]}, "catégorie '8'"),
+    ({'categories': [{'nom': '8', 'plages': {'debut': 8000}}]}, "catégorie '8'"),
+    ({'categories': [{'nom': '1', 'prefixes': '17'}]}, "catégorie '1'"),
+    ({'categories': [{'nom': '1', 'prefixes': ['1'], 'fichier': 3}]}, "catégorie '1'"),
+])
+def test_routage_mal_forme(tmp_path, config, message):
+    with pytest.raises(ValueError, match=message):
+        _charger(tmp_path, config)
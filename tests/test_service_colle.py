@@ -0,0 +1,215 @@
+"""
+Tests du service HTTP de traitement des colles, servi en local (creer_serveur, port 0).
+"""
+
+import http.client
+import json
+import os
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+import colle
+import service_colle
+
+
+class _Serveur:
+    """Service et serveur HTTP démarrés dans un thread, sur un port libre."""
+
+    def __init__(self, dossier, **options):
+        self.service = service_colle.ServiceColle(dossier, **options)
+        self.serveur = service_colle.creer_serveur('127.0.0.1', 0, self.service, journal=False)
+        self.port = self.serveur.server_address[1]
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def requete(self, methode, chemin, corps=None, entetes=None):
+        """Renvoie (statut, en-têtes, corps en octets)."""
+        connexion = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            connexion.request(methode, chemin, corps, entetes or {})
+            reponse = connexion.getresponse()
+            return reponse.status, dict(reponse.getheaders()), reponse.read()
+        finally:
+            connexion.close()
+
+    def soumettre(self, champs, attendre=False):
+        """POST /jobs en multipart/form-data ; champs : {nom: (nom de fichier ou None, octets)}."""
+        frontiere = uuid.uuid4().hex
+        corps = b''
+        for nom, (nom_fichier, contenu) in champs.items():
+            disposition = f'form-data; name="{nom}"' + (f'; filename="{nom_fichier}"' if nom_fichier else '')
+            corps += f"--{frontiere}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + contenu + b"\r\n"
+        corps += f"--{frontiere}--\r\n".encode()
+        return self.requete('POST', '/jobs' + ('?attendre=1' if attendre else ''), corps,
+                            {'Content-Type': f'multipart/form-data; boundary={frontiere}'})
+
+    def fermer(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        self.service.arreter()
+
+
+@pytest.fixture
+def serveur(tmp_path):
+    serveurs = []
+
+    def demarrer(**options):
+        serveur = _Serveur(tmp_path / f'service{len(serveurs)}', **options)
+        serveurs.append(serveur)
+        return serveur
+
+    yield demarrer
+    for serveur in serveurs:
+        serveur.fermer()
+
+
+@pytest.fixture
+def fichiers(tmp_path):
+    """Contenus d'un fichier de notes (CSV) et d'un fichier de licences (xlsx)."""
+    notes = tmp_path / 'notes.csv'
+    colle._ecrire_notes_csv({'1234': 12.5, '7001': 8.0}, {'Q01': 0.5}, notes)
+    licences = tmp_path / 'licences.xlsx'
+    pd.DataFrame({'Numéro Anonymat': ['1234', '7001'], 'Licence': ['SV', 'DROIT']}).to_excel(licences, index=False)
+    return notes.read_bytes(), licences.read_bytes()
+
+
+def test_routes(serveur, fichiers):
+    notes, licences = fichiers
+    service = serveur(nb_processus=1)
+
+    assert service.requete('GET', '/sante')[0] == 200
+    statut, _, corps = service.requete('POST', '/licences', licences)
+    assert statut == 201
+    empreinte = json.loads(corps)['licences']
+
+    champs = {'notes': ('notes.csv', notes), 'licences_id': (None, empreinte.encode())}
+    statut, entetes, corps = service.soumettre(champs, attendre=True)
+    assert statut == 200
+    assert entetes['Content-Type'] == service_colle.TYPE_XLSX
+    assert corps[:2] == b'PK'
+
+    statut, entetes, corps = service.soumettre({'notes': ('notes.csv', notes), 'licences': ('l.xlsx', licences)})
+    assert statut == 202
+    chemin = entetes['Location']
+    while json.loads(service.requete('GET', chemin)[2])['etat'] not in ('termine', 'echec'):
+        time.sleep(0.05)
+    description = json.loads(service.requete('GET', chemin)[2])
+    assert description['etat'] == 'termine'
+    assert description['bilan']['cache_licences']
+    assert service.requete('GET', f'{chemin}/resultat')[0] == 200
+    assert service.requete('DELETE', chemin)[0] == 204
+    assert service.requete('GET', chemin)[0] == 404
+
+    metriques = json.loads(service.requete('GET', '/metriques')[2])
+    assert metriques['compteurs']['termines'] == 2
+    assert service.requete('GET', '/inconnue')[0] == 404
+
+
+@pytest.mark.parametrize('licences_id', ['../../../etc/passwd', '/etc/passwd', 'abc', 'g' * 64, 'a' * 65])
+def test_licences_id_invalide(serveur, licences_id):
+    service = serveur(nb_processus=1)
+    statut, _, corps = service.soumettre({'notes': ('notes.csv', b'x'), 'licences_id': (None, licences_id.encode())})
+    assert statut == 400
+    assert 'licences_id' in json.loads(corps)['erreur']
+
+
+def test_licences_id_inconnu(serveur):
+    service = serveur(nb_processus=1)
+    assert service.soumettre({'notes': ('notes.csv', b'x'), 'licences_id': (None, b'0' * 64)})[0] == 404
+
+
+def test_nom_de_sortie_assaini(serveur, fichiers):
+    notes, licences = fichiers
+    service = serveur(nb_processus=1)
+    champs = {'notes': ('notes.csv', notes), 'licences': ('l.xlsx', licences),
+              'sortie': (None, '"\r\nSet-Cookie: x=1/../Résultats".xlsx'.encode())}
+    statut, entetes, _ = service.soumettre(champs, attendre=True)
+    assert statut == 200
+    assert 'Set-Cookie' not in entetes
+    assert entetes['Content-Disposition'] == (
+        'attachment; filename="R_sultats.xlsx"; filename*=UTF-8\'\'R%C3%A9sultats.xlsx')
+
+
+@pytest.mark.parametrize('longueur', ['abc', '-1', '1e3'])
+def test_content_length_invalide(serveur, longueur):
+    service = serveur(nb_processus=1)
+    statut, _, corps = service.requete('POST', '/licences', b'', {'Content-Length': longueur})
+    assert statut == 400
+    assert 'Content-Length' in json.loads(corps)['erreur']
+
+
+def test_processus_tue(serveur, fichiers):
+    notes, licences = fichiers
+    service = serveur(nb_processus=1)
+    champs = {'notes': ('notes.csv', notes), 'licences': ('l.xlsx', licences)}
+
+    statut, entetes, _ = service.soumettre(champs)
+    chemin = entetes['Location']
+    while json.loads(service.requete('GET', chemin)[2])['etat'] in ('en_attente', 'en_cours'):
+        time.sleep(0.05)
+    os.kill(json.loads(service.requete('GET', chemin)[2])['bilan']['pid'], signal.SIGKILL)
+
+    # Le pool cassé est remplacé : les traitements suivants aboutissent
+    for _ in range(2):
+        statut, _, corps = service.soumettre(champs, attendre=True)
+        assert statut == 200, corps
+    assert json.loads(service.requete('GET', '/metriques')[2])['compteurs']['pools_recrees'] == 1
+
+
+class _PoolSuspendu:
+    """Remplace le pool : les traitements restent en cours jusqu'à liberer()."""
+
+    def __init__(self):
+        self.futurs = []
+        self.libre = False
+
+    def submit(self, fonction, *args):
+        futur = Future()
+        self.futurs.append(futur)
+        if self.libre:
+            futur.set_exception(RuntimeError("arrêt du test"))
+        return futur
+
+    def liberer(self):
+        self.libre = True
+        for futur in self.futurs:
+            if not futur.done():
+                futur.set_exception(RuntimeError("arrêt du test"))
+
+    def shutdown(self, **options):
+        pass
+
+
+def test_file_pleine(serveur, fichiers):
+    notes, licences = fichiers
+    service = serveur(nb_processus=1, taille_file=1)
+    service.service.pool.shutdown()
+    pool = service.service.pool = _PoolSuspendu()
+    champs = {'notes': ('notes.csv', notes), 'licences': ('l.xlsx', licences)}
+    try:
+        # Un traitement en cours, puis un en attente : la file d'une place est pleine
+        assert service.soumettre(champs)[0] == 202
+        while not pool.futurs:
+            time.sleep(0.01)
+        assert service.soumettre(champs)[0] == 202
+        statut, entetes, _ = service.soumettre(champs)
+        assert statut == 503
+        assert entetes['Retry-After'] == '5'
+        metriques = json.loads(service.requete('GET', '/metriques')[2])
+        assert metriques['compteurs']['refuses'] == 1
+        assert metriques['file']['profondeur'] == 1
+    finally:
+        pool.liberer()
+
+
+@pytest.mark.parametrize('option', ['--processus=-1', '--processus=0', '--file=-1', '--file=0', '--taille-max=0'])
+def test_options_strictement_positives(option, capsys):
+    with pytest.raises(SystemExit) as sortie:
+        service_colle.main([option])
+    assert sortie.value.code == 2
+    assert 'strictement positif' in capsys.readouterr().err
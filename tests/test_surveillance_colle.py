@@ -0,0 +1,71 @@
+"""Tests de la surveillance du dossier de dépôt (surveillance_colle)."""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import colle
+import surveillance_colle
+from service_colle import traiter_job
+
+
+def _traiter_ou_planter(fichier_notes, *args):
+    """traiter_job, mais le processus meurt si un fichier .planter accompagne les notes (une fois)."""
+    marqueur = Path(fichier_notes).with_suffix('.planter')
+    if marqueur.exists():
+        marqueur.unlink()
+        os._exit(1)
+    return traiter_job(fichier_notes, *args)
+
+
+@pytest.fixture
+def depot(tmp_path):
+    depot = tmp_path / 'depot'
+    depot.mkdir()
+    colle._ecrire_notes_csv({'1234': 12.5, '7001': 8.0}, {'Q01': 0.5}, depot / 'notes.csv')
+    pd.DataFrame({'Numéro Anonymat': ['1234', '7001'], 'Licence': ['SV', 'DROIT']}).to_excel(
+        tmp_path / 'licences.xlsx', index=False)
+    return depot
+
+
+def test_licences_invalides_au_lancement(depot, tmp_path):
+    (tmp_path / 'licences.csv').write_text("Nom,Prénom\nA,B\n", encoding='utf-8')
+    with pytest.raises(colle.ErreurColonnes):
+        surveillance_colle.Surveillance(depot, tmp_path / 'licences.csv', tmp_path / 'sortie')
+
+
+def test_pool_recree_apres_mort_d_un_processus(depot, tmp_path, monkeypatch):
+    monkeypatch.setattr(surveillance_colle, 'traiter_job', _traiter_ou_planter)
+    (depot / 'notes.planter').touch()
+    surveillance = surveillance_colle.Surveillance(depot, tmp_path / 'licences.xlsx', tmp_path / 'sortie',
+                                                   nb_processus=1, intervalle=0.01, delai=0)
+    surveillance.executer(une_fois=True)
+
+    assert surveillance.bilan == {'traites': 1, 'echecs': 0}
+    assert (depot / surveillance_colle.DOSSIER_TRAITES / 'notes.csv').exists()
+    assert (tmp_path / 'sortie' / 'notes_resultats.xlsx').exists()
+
+
+def test_sorties_distinctes(depot, tmp_path):
+    colle._ecrire_notes_xlsx({'1234': 11.0}, {'Q01': 0.5}, depot / 'notes.xlsx')
+    sortie = tmp_path / 'sortie'
+    sortie.mkdir()
+    (sortie / 'notes_resultats.xlsx').write_bytes(b'resultat precedent')
+
+    surveillance = surveillance_colle.Surveillance(depot, tmp_path / 'licences.xlsx', sortie,
+                                                   nb_processus=2, intervalle=0.01, delai=0)
+    surveillance.executer(une_fois=True)
+
+    assert surveillance.bilan == {'traites': 2, 'echecs': 0}
+    assert (sortie / 'notes_resultats.xlsx').read_bytes() == b'resultat precedent'
+    assert sorted(f.name for f in sortie.iterdir()) == ['notes_resultats.xlsx', 'notes_resultats_1.xlsx',
+                                                         'notes_resultats_2.xlsx']
+
+
+def test_processus_strictement_positif(depot, tmp_path, capsys):
+    with pytest.raises(SystemExit) as sortie:
+        surveillance_colle.main([str(depot), '--licences', str(tmp_path / 'licences.xlsx'), '--processus=0'])
+    assert sortie.value.code == 2
+    assert 'strictement positif' in capsys.readouterr().err
@@ -0,0 +1,30 @@
+"""Tests de traiter_colle en ligne de commande."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+import colle
+
+DOSSIER_OUTILS = Path(__file__).resolve().parent.parent
+
+
+def test_sans_question_avec_toutes_les_options(tmp_path):
+    """Avec --notes, --licences et --sortie, l'entrée standard n'est jamais lue."""
+    notes = tmp_path / 'notes.csv'
+    # 1235 est absent des licences : sans question, il reste sans licence
+    colle._ecrire_notes_csv({'1234': 12.5, '7001': 8.0, '1235': 10.0}, {'Q01': 0.5}, notes)
+    licences = tmp_path / 'licences.xlsx'
+    pd.DataFrame({'Numéro Anonymat': ['1234', '7001'], 'Licence': ['SV', 'DROIT']}).to_excel(licences, index=False)
+
+    processus = subprocess.run(
+        [sys.executable, str(DOSSIER_OUTILS / 'traiter_colle.py'), '--notes', str(notes), '--licences',
+         str(licences), '--sortie', str(tmp_path / 'resultats'), '--format', 'csv'],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, cwd=tmp_path,
+    )
+
+    assert processus.returncode == 0, processus.stderr
+    assert (tmp_path / 'resultats.zip').exists()
+    assert 'EOFError' not in processus.stderr
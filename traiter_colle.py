@@ -4,9 +4,27 @@
 Programme pour traiter les fichiers de notes d'examen et les organiser par licence.
 """
 
-import pandas as pd
+import argparse
+import logging
 import sys
-from pathlib import Path
+
+import colle
+from colle import TOUTES_LICENCES, ErreurColle, ErreurColonnes
+from ecriture_sortie import FORMAT_PAR_DEFAUT, FORMATS_SORTIE
+from index_licences import EXTENSION_INDEX
+from journal import ajouter_options, compter, configurer_depuis_options, detailler, obtenir_journal, resumer_compteurs
+import mesures
+from mesures import etape
+
+journal = obtenir_journal('traiter_colle')
+
+# Libellés des anomalies comptées pendant le traitement
+ANOMALIES = {
+    'ligne_ignoree': "ligne(s) de notes ignorée(s)",
+    'numero_invalide': "numéro(s) invalide(s)",
+    'numero_hors_groupe': "numéro(s) hors des groupes 1/7/8 et 9",
+    'etudiant_sans_licence': "étudiant(s) sans licence",
+}
 
 
 def selectionner_fichier(titre, types_fichiers):
@@ -93,6 +111,53 @@ def selectionner_licences_pour_groupes(licences_disponibles):
     return groupes
 
 
+def charger_groupes(fichier_groupes):
+    """
+    Lit la définition des groupes dans un fichier JSON (voir colle.charger_groupes).
+
+    Args:
+        fichier_groupes: Chemin vers le fichier JSON des groupes
+
+    Returns:
+        dict: {nom du groupe: [licences] ou TOUTES_LICENCES}
+    """
+    journal.info(f"📄 Lecture des groupes : {fichier_groupes}")
+    try:
+        groupes = colle.charger_groupes(fichier_groupes)
+    except ErreurColle as e:
+        _quitter(e)
+    journal.info(f"   ✓ {len(groupes)} groupe(s) : {', '.join(groupes)}")
+    return groupes
+
+
+def _quitter(erreur):
+    """Affiche une erreur du traitement et arrête le programme."""
+    journal.error(f"✗ Erreur : {erreur}")
+    if isinstance(erreur, ErreurColonnes):
+        journal.info(f"   Colonnes trouvées : {erreur.trouvees}")
+    sys.exit(1)
+
+
+def _afficher_lecture_notes(resultat):
+    """Affiche le bilan de lecture d'un fichier de notes."""
+    utiles = " utiles" if resultat.format == 'xlsx' else ""
+    verbe = "extraits" if resultat.format == 'xlsx' else "calculés"
+    journal.info(f"   ✓ Fichier chargé : {resultat.nb_lignes} lignes x {resultat.nb_colonnes} colonnes{utiles}")
+    journal.info(f"   ✓ {len(resultat.taux_reussite)} taux de réussite {verbe}")
+    journal.info(f"   ✓ {len(resultat.notes)} notes extraites")
+    if resultat.lignes_ignorees > 0:
+        journal.warning(f"   ⚠ {resultat.lignes_ignorees} ligne(s) ignorée(s) (données manquantes)")
+    if resultat.erreurs:
+        journal.warning(f"   ⚠ {len(resultat.erreurs)} erreur(s) de validation détectée(s)")
+    compter('ligne_ignoree', resultat.lignes_ignorees)
+    compter('numero_invalide', len(resultat.erreurs))
+    if journal.isEnabledFor(logging.DEBUG):
+        for question, taux in sorted(resultat.taux_reussite.items()):
+            journal.debug(f"      {question} : {taux * 100:.2f}%",
+                          extra={'details': {'type': 'taux_reussite', 'question': question, 'taux': taux}})
+    return resultat.notes, resultat.taux_reussite, resultat.erreurs
+
+
 def lire_fichier_csv_notes(fichier_path):
     """
     Lit un fichier CSV de notes avec le format spécifique (séparateur ;).
@@ -104,99 +169,17 @@ def lire_fichier_csv_notes(fichier_path):
         tuple: (dict_notes, taux_reussite, erreurs) où dict_notes = {numero: note},
                taux_reussite = {question: taux}, et erreurs = liste des problèmes trouvés
     """
+    journal.info(f"📄 Lecture du fichier CSV : {fichier_path}")
     try:
-        print(f"📄 Lecture du fichier CSV : {fichier_path}")
-
-        # Lire le fichier CSV avec séparateur ;
-        df = pd.read_csv(fichier_path, sep=';', header=0)
-
-        print(f"   ✓ Fichier chargé : {df.shape[0]} lignes x {df.shape[1]} colonnes")
-
-        # Extraire les notes des étudiants
-        dict_notes = {}
-        erreurs = []
-        etudiants_sans_numero = 0
-
-        # Colonnes attendues : "Mark" pour la note, "etu" pour le numéro d'anonymat
-        if 'Mark' not in df.columns or 'etu' not in df.columns:
-            print(f"✗ Erreur : Le fichier doit contenir les colonnes 'Mark' et 'etu'")
-            print(f"   Colonnes trouvées : {df.columns.tolist()}")
-            sys.exit(1)
-
-        # Calculer les taux de réussite à partir des colonnes Q01 à Q40
-        taux_reussite = {}
-        questions_colonnes = [col for col in df.columns if col.startswith('Q') and len(col) == 3]
-
-        for question_col in sorted(questions_colonnes):
-            # Compter le nombre de 1 (bonnes réponses) pour cette question
-            bonnes_reponses = df[question_col].sum()
-            total_reponses = df[question_col].notna().sum()
-
-            if total_reponses > 0:
-                taux = bonnes_reponses / total_reponses
-                taux_reussite[question_col] = taux
-
-        print(f"   ✓ {len(taux_reussite)} taux de réussite calculés")
-
-        # Extraire les notes et numéros d'étudiants
-        for idx, row in df.iterrows():
-            numero_raw = row.get('etu')
-            note_raw = row.get('Mark')
-
-            # Vérifier que les données sont valides
-            if pd.notna(numero_raw) and pd.notna(note_raw) and str(numero_raw).strip() != '' and str(note_raw).strip() != '':
-                try:
-                    # Conversion plus robuste
-                    numero_str = str(numero_raw).strip()
-                    note_str = str(note_raw).strip().replace(',', '.')
-
-                    # Gérer les numéros qui peuvent être des entiers ou des chaînes
-                    try:
-                        numero = str(int(float(numero_str)))
-                    except ValueError:
-                        numero = numero_str
-
-                    note = float(note_str)
-
-                    # Vérifier que le numéro a exactement 4 chiffres
-                    if len(numero) != 4 or not numero.isdigit():
-                        erreurs.append({
-                            'type': 'numero_invalide',
-                            'numero': numero,
-                            'note': note,
-                            'ligne': idx + 2,  # +2 car ligne 0 = header, et on commence à 0
-                            'raison': f"Le numéro doit comporter exactement 4 chiffres (trouvé: {numero})"
-                        })
-                        continue
-
-                    dict_notes[numero] = note
-                except (ValueError, TypeError, AttributeError) as e:
-                    etudiants_sans_numero += 1
-            else:
-                etudiants_sans_numero += 1
-
-        print(f"   ✓ {len(dict_notes)} notes extraites")
-        if etudiants_sans_numero > 0:
-            print(f"   ⚠ {etudiants_sans_numero} ligne(s) ignorée(s) (données manquantes)")
-        if erreurs:
-            print(f"   ⚠ {len(erreurs)} erreur(s) de validation détectée(s)")
-
-        return dict_notes, taux_reussite, erreurs
-
-    except FileNotFoundError:
-        print(f"✗ Erreur : Le fichier {fichier_path} n'existe pas.")
-        sys.exit(1)
-    except Exception as e:
-        print(f"✗ Erreur lors de la lecture du fichier CSV de notes : {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+        return _afficher_lecture_notes(colle.lire_notes_csv(fichier_path))
+    except ErreurColle as e:
+        _quitter(e)
 
 
 def lire_fichier_notes(fichier_path):
     """
     Lit le fichier de notes et extrait les données nécessaires.
-    Détecte automatiquement le format (XLSX ou CSV).
+    Détecte automatiquement le format d'après le contenu (classeur XLSX/XLS/ODS ou CSV).
 
     Args:
         fichier_path: Chemin vers le fichier de notes
@@ -205,17 +188,14 @@ def lire_fichier_notes(fichier_path):
         tuple: (dict_notes, taux_reussite, erreurs) où dict_notes = {numero: note},
                taux_reussite = {question: taux}, et erreurs = liste des problèmes trouvés
     """
-    # Détecter l'extension du fichier
-    extension = Path(fichier_path).suffix.lower()
+    try:
+        format_fichier = colle.detecter_format_notes(fichier_path)
+    except ErreurColle as e:
+        _quitter(e)
 
-    if extension == '.csv':
+    if format_fichier == 'csv':
         return lire_fichier_csv_notes(fichier_path)
-    elif extension in ['.xlsx', '.xls']:
-        return lire_fichier_xlsx_notes(fichier_path)
-    else:
-        print(f"✗ Erreur : Format de fichier non supporté : {extension}")
-        print(f"   Formats supportés : .xlsx, .csv")
-        sys.exit(1)
+    return lire_fichier_xlsx_notes(fichier_path)
 
 
 def lire_fichier_xlsx_notes(fichier_path):
@@ -229,146 +209,36 @@ def lire_fichier_xlsx_notes(fichier_path):
         tuple: (dict_notes, taux_reussite, erreurs) où dict_notes = {numero: note},
                taux_reussite = {question: taux}, et erreurs = liste des problèmes trouvés
     """
+    journal.info(f"📄 Lecture du fichier XLSX : {fichier_path}")
     try:
-        print(f"📄 Lecture du fichier XLSX : {fichier_path}")
-
-        # Lire le fichier XLSX
-        df = pd.read_excel(fichier_path, sheet_name=0, header=None)
-
-        print(f"   ✓ Fichier chargé : {df.shape[0]} lignes x {df.shape[1]} colonnes")
-
-        # Vérifier que nous avons au moins 47 colonnes (index 0 à 46)
-        if df.shape[1] < 47:
-            print(f"   ⚠ Attention : Le fichier ne contient que {df.shape[1]} colonnes, 47 attendues")
-            print(f"   ℹ Extension de la DataFrame pour ajouter les colonnes manquantes...")
-            # Ajouter des colonnes vides si nécessaire
-            for i in range(df.shape[1], 47):
-                df[i] = pd.NA
-
-
-        # Extraire les taux de réussite (ligne 4, index 4)
-        taux_reussite = {}
-        ligne_taux = df.iloc[4]
-
-        # Les questions sont dans les colonnes 6 à 45 (Q01 à Q40)
-        for i in range(6, 46):
-            question_num = i - 5  # Q01 = 1, Q02 = 2, etc.
-            taux = ligne_taux.get(i) if i in ligne_taux.index else None
-            if pd.notna(taux) and taux != '':
-                try:
-                    # Gérer les différents formats possibles
-                    taux_float = float(str(taux).replace(',', '.').replace('%', ''))
-                    taux_reussite[f"Q{question_num:02d}"] = taux_float
-                except (ValueError, TypeError, AttributeError):
-                    pass  # Ignorer les valeurs non convertibles
-
-        print(f"   ✓ {len(taux_reussite)} taux de réussite extraits")
-
-        # Extraire les notes des étudiants (à partir de la ligne 5, index 5)
-        dict_notes = {}
-        erreurs = []
-        etudiants_sans_numero = 0
-
-        for idx in range(5, len(df)):
-            ligne = df.iloc[idx]
-
-            # Colonne 46 : numéro d'anonymat
-            # Colonne 3 : note
-            numero_raw = ligne.get(46) if 46 in ligne.index else None
-            note_raw = ligne.get(3) if 3 in ligne.index else None
-
-            # Vérifier que les données sont valides
-            if pd.notna(numero_raw) and pd.notna(note_raw) and numero_raw != '' and note_raw != '':
-                try:
-                    # Conversion plus robuste
-                    numero_str = str(numero_raw).strip()
-                    note_str = str(note_raw).strip().replace(',', '.')
-
-                    numero = str(int(float(numero_str)))
-                    note = float(note_str)
-
-                    # Vérifier que le numéro a exactement 4 chiffres
-                    if len(numero) != 4 or not numero.isdigit():
-                        erreurs.append({
-                            'type': 'numero_invalide',
-                            'numero': numero,
-                            'note': note,
-                            'ligne': idx + 1,
-                            'raison': f"Le numéro doit comporter exactement 4 chiffres (trouvé: {numero})"
-                        })
-                        continue
-
-                    dict_notes[numero] = note
-                except (ValueError, TypeError, AttributeError) as e:
-                    etudiants_sans_numero += 1
-            else:
-                etudiants_sans_numero += 1
-
-        print(f"   ✓ {len(dict_notes)} notes extraites")
-        if etudiants_sans_numero > 0:
-            print(f"   ⚠ {etudiants_sans_numero} ligne(s) ignorée(s) (données manquantes)")
-        if erreurs:
-            print(f"   ⚠ {len(erreurs)} erreur(s) de validation détectée(s)")
-
-        return dict_notes, taux_reussite, erreurs
-        
-    except FileNotFoundError:
-        print(f"✗ Erreur : Le fichier {fichier_path} n'existe pas.")
-        sys.exit(1)
-    except Exception as e:
-        print(f"✗ Erreur lors de la lecture du fichier de notes : {e}")
-        sys.exit(1)
+        return _afficher_lecture_notes(colle.lire_notes_xlsx(fichier_path))
+    except ErreurColle as e:
+        _quitter(e)
 
 
 def lire_fichier_licences(fichier_path):
     """
     Lit le fichier des licences.
-    Détecte automatiquement le format (XLSX ou CSV).
+    Détecte automatiquement le format d'après le contenu (XLSX, XLS, ODS, CSV
+    ou index .licidx produit par sumup_licences).
 
     Args:
-        fichier_path: Chemin vers le fichier des licences (XLSX ou CSV)
+        fichier_path: Chemin vers le fichier des licences (XLSX, CSV ou .licidx)
 
     Returns:
         dict: {numero_anonymat: licence}
     """
+    journal.info(f"📄 Lecture du fichier : {fichier_path}")
     try:
-        print(f"📄 Lecture du fichier : {fichier_path}")
-
-        # Détecter l'extension du fichier
-        extension = Path(fichier_path).suffix.lower()
-
-        # Lire le fichier selon l'extension
-        if extension == '.csv':
-            df = pd.read_csv(fichier_path, sep=';')
-        elif extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(fichier_path)
-        else:
-            print(f"✗ Erreur : Format de fichier non supporté : {extension}")
-            print(f"   Formats supportés : .xlsx, .csv")
-            sys.exit(1)
-
-        print(f"   ✓ Fichier chargé : {len(df)} étudiants")
-
-        # Colonnes attendues : "Numéro Anonymat" et "Licence"
-        if 'Numéro Anonymat' not in df.columns or 'Licence' not in df.columns:
-            print(f"✗ Erreur : Le fichier doit contenir les colonnes 'Numéro Anonymat' et 'Licence'")
-            print(f"   Colonnes trouvées : {df.columns.tolist()}")
-            sys.exit(1)
+        dict_licences = colle.lire_licences(fichier_path)
+    except ErreurColle as e:
+        _quitter(e)
 
-        dict_licences = {}
-        for _, row in df.iterrows():
-            numero = str(int(row['Numéro Anonymat']))
-            licence = str(row['Licence']).strip()
-            dict_licences[numero] = licence
-
-        return dict_licences
-
-    except FileNotFoundError:
-        print(f"✗ Erreur : Le fichier {fichier_path} n'existe pas.")
-        sys.exit(1)
-    except Exception as e:
-        print(f"✗ Erreur lors de la lecture du fichier des licences : {e}")
-        sys.exit(1)
+    if isinstance(dict_licences, dict):
+        journal.info(f"   ✓ Fichier chargé : {len(dict_licences)} étudiants")
+    else:
+        journal.info(f"   ✓ Index chargé : {len(dict_licences)} étudiants")
+    return dict_licences
 
 
 def separer_notes_par_premier_chiffre(dict_notes, taux_reussite, fichier_notes_original):
@@ -377,7 +247,8 @@ def separer_notes_par_premier_chiffre(dict_notes, taux_reussite, fichier_notes_o
     - Groupe 1 : numéros commençant par 1, 7 ou 8
     - Groupe 2 : numéros commençant par 9
 
-    Crée deux fichiers de notes séparés.
+    Crée deux fichiers de notes séparés, au format CSV pour un fichier CSV
+    et XLSX pour un classeur.
 
     Args:
         dict_notes: {numero: note}
@@ -387,123 +258,90 @@ def separer_notes_par_premier_chiffre(dict_notes, taux_reussite, fichier_notes_o
     Returns:
         tuple: (fichier_178, fichier_9) chemins des deux fichiers créés
     """
-    print("\n" + "=" * 70)
-    print("SÉPARATION DES NUMÉROS CREM")
-    print("=" * 70)
-    print()
-
-    # Séparer les notes en deux groupes
-    notes_178 = {}  # Numéros commençant par 1, 7 ou 8
-    notes_9 = {}    # Numéros commençant par 9
+    journal.info("\n" + "=" * 70)
+    journal.info("SÉPARATION DES NUMÉROS CREM")
+    journal.info("=" * 70)
+    journal.info("")
+
+    separees = colle.separer_notes_par_premier_chiffre(dict_notes)
+    if separees.ignores:
+        compter('numero_hors_groupe', len(separees.ignores))
+        journal.warning(f"⚠ Attention : {len(separees.ignores)} numéro(s) ne commencent ni par 1, 7, 8 ni par 9, ignorés")
+        detailler(journal, [{'numero': numero} for numero in separees.ignores],
+                  lambda element: f"   • numéro {element['numero']} (commence par '{element['numero'][0]}')",
+                  'numero_hors_groupe')
+
+    journal.info(f"✓ {len(separees.notes_178)} numéros commençant par 1, 7 ou 8")
+    journal.info(f"✓ {len(separees.notes_9)} numéros commençant par 9")
+    journal.info("")
 
-    for numero, note in dict_notes.items():
-        premier_chiffre = numero[0]
-        if premier_chiffre in ['1', '7', '8']:
-            notes_178[numero] = note
-        elif premier_chiffre == '9':
-            notes_9[numero] = note
-        else:
-            print(f"⚠ Attention : numéro {numero} commence par '{premier_chiffre}', ignoré")
+    try:
+        fichier_178, fichier_9 = colle.ecrire_notes_separees(separees, taux_reussite, fichier_notes_original)
+    except ErreurColle as e:
+        _quitter(e)
 
-    print(f"✓ {len(notes_178)} numéros commençant par 1, 7 ou 8")
-    print(f"✓ {len(notes_9)} numéros commençant par 9")
-    print()
+    format_fichier = "CSV" if fichier_178.endswith('.csv') else "XLSX"
+    journal.info(f"✓ Fichier {format_fichier} créé pour le groupe 1, 7 ou 8 : {len(separees.notes_178)} étudiants")
+    journal.info(f"✓ Fichier {format_fichier} créé pour le groupe 9 : {len(separees.notes_9)} étudiants")
+    journal.info("")
+    journal.info(f"✓ Fichiers créés :")
+    journal.info(f"  📁 Groupe 1/7/8 : {fichier_178}")
+    journal.info(f"  📁 Groupe 9 : {fichier_9}")
+    journal.info("")
 
-    # Déterminer le format et le nom de base du fichier original
-    fichier_path = Path(fichier_notes_original)
-    extension = fichier_path.suffix.lower()
-    nom_base = fichier_path.stem
-    repertoire = fichier_path.parent
-
-    # Créer les noms de fichiers pour les deux groupes
-    fichier_178 = repertoire / f"{nom_base}_1-7-8{extension}"
-    fichier_9 = repertoire / f"{nom_base}_9{extension}"
-
-    # Créer les deux fichiers selon le format
-    if extension == '.csv':
-        _creer_fichier_csv_separe(notes_178, taux_reussite, str(fichier_178), "1, 7 ou 8")
-        _creer_fichier_csv_separe(notes_9, taux_reussite, str(fichier_9), "9")
-    elif extension in ['.xlsx', '.xls']:
-        _creer_fichier_xlsx_separe(notes_178, taux_reussite, str(fichier_178), "1, 7 ou 8")
-        _creer_fichier_xlsx_separe(notes_9, taux_reussite, str(fichier_9), "9")
-    else:
-        print(f"✗ Erreur : format de fichier non supporté : {extension}")
-        sys.exit(1)
+    return fichier_178, fichier_9
 
-    print()
-    print(f"✓ Fichiers créés :")
-    print(f"  📁 Groupe 1/7/8 : {fichier_178}")
-    print(f"  📁 Groupe 9 : {fichier_9}")
-    print()
 
-    return str(fichier_178), str(fichier_9)
+def lire_poids(texte):
+    """Convertit une liste de poids séparés par des virgules (ex. 60,40) en nombres."""
+    try:
+        return [float(poids.replace(' ', '')) for poids in texte.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"poids invalides : {texte}") from None
 
 
-def _creer_fichier_csv_separe(dict_notes, taux_reussite, fichier_path, description):
+def fusionner_fichiers_notes(fichiers_notes, poids=None, absence='zero'):
     """
-    Crée un fichier CSV avec les notes filtrées.
+    Lit plusieurs fichiers de notes et combine les notes en une note pondérée par étudiant.
 
     Args:
-        dict_notes: {numero: note}
-        taux_reussite: {question: taux}
-        fichier_path: Chemin du fichier à créer
-        description: Description du groupe (pour les logs)
-    """
-    # Créer un DataFrame avec les colonnes 'etu' et 'Mark'
-    data = {
-        'etu': list(dict_notes.keys()),
-        'Mark': list(dict_notes.values())
-    }
-
-    # Ajouter les colonnes de taux de réussite
-    for question in sorted(taux_reussite.keys()):
-        data[question] = [taux_reussite[question]] * len(dict_notes)
+        fichiers_notes: Chemins des fichiers de notes (un par colle)
+        poids: Poids de chaque colle (par défaut égaux)
+        absence: Politique pour une colle manquée (voir colle.POLITIQUES_ABSENCE)
 
-    df = pd.DataFrame(data)
-    df.to_csv(fichier_path, sep=';', index=False)
-    print(f"✓ Fichier CSV créé pour le groupe {description} : {len(dict_notes)} étudiants")
-
-
-def _creer_fichier_xlsx_separe(dict_notes, taux_reussite, fichier_path, description):
+    Returns:
+        tuple: (dict_notes, taux_reussite) notes combinées et taux de réussite de chaque colle
     """
-    Crée un fichier XLSX avec les notes filtrées.
+    liste_notes = []
+    for rang, fichier in enumerate(fichiers_notes, 1):
+        journal.info(f"📄 Colle {rang} : {fichier}")
+        try:
+            liste_notes.append(colle.lire_notes(fichier))
+        except ErreurColle as e:
+            _quitter(e)
+        _afficher_lecture_notes(liste_notes[-1])
+        afficher_erreurs(liste_notes[-1].erreurs)
+        journal.info("")
 
-    Args:
-        dict_notes: {numero: note}
-        taux_reussite: {question: taux}
-        fichier_path: Chemin du fichier à créer
-        description: Description du groupe (pour les logs)
-    """
-    # Créer un DataFrame avec la structure attendue
-    # Lignes 0-3 : entêtes et infos
-    # Ligne 4 : taux de réussite
-    # Lignes 5+ : données étudiants
-
-    # Préparer les données
-    data_rows = []
-
-    # Ligne 0-3 : entêtes (vides pour simplifier)
-    for _ in range(4):
-        data_rows.append([None] * 47)
-
-    # Ligne 4 : taux de réussite
-    ligne_taux = [None] * 47
-    for i, question in enumerate(sorted(taux_reussite.keys()), start=6):
-        if i < 46:
-            ligne_taux[i] = taux_reussite[question]
-    data_rows.append(ligne_taux)
-
-    # Lignes 5+ : données étudiants
-    for numero, note in dict_notes.items():
-        ligne = [None] * 47
-        ligne[3] = note      # Colonne 3 : note
-        ligne[46] = numero   # Colonne 46 : numéro d'anonymat
-        data_rows.append(ligne)
-
-    # Créer le DataFrame et sauvegarder
-    df = pd.DataFrame(data_rows)
-    df.to_excel(fichier_path, index=False, header=False)
-    print(f"✓ Fichier XLSX créé pour le groupe {description} : {len(dict_notes)} étudiants")
+    try:
+        fusion = colle.fusionner_notes(liste_notes, poids, absence)
+    except ErreurColle as e:
+        _quitter(e)
+
+    journal.info("=" * 70)
+    journal.info(f"FUSION DE {len(fichiers_notes)} COLLES (absence : {absence})")
+    journal.info("=" * 70)
+    journal.info("")
+    for rang, (fichier, poids_colle, presents, absents) in enumerate(
+            zip(fichiers_notes, fusion.poids, fusion.presents, fusion.absents), 1):
+        journal.info(f"   • Colle {rang} ({poids_colle:.0%}) : {presents} présent(s), {absents} absent(s)  ← {fichier}")
+    if fusion.exclus:
+        journal.warning(f"⚠ {len(fusion.exclus)} étudiant(s) écarté(s) du classement (colle manquée)")
+        detailler(journal, [{'numero': numero} for numero in fusion.exclus],
+                  lambda etudiant: f"   • Numéro {etudiant['numero']}", 'etudiant_exclu')
+    journal.info(f"✓ {len(fusion.notes)} note(s) combinée(s)")
+    journal.info("")
+    return fusion.notes, fusion.taux_reussite
 
 
 def afficher_erreurs(erreurs):
@@ -516,32 +354,46 @@ def afficher_erreurs(erreurs):
     if not erreurs:
         return
 
-    print("\n" + "=" * 70)
-    print("ERREURS DE VALIDATION DÉTECTÉES")
-    print("=" * 70)
-    print()
-    print("Les numéros d'anonymat suivants ne sont pas valides (doivent être à 4 chiffres) :")
-    print()
+    journal.info("\n" + "=" * 70)
+    journal.info("ERREURS DE VALIDATION DÉTECTÉES")
+    journal.info("=" * 70)
+    journal.info("")
+    journal.info("Les numéros d'anonymat suivants ne sont pas valides (doivent être à 4 chiffres) :")
+    journal.info("")
 
-    for i, erreur in enumerate(erreurs, 1):
-        print(f"{i}. Ligne {erreur['ligne']} : Numéro '{erreur['numero']}' (Note: {erreur['note']:.2f})")
-        print(f"   → {erreur['raison']}")
+    detailler(journal, [{'rang': i, **erreur} for i, erreur in enumerate(erreurs, 1)],
+              lambda erreur: (f"{erreur['rang']}. Ligne {erreur['ligne']} : Numéro '{erreur['numero']}' "
+                              f"(Note: {erreur['note']:.2f})\n   → {erreur['raison']}"),
+              'numero_invalide')
+
+    journal.info("")
+    journal.info("Ces étudiants ont été ignorés et ne seront pas inclus dans le fichier de sortie.")
+    journal.info("Veuillez corriger ces numéros dans le fichier source et relancer le programme.")
+    journal.info("=" * 70)
+    journal.info("")
 
-    print()
-    print("Ces étudiants ont été ignorés et ne seront pas inclus dans le fichier de sortie.")
-    print("Veuillez corriger ces numéros dans le fichier source et relancer le programme.")
-    print("=" * 70)
-    print()
 
+def _decrire_proposition(proposition):
+    """Licences proposées à un étudiant, avec les numéros proches qui les justifient."""
+    return ", ".join(f"{licence} ({', '.join(connu for connu, _ in candidats)})"
+                     for licence, candidats in proposition.licences)
 
-def assigner_licences_interactif(etudiants_ignores, etudiants_par_licence, dict_licences):
+
+def assigner_licences_interactif(etudiants_ignores, etudiants_par_licence, dict_licences, automatique=False,
+                                 interactif=True):
     """
     Permet à l'utilisateur d'assigner interactivement une licence aux étudiants non trouvés.
 
+    Pour chaque étudiant, les licences des numéros connus à un chiffre près (chiffre mal
+    lu, ajouté, oublié ou inversé) sont proposées ; la première est choisie par Entrée.
+
     Args:
         etudiants_ignores: Liste des (numero, note) non trouvés
         etudiants_par_licence: Dict {licence: [(numero, note), ...]}
         dict_licences: Dict {numero: licence} (sera modifié)
+        automatique: Sans question, assigner les étudiants qui n'ont qu'un seul numéro
+                     connu à un chiffre près ; les autres restent sans licence
+        interactif: False pour seulement lister les étudiants non trouvés, sans question
 
     Returns:
         tuple: (etudiants_par_licence mis à jour, nouvelle liste etudiants_ignores)
@@ -549,6 +401,25 @@ def assigner_licences_interactif(etudiants_ignores, etudiants_par_licence, dict_
     if not etudiants_ignores:
         return etudiants_par_licence, []
 
+    # Un numéro déjà attribué à un étudiant de la colle n'est pas une erreur de lecture plausible
+    attribues = {numero for etudiants in etudiants_par_licence.values() for numero, _ in etudiants}
+    propositions = colle.proposer_licences(etudiants_ignores, dict_licences, exclus=attribues)
+
+    if automatique:
+        affectations = colle.affectations_sans_ambiguite(propositions)
+        journal.info(f"🔎 {len(affectations)}/{len(etudiants_ignores)} étudiant(s) assigné(s) automatiquement "
+                     f"(un seul numéro connu à un chiffre près)")
+        detailler(journal, [{'numero': proposition.numero, 'licence': affectations[proposition.numero],
+                             'numeros_proches': [connu for connu, _ in proposition.licences[0][1]]}
+                            for proposition in propositions if proposition.numero in affectations],
+                  lambda affectation: f"   • {affectation['numero']} → {affectation['licence']} "
+                                      f"(numéro proche : {', '.join(affectation['numeros_proches'])})",
+                  'assignation_automatique')
+        repartition = colle.assigner_licences(
+            colle.Repartition(etudiants_par_licence, etudiants_ignores), affectations, dict_licences
+        )
+        return repartition.etudiants_par_licence, repartition.etudiants_ignores
+
     print("\n" + "=" * 70)
     print("ÉTUDIANTS NON TROUVÉS DANS LE FICHIER DES LICENCES")
     print("=" * 70)
@@ -556,8 +427,18 @@ def assigner_licences_interactif(etudiants_ignores, etudiants_par_licence, dict_
     print(f"{len(etudiants_ignores)} étudiant(s) avec un numéro à 4 chiffres n'ont pas été trouvés :")
     print()
 
-    for i, (numero, note) in enumerate(etudiants_ignores, 1):
-        print(f"{i}. Numéro {numero} (Note: {note:.2f})")
+    detailler(journal, [{'rang': i, 'numero': proposition.numero, 'note': proposition.note,
+                         'suggestions': _decrire_proposition(proposition)}
+                        for i, proposition in enumerate(propositions, 1)],
+              lambda etudiant: f"{etudiant['rang']}. Numéro {etudiant['numero']} (Note: {etudiant['note']:.2f})"
+                               + (f" → suggestion : {etudiant['suggestions']}" if etudiant['suggestions'] else ""),
+              'etudiant_non_trouve')
+
+    if not interactif:
+        journal.info("")
+        journal.info("Les étudiants non trouvés seront ignorés (aucune question posée avec --notes, --licences "
+                     "et --sortie ; voir --auto-assigner).")
+        return etudiants_par_licence, etudiants_ignores
 
     print()
     print("Licences disponibles dans le fichier :")
@@ -573,50 +454,52 @@ def assigner_licences_interactif(etudiants_ignores, etudiants_par_licence, dict_
         print("Les étudiants non trouvés seront ignorés.")
         return etudiants_par_licence, etudiants_ignores
 
-    nouveaux_ignores = []
+    affectations = {}
 
-    for numero, note in etudiants_ignores:
+    for proposition in propositions:
+        numero, note = proposition.numero, proposition.note
         print()
         print(f"Étudiant : Numéro {numero} (Note: {note:.2f})")
-        print("Entrez le numéro ou le nom de la licence (ou 'i' pour ignorer) :")
+        suggestion = proposition.licences[0][0] if proposition.licences else None
+        if suggestion is not None:
+            print(f"💡 Numéros proches : {_decrire_proposition(proposition)}")
+            print(f"Entrez le numéro ou le nom de la licence (Entrée pour '{suggestion}', 'i' pour ignorer) :")
+        else:
+            print("Entrez le numéro ou le nom de la licence (ou 'i' pour ignorer) :")
 
         choix = input("➜ ").strip()
 
         if choix.lower() == 'i':
-            nouveaux_ignores.append((numero, note))
             print(f"  → Étudiant {numero} ignoré")
             continue
 
-        # Essayer d'interpréter comme un numéro
-        try:
-            idx = int(choix) - 1
-            if 0 <= idx < len(licences_disponibles):
-                licence = licences_disponibles[idx]
-            else:
-                print(f"  ⚠ Numéro invalide. Étudiant {numero} ignoré")
-                nouveaux_ignores.append((numero, note))
-                continue
-        except ValueError:
-            # Interpréter comme un nom de licence
-            licence = choix
-
-        # Ajouter l'étudiant à la licence
-        if licence not in etudiants_par_licence:
-            etudiants_par_licence[licence] = []
+        if not choix and suggestion is not None:
+            licence = suggestion
+        else:
+            # Essayer d'interpréter comme un numéro
+            try:
+                idx = int(choix) - 1
+                if 0 <= idx < len(licences_disponibles):
+                    licence = licences_disponibles[idx]
+                else:
+                    print(f"  ⚠ Numéro invalide. Étudiant {numero} ignoré")
+                    continue
+            except ValueError:
+                # Interpréter comme un nom de licence
+                licence = choix
 
-        etudiants_par_licence[licence].append((numero, note))
-        dict_licences[numero] = licence
+        affectations[numero] = licence
         print(f"  ✓ Étudiant {numero} assigné à la licence '{licence}'")
 
-    # Retrier chaque liste
-    for licence in etudiants_par_licence:
-        etudiants_par_licence[licence].sort(key=lambda x: x[1], reverse=True)
+    repartition = colle.assigner_licences(
+        colle.Repartition(etudiants_par_licence, etudiants_ignores), affectations, dict_licences
+    )
 
-    if nouveaux_ignores:
+    if repartition.etudiants_ignores:
         print()
-        print(f"⚠ {len(nouveaux_ignores)} étudiant(s) ignoré(s) ne seront pas inclus dans le fichier de sortie.")
+        print(f"⚠ {len(repartition.etudiants_ignores)} étudiant(s) ignoré(s) ne seront pas inclus dans le fichier de sortie.")
 
-    return etudiants_par_licence, nouveaux_ignores
+    return repartition.etudiants_par_licence, repartition.etudiants_ignores
 
 
 def organiser_donnees(dict_notes, dict_licences):
@@ -632,241 +515,153 @@ def organiser_donnees(dict_notes, dict_licences):
                etudiants_par_licence = {licence: [(numero, note), ...]} et
                etudiants_ignores = [(numero, note), ...]
     """
-    etudiants_par_licence = {}
-    etudiants_ignores = []
-
-    for numero, note in dict_notes.items():
-        if numero in dict_licences:
-            licence = dict_licences[numero]
-
-            if licence not in etudiants_par_licence:
-                etudiants_par_licence[licence] = []
-
-            etudiants_par_licence[licence].append((numero, note))
-        else:
-            etudiants_ignores.append((numero, note))
+    repartition = colle.organiser_donnees(dict_notes, dict_licences)
+    etudiants_par_licence, etudiants_ignores = repartition.etudiants_par_licence, repartition.etudiants_ignores
 
     # Afficher les étudiants ignorés
     if etudiants_ignores:
-        print(f"\n⚠ {len(etudiants_ignores)} étudiant(s) non trouvé(s) dans le fichier des licences :")
-        print()
+        journal.warning(f"\n⚠ {len(etudiants_ignores)} étudiant(s) non trouvé(s) dans le fichier des licences :")
+        journal.info("")
         # Trier par numéro pour un affichage ordonné
-        etudiants_ignores_tries = sorted(etudiants_ignores, key=lambda x: x[0])
-        for numero, note in etudiants_ignores_tries:
-            print(f"   • Numéro CREM : {numero} (Note : {note:.2f})")
-        print()
-        print(f"   Total d'étudiants traités : {sum(len(v) for v in etudiants_par_licence.values())}/{len(dict_notes)}")
-
-    # Trier chaque liste par note décroissante
-    for licence in etudiants_par_licence:
-        etudiants_par_licence[licence].sort(key=lambda x: x[1], reverse=True)
+        detailler(journal, [{'numero': numero, 'note': note} for numero, note in sorted(etudiants_ignores)],
+                  lambda etudiant: f"   • Numéro CREM : {etudiant['numero']} (Note : {etudiant['note']:.2f})",
+                  'etudiant_sans_licence')
+        journal.info("")
+        journal.info(f"   Total d'étudiants traités : {sum(len(v) for v in etudiants_par_licence.values())}/{len(dict_notes)}")
 
     return etudiants_par_licence, etudiants_ignores
 
 
-def creer_fichier_sortie(etudiants_par_licence, taux_reussite, fichier_sortie="resultats.xlsx", groupes=None, etudiants_ignores=None):
+def creer_fichier_sortie(etudiants_par_licence, taux_reussite, fichier_sortie="resultats.xlsx", groupes=None, etudiants_ignores=None,
+                         format_sortie=None):
     """
-    Crée le fichier XLSX de sortie avec toutes les feuilles.
+    Crée le fichier de sortie avec toutes les feuilles.
 
     Args:
         etudiants_par_licence: {licence: [(numero, note), ...]}
         taux_reussite: {question: taux}
         fichier_sortie: Nom du fichier de sortie
-        groupes: dict {'Groupe A': [licences], 'Groupe B': [licences], 'Groupe C': [licences]}
+        groupes: dict {nom du groupe: [licences] ou TOUTES_LICENCES}
         etudiants_ignores: [(numero, note), ...] étudiants sans licence
+        format_sortie: Format du fichier (par défaut : d'après l'extension, sinon xlsx)
 
     Returns:
         str: Chemin absolu du fichier créé
     """
-    if groupes is None:
-        groupes = {'Groupe A': [], 'Groupe B': [], 'Groupe C': []}
-    if etudiants_ignores is None:
-        etudiants_ignores = []
+    try:
+        resultat = colle.creer_fichier_sortie(etudiants_par_licence, taux_reussite, fichier_sortie, groupes,
+                                              etudiants_ignores, format_sortie)
+    except ErreurColle as e:
+        _quitter(e)
+
+    feuilles = resultat.feuilles
+    if resultat.extension_remplacee is not None:
+        journal.warning(f"⚠ Extension '{resultat.extension_remplacee}' non supportée, "
+                        f"utilisation de {FORMATS_SORTIE[resultat.format]} à la place")
+    journal.info(f"✓ Feuille 'Général' créée avec {feuilles['Général']} étudiants")
+    journal.info(f"✓ Feuille 'Stats' créée")
+    for licence in sorted(etudiants_par_licence.keys()):
+        journal.info(f"✓ Feuille '{licence}' créée avec {feuilles[licence]} étudiants")
+    for nom_groupe, licences_groupe in (groupes or dict.fromkeys(colle.GROUPES, [])).items():
+        if nom_groupe in resultat.groupes_non_crees:
+            journal.warning(f"⚠ Groupe '{nom_groupe}' : {resultat.groupes_non_crees[nom_groupe]}, feuille non créée")
+            continue
+        if licences_groupe == TOUTES_LICENCES:
+            licences_groupe = etudiants_par_licence
+        journal.info(f"✓ Feuille '{nom_groupe}' créée avec {feuilles[nom_groupe]} étudiants "
+                     f"de {len(licences_groupe)} licence(s)")
+        absentes = [licence for licence in licences_groupe if licence not in etudiants_par_licence]
+        if absentes:
+            journal.warning(f"   ⚠ Licence(s) sans étudiant : {', '.join(absentes)}")
+    if 'Sans Licence' in feuilles:
+        journal.warning(f"⚠ Feuille 'Sans Licence' créée avec {feuilles['Sans Licence']} étudiants")
+
+    journal.info(f"\n✓ Fichier créé avec succès !")
+    journal.info(f"  📁 Emplacement : {resultat.chemin}")
+    journal.info(f"  Total de {len(etudiants_par_licence)} licences traitées")
+    if etudiants_ignores:
+        journal.warning(f"  ⚠ {len(etudiants_ignores)} étudiant(s) sans licence")
 
-    # Forcer l'extension .xlsx si une autre extension est fournie
-    extension = Path(fichier_sortie).suffix.lower()
-    if extension != '.xlsx':
-        print(f"⚠ Extension '{extension}' non supportée, utilisation de .xlsx à la place")
-        fichier_sortie = str(Path(fichier_sortie).with_suffix('.xlsx'))
+    return resultat.chemin
 
-    # Convertir en chemin absolu
-    chemin_absolu = str(Path(fichier_sortie).resolve())
 
-    try:
-        with pd.ExcelWriter(chemin_absolu, engine='openpyxl') as writer:
-            # ===== FEUILLE "Général" =====
-            tous_etudiants = []
-            for licence, etudiants in etudiants_par_licence.items():
-                for numero, note in etudiants:
-                    tous_etudiants.append({
-                        'Numéro CREM': numero,
-                        'Note': note,
-                        'Licence': licence
-                    })
-            
-            df_general = pd.DataFrame(tous_etudiants)
-            df_general = df_general.sort_values('Note', ascending=False)
-            df_general.to_excel(writer, sheet_name='Général', index=False)
-            print(f"✓ Feuille 'Général' créée avec {len(df_general)} étudiants")
-            
-            # ===== FEUILLE "Stats" =====
-            stats_data = []
-            
-            # Statistiques générales
-            toutes_notes = [note for _, etudiants in etudiants_par_licence.items() 
-                           for _, note in etudiants]
-            
-            if toutes_notes:
-                stats_data.append({
-                    'Licence': 'GÉNÉRAL',
-                    'Nombre d\'étudiants': len(toutes_notes),
-                    'Moyenne': round(sum(toutes_notes) / len(toutes_notes), 2),
-                    'Médiane': round(pd.Series(toutes_notes).median(), 2),
-                    'Écart-type': round(pd.Series(toutes_notes).std(), 2),
-                    'Note min': round(min(toutes_notes), 2),
-                    'Note max': round(max(toutes_notes), 2)
-                })
-                
-                # Ligne vide
-                stats_data.append({
-                    'Licence': '', 'Nombre d\'étudiants': '', 'Moyenne': '',
-                    'Médiane': '', 'Écart-type': '', 'Note min': '', 'Note max': ''
-                })
-                
-                # Statistiques par licence
-                for licence in sorted(etudiants_par_licence.keys()):
-                    notes = [note for _, note in etudiants_par_licence[licence]]
-                    stats_data.append({
-                        'Licence': licence,
-                        'Nombre d\'étudiants': len(notes),
-                        'Moyenne': round(sum(notes) / len(notes), 2),
-                        'Médiane': round(pd.Series(notes).median(), 2),
-                        'Écart-type': round(pd.Series(notes).std(), 2),
-                        'Note min': round(min(notes), 2),
-                        'Note max': round(max(notes), 2)
-                    })
-            
-            df_stats = pd.DataFrame(stats_data)
-            
-            # Ajouter une section vide puis les taux de réussite
-            if taux_reussite:
-                # Ajouter 2 lignes vides
-                for _ in range(2):
-                    df_stats = pd.concat([df_stats, pd.DataFrame([{
-                        'Licence': '', 'Nombre d\'étudiants': '', 'Moyenne': '',
-                        'Médiane': '', 'Écart-type': '', 'Note min': '', 'Note max': ''
-                    }])], ignore_index=True)
-                
-                # Ajouter un titre pour la section taux de réussite
-                df_stats = pd.concat([df_stats, pd.DataFrame([{
-                    'Licence': 'TAUX DE RÉUSSITE PAR QUESTION',
-                    'Nombre d\'étudiants': '', 'Moyenne': '',
-                    'Médiane': '', 'Écart-type': '', 'Note min': '', 'Note max': ''
-                }])], ignore_index=True)
-                
-                # Ajouter les taux de réussite
-                for question in sorted(taux_reussite.keys()):
-                    taux = round(taux_reussite[question] * 100, 2)
-                    df_stats = pd.concat([df_stats, pd.DataFrame([{
-                        'Licence': question,
-                        'Nombre d\'étudiants': f'{taux}%',
-                        'Moyenne': '', 'Médiane': '', 'Écart-type': '', 
-                        'Note min': '', 'Note max': ''
-                    }])], ignore_index=True)
-            
-            df_stats.to_excel(writer, sheet_name='Stats', index=False)
-            print(f"✓ Feuille 'Stats' créée")
-            
-            # ===== FEUILLES PAR LICENCE =====
-            for licence in sorted(etudiants_par_licence.keys()):
-                data = {
-                    'Numéro CREM': [etudiant[0] for etudiant in etudiants_par_licence[licence]],
-                    'Note': [etudiant[1] for etudiant in etudiants_par_licence[licence]]
-                }
-                df = pd.DataFrame(data)
-                df.to_excel(writer, sheet_name=licence, index=False)
-                print(f"✓ Feuille '{licence}' créée avec {len(df)} étudiants")
-
-            # ===== FEUILLES DE GROUPES =====
-            for nom_groupe in ['Groupe A', 'Groupe B', 'Groupe C']:
-                licences_groupe = groupes.get(nom_groupe, [])
-
-                if not licences_groupe:
-                    print(f"⚠ Groupe '{nom_groupe}' : aucune licence sélectionnée, feuille non créée")
-                    continue
+def main(argv=None, prog=None):
+    """
+    Fonction principale.
+
+    Sans option, les fichiers sont choisis par des dialogues de sélection (tkinter) ;
+    avec --notes et --licences, aucune fenêtre n'est ouverte.
+    """
+    parser = argparse.ArgumentParser(
+        prog=prog or "python traiter_colle.py",
+        description="Traitement des notes d'examen par licence",
+        epilog="Avec --notes, --licences et --sortie, aucune question n'est posée : les étudiants non "
+               "trouvés restent sans licence (sauf --auto-assigner) et seuls les groupes de --groupes sont créés."
+    )
+    parser.add_argument('--notes', metavar='FICHIER', action='append',
+                        help="fichier de notes (CSV, XLSX, XLS ou ODS) ; à répéter pour fusionner plusieurs colles")
+    parser.add_argument('--licences', metavar='FICHIER', help=f"fichier des licences (CSV, XLSX, XLS, ODS ou {EXTENSION_INDEX})")
+    parser.add_argument('--sortie', metavar='FICHIER', help="fichier de sortie (défaut : demandé, puis resultats.xlsx)")
+    parser.add_argument('--poids', type=lire_poids, metavar='P1,P2,...',
+                        help="avec plusieurs --notes, poids de chaque colle (ex. 60,40 ; défaut : poids égaux)")
+    parser.add_argument('--absence', choices=colle.POLITIQUES_ABSENCE, default='zero',
+                        help="avec plusieurs --notes, colle manquée : comptée 0 (zero, défaut), moyenne des "
+                             "colles passées (renormaliser) ou étudiant écarté (exclure)")
+    parser.add_argument('--auto-assigner', action='store_true',
+                        help="assigner sans question les étudiants non trouvés dont le numéro n'est à un "
+                             "chiffre près que d'un seul numéro connu")
+    parser.add_argument('--groupes', metavar='JSON',
+                        help="fichier JSON des groupes (nombre quelconque, une licence pouvant appartenir à "
+                             "plusieurs groupes) ; remplace la configuration interactive des groupes A, B et C")
+    parser.add_argument('--format', choices=list(FORMATS_SORTIE), dest='format_sortie',
+                        help="format de sortie : xlsx, ods, csv (zip d'un CSV par feuille), parquet ou arrow "
+                             "(dossier d'un fichier par feuille) ; défaut : d'après l'extension de --sortie, sinon xlsx")
+    ajouter_options(parser)
+    mesures.ajouter_options(parser)
+    args = parser.parse_args(argv)
+    if args.poids and len(args.poids) != len(args.notes or []):
+        parser.error(f"--poids : {len(args.poids)} poids pour {len(args.notes or [])} fichier(s) de notes")
+    configurer_depuis_options(args)
+    mesures.activer_depuis_options(args, 'traiter_colle')
 
-                # Regrouper tous les étudiants des licences sélectionnées
-                etudiants_groupe = []
-                for licence in licences_groupe:
-                    if licence in etudiants_par_licence:
-                        for numero, note in etudiants_par_licence[licence]:
-                            etudiants_groupe.append({
-                                'Numéro CREM': numero,
-                                'Note': note,
-                                'Licence': licence
-                            })
-
-                if etudiants_groupe:
-                    df_groupe = pd.DataFrame(etudiants_groupe)
-                    df_groupe = df_groupe.sort_values('Note', ascending=False)
-                    df_groupe.to_excel(writer, sheet_name=nom_groupe, index=False)
-                    print(f"✓ Feuille '{nom_groupe}' créée avec {len(df_groupe)} étudiants de {len(licences_groupe)} licence(s)")
-                else:
-                    print(f"⚠ Groupe '{nom_groupe}' : aucun étudiant trouvé, feuille non créée")
-
-            # ===== FEUILLE "Sans Licence" =====
-            if etudiants_ignores:
-                data_sans_licence = {
-                    'Numéro CREM': [etudiant[0] for etudiant in etudiants_ignores],
-                    'Note': [etudiant[1] for etudiant in etudiants_ignores]
-                }
-                df_sans_licence = pd.DataFrame(data_sans_licence)
-                df_sans_licence = df_sans_licence.sort_values('Note', ascending=False)
-                df_sans_licence.to_excel(writer, sheet_name='Sans Licence', index=False)
-                print(f"⚠ Feuille 'Sans Licence' créée avec {len(df_sans_licence)} étudiants")
-
-        print(f"\n✓ Fichier créé avec succès !")
-        print(f"  📁 Emplacement : {chemin_absolu}")
-        print(f"  Total de {len(etudiants_par_licence)} licences traitées")
-        if etudiants_ignores:
-            print(f"  ⚠ {len(etudiants_ignores)} étudiant(s) sans licence")
-
-        return chemin_absolu
-
-    except Exception as e:
-        print(f"✗ Erreur lors de la création du fichier de sortie : {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-
-
-def main():
-    """Fonction principale."""
     print("=" * 70)
     print("Programme de traitement des notes d'examen par licence")
     print("=" * 70)
     print()
 
-    # Sélectionner le fichier de notes
-    print("📂 Sélectionnez le fichier de notes (XLSX ou CSV)...")
-    fichier_notes = selectionner_fichier(
-        "Sélectionner le fichier de notes",
-        [("Fichiers CSV", "*.csv"), ("Fichiers XLSX", "*.xlsx"), ("Tous les fichiers", "*.*")]
-    )
+    # Tous les fichiers donnés en option : traitement sans question (scripts, tâches planifiées)
+    interactif = not (args.notes and args.licences and args.sortie)
+
+    # Groupes lus d'avance : une erreur dans le fichier arrête le traitement avant la lecture des notes
+    groupes = charger_groupes(args.groupes) if args.groupes else None
 
-    if not fichier_notes:
+    # Sélectionner le fichier de notes (plusieurs : fusion des colles)
+    fichiers_notes = args.notes or []
+    fichier_notes = fichiers_notes[0] if len(fichiers_notes) == 1 else None
+    if not fichiers_notes:
+        print("📂 Sélectionnez le fichier de notes (XLSX ou CSV)...")
+        fichier_notes = selectionner_fichier(
+            "Sélectionner le fichier de notes",
+            [("Fichiers CSV", "*.csv"), ("Fichiers XLSX", "*.xlsx"), ("Tous les fichiers", "*.*")]
+        )
+
+    if not fichier_notes and not fichiers_notes:
         print("✗ Aucun fichier sélectionné. Abandon.")
         sys.exit(0)
 
-    print(f"✓ Fichier sélectionné : {fichier_notes}")
+    for fichier in fichiers_notes or [fichier_notes]:
+        print(f"✓ Fichier sélectionné : {fichier}")
     print()
 
     # Sélectionner le fichier des licences
-    print("📂 Sélectionnez le fichier des licences (XLSX ou CSV)...")
-    fichier_licences = selectionner_fichier(
-        "Sélectionner le fichier des licences",
-        [("Fichiers CSV", "*.csv"), ("Fichiers XLSX", "*.xlsx"), ("Tous les fichiers", "*.*")]
-    )
+    fichier_licences = args.licences
+    if not fichier_licences:
+        print("📂 Sélectionnez le fichier des licences (XLSX, CSV ou index .licidx)...")
+        fichier_licences = selectionner_fichier(
+            "Sélectionner le fichier des licences",
+            [("Fichiers CSV", "*.csv"), ("Fichiers XLSX", "*.xlsx"), ("Index de licences", f"*{EXTENSION_INDEX}"),
+             ("Tous les fichiers", "*.*")]
+        )
 
     if not fichier_licences:
         print("✗ Aucun fichier sélectionné. Abandon.")
@@ -876,76 +671,100 @@ def main():
     print()
 
     # Demander le nom du fichier de sortie
-    print("Nom du fichier de sortie [resultats.xlsx] :")
-    fichier_sortie = input("➜ ").strip()
+    fichier_sortie = args.sortie
+    sortie_par_defaut = f"resultats{FORMATS_SORTIE[args.format_sortie or FORMAT_PAR_DEFAUT]}"
+    if not fichier_sortie:
+        print(f"Nom du fichier de sortie [{sortie_par_defaut}] :")
+        fichier_sortie = input("➜ ").strip()
 
     if not fichier_sortie:
-        fichier_sortie = "resultats.xlsx"
+        fichier_sortie = sortie_par_defaut
 
-    print()
-    print("-" * 70)
-    print("Traitement en cours...")
-    print("-" * 70)
-    print()
+    journal.info("")
+    journal.info("-" * 70)
+    journal.info("Traitement en cours...")
+    journal.info("-" * 70)
+    journal.info("")
 
     # Lire les fichiers
-    dict_notes, taux_reussite, erreurs = lire_fichier_notes(fichier_notes)
-    print()
+    if fichier_notes is None:
+        # Plusieurs colles : classement sur la note pondérée, sans fichiers séparés 1/7/8 et 9
+        with etape('fusion') as mesure:
+            dict_notes, taux_reussite = fusionner_fichiers_notes(fichiers_notes, args.poids, args.absence)
+            mesure.lignes = len(dict_notes)
+    else:
+        with etape('lecture_notes') as mesure:
+            dict_notes, taux_reussite, erreurs = lire_fichier_notes(fichier_notes)
+            mesure.lignes = len(dict_notes)
+        journal.info("")
 
-    # Afficher les erreurs de validation
-    afficher_erreurs(erreurs)
+        # Afficher les erreurs de validation
+        afficher_erreurs(erreurs)
 
-    # Séparer les notes par premier chiffre et créer deux fichiers
-    fichier_178, fichier_9 = separer_notes_par_premier_chiffre(dict_notes, taux_reussite, fichier_notes)
+        # Séparer les notes par premier chiffre et créer deux fichiers
+        with etape('separation', lignes=len(dict_notes)):
+            fichier_178, fichier_9 = separer_notes_par_premier_chiffre(dict_notes, taux_reussite, fichier_notes)
 
-    dict_licences = lire_fichier_licences(fichier_licences)
-    print()
+    with etape('lecture_licences') as mesure:
+        dict_licences = lire_fichier_licences(fichier_licences)
+        mesure.lignes = len(dict_licences)
+    journal.info("")
 
     # Organiser les données
-    print("-" * 70)
-    print("Organisation des données par licence...")
-    print("-" * 70)
-    print()
-    print(f"📊 Total de notes à traiter : {len(dict_notes)}")
-    print(f"📋 Total d'étudiants dans le fichier licences : {len(dict_licences)}")
-    etudiants_par_licence, etudiants_ignores = organiser_donnees(dict_notes, dict_licences)
+    journal.info("-" * 70)
+    journal.info("Organisation des données par licence...")
+    journal.info("-" * 70)
+    journal.info("")
+    journal.info(f"📊 Total de notes à traiter : {len(dict_notes)}")
+    journal.info(f"📋 Total d'étudiants dans le fichier licences : {len(dict_licences)}")
+    with etape('organisation', lignes=len(dict_notes)):
+        etudiants_par_licence, etudiants_ignores = organiser_donnees(dict_notes, dict_licences)
 
     # Afficher la répartition détaillée par licence
     if etudiants_par_licence:
-        print()
-        print("📌 Répartition par licence :")
+        journal.info("")
+        journal.info("📌 Répartition par licence :")
         for licence in sorted(etudiants_par_licence.keys()):
             nb_etudiants = len(etudiants_par_licence[licence])
-            print(f"   • {licence} : {nb_etudiants} étudiant(s)")
-    print()
+            journal.info(f"   • {licence} : {nb_etudiants} étudiant(s)")
+    journal.info("")
 
     # Permettre l'assignation interactive des licences
     if etudiants_ignores:
-        etudiants_par_licence, etudiants_ignores = assigner_licences_interactif(
-            etudiants_ignores, etudiants_par_licence, dict_licences
-        )
-        print()
+        with etape('assignation', lignes=len(etudiants_ignores)):
+            etudiants_par_licence, etudiants_ignores = assigner_licences_interactif(
+                etudiants_ignores, etudiants_par_licence, dict_licences, args.auto_assigner, interactif
+            )
+        journal.info("")
 
     # Configurer les groupes
-    licences_disponibles = sorted(etudiants_par_licence.keys())
-    groupes = selectionner_licences_pour_groupes(licences_disponibles)
-    print()
+    if groupes is None and not interactif:
+        groupes = {}
+    elif groupes is None:
+        licences_disponibles = sorted(etudiants_par_licence.keys())
+        groupes = selectionner_licences_pour_groupes(licences_disponibles)
+        journal.info("")
 
     # Créer le fichier de sortie
-    print("-" * 70)
-    print("Création du fichier de sortie...")
-    print("-" * 70)
-    print()
-    chemin_final = creer_fichier_sortie(etudiants_par_licence, taux_reussite, fichier_sortie, groupes, etudiants_ignores)
-
-    print()
-    print("=" * 70)
-    print("Traitement terminé avec succès !")
-    print("=" * 70)
-    print()
-    print(f"📄 Fichier disponible ici : {chemin_final}")
-    print()
-    print("Vous pouvez maintenant ouvrir ce fichier avec Excel.")
+    compter('etudiant_sans_licence', len(etudiants_ignores))
+    journal.info("-" * 70)
+    journal.info("Création du fichier de sortie...")
+    journal.info("-" * 70)
+    journal.info("")
+    with etape('ecriture', lignes=len(dict_notes)):
+        chemin_final = creer_fichier_sortie(etudiants_par_licence, taux_reussite, fichier_sortie, groupes,
+                                            etudiants_ignores, args.format_sortie)
+
+    journal.info("")
+    journal.info("=" * 70)
+    journal.info("Traitement terminé avec succès !")
+    journal.info("=" * 70)
+    journal.info("")
+    journal.info(f"📄 Fichier disponible ici : {chemin_final}")
+    resumer_compteurs(journal, ANOMALIES)
+    if chemin_final.endswith(('.xlsx', '.ods')):
+        journal.info("")
+        journal.info("Vous pouvez maintenant ouvrir ce fichier avec Excel.")
 
 
 if __name__ == "__main__":